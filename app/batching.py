@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from src.logger import logging_instance
+
+
+class MicroBatcher:
+    """
+    Bir vaqtda kelgan bitta qatorli so'rovlarni qisqa oyna (max_wait_ms) yoki
+    max_batch_size qator yig'ilguncha to'playdi va bitta predict bilan hisoblaydi.
+    Predict alohida bitta thread'da ishlaydi, shuning uchun bazaviy modellar
+    yadrolar uchun bir-biri bilan raqobatlashmaydi.
+
+    Batch xato bilan tugasa faqat shu batch'dagi so'rovlar xato oladi; ishchi task to'xtab qolsa
+    (xato yoki tashqi cancel) uning qo'lidagi so'rovlar xato bilan yakunlanadi va task qayta
+    ishga tushiriladi. submit timeout_s dan uzoq kutmaydi.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0, stats_window: int = 10000,
+                 timeout_s: float = 30.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout_s = timeout_s
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        # Navbatdan olingan, lekin hali javob berilmagan so'rovlar (task o'lsa shular xato oladi)
+        self._inflight: List[Tuple[np.ndarray, float, asyncio.Future]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+        # Metrikalar
+        self.n_batches = 0
+        self.n_rows = 0
+        self.n_errors = 0
+        self.n_restarts = 0
+        self.n_timeouts = 0
+        self._batch_sizes: deque = deque(maxlen=stats_window)
+        self._queue_delays: deque = deque(maxlen=stats_window)
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._spawn()
+
+    def _spawn(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task):
+        if self._stopping:
+            return
+        # Ishchi kutilmaganda to'xtadi: qo'lidagi so'rovlar xato oladi, navbatdagilar yangi task'ga o'tadi
+        reason = "bekor qilindi" if task.cancelled() else repr(task.exception())
+        logging_instance.error(f"MicroBatcher ishchisi to'xtadi ({reason}), qayta ishga tushirilmoqda")
+        self._fail(self._inflight, RuntimeError(f"MicroBatcher ishchisi to'xtadi: {reason}"))
+        self.n_restarts += 1
+        self._spawn()
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Javobsiz qolgan so'rovlar kutib qolmasin
+        error = RuntimeError("MicroBatcher to'xtatildi")
+        self._fail(self._inflight, error)
+        while self._queue is not None and not self._queue.empty():
+            self._fail([self._queue.get_nowait()], error)
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, row: np.ndarray) -> float:
+        if self._queue is None or self._stopping:
+            raise RuntimeError("MicroBatcher ishga tushirilmagan")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, time.perf_counter(), future))
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            self.n_timeouts += 1
+            raise
+
+    @staticmethod
+    def _fail(items, error: BaseException):
+        for _, _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _collect(self) -> List[Tuple[np.ndarray, float, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        items = self._inflight
+        items.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            # Navbatda turganlarini kutmasdan olamiz
+            while len(items) < self.max_batch_size and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(items) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            self._inflight = []
+            items = await self._collect()
+            try:
+                await self._process(items)
+            except Exception as e:
+                # Faqat shu batch'dagi so'rovlar xato oladi, keyingi batch'lar davom etadi
+                self.n_errors += 1
+                self._fail(items, e)
+
+    async def _process(self, items):
+        loop = asyncio.get_running_loop()
+        dispatched = time.perf_counter()
+        # Timeout bilan tashlab ketilgan so'rovlar modelga yuborilmaydi
+        items = [item for item in items if not item[2].done()]
+        if not items:
+            return
+        x = np.vstack([row for row, _, _ in items])
+
+        for _, enqueued, _ in items:
+            self._queue_delays.append(dispatched - enqueued)
+        self._batch_sizes.append(len(items))
+        self.n_batches += 1
+        self.n_rows += len(items)
+
+        preds = np.asarray(await loop.run_in_executor(self._executor, self.predict_fn, x), dtype=float).reshape(-1)
+        if len(preds) != len(items):
+            raise ValueError(f"Model {len(items)} qator uchun {len(preds)} ta bashorat qaytardi")
+        for (_, _, future), pred in zip(items, preds):
+            if not future.done():
+                future.set_result(float(pred))
+
+    def stats(self) -> Dict[str, float]:
+        sizes = np.asarray(self._batch_sizes, dtype=float)
+        delays_ms = np.asarray(self._queue_delays, dtype=float) * 1000.0
+        has_data = sizes.size > 0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.n_batches,
+            "rows": self.n_rows,
+            "errors": self.n_errors,
+            "restarts": self.n_restarts,
+            "timeouts": self.n_timeouts,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": float(sizes.mean()) if has_data else 0.0,
+            "avg_fill_rate": float(sizes.mean() / self.max_batch_size) if has_data else 0.0,
+            "queue_delay_ms_p50": float(np.percentile(delays_ms, 50)) if has_data else 0.0,
+            "queue_delay_ms_p99": float(np.percentile(delays_ms, 99)) if has_data else 0.0,
+            "queue_delay_ms_max": float(delays_ms.max()) if has_data else 0.0,
+        }
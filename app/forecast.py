@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.feature_engineering import HISTORY_HOURS, ROLLING_WINDOW, serving_features
+
+
+def recursive_forecast(predict_fn: Callable[[np.ndarray], np.ndarray], history: np.ndarray,
+                       start_times: np.ndarray, temps: np.ndarray, horizon: int,
+                       feature_order: List[str], scaler: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """
+    Ko'p qadamli rekursiv forecast. Har bir qadamda barcha start vaqtlari bitta
+    predict bilan hisoblanadi va bashoratlar keyingi qadamlar uchun lag sifatida qaytadi.
+
+    history: (n, >= HISTORY_HOURS) - har bir start uchun oldingi yuklamalar
+    temps: (n, horizon) - prognoz soatlari uchun harorat
+    return: (n, horizon)
+    """
+    history = np.atleast_2d(np.asarray(history, dtype=np.float64))
+    n, h = history.shape
+    if h < HISTORY_HOURS:
+        raise ValueError(f"Kamida {HISTORY_HOURS} soatlik tarix kerak, kelgan: {h}")
+
+    loads = np.empty((n, h + horizon), dtype=np.float64)
+    loads[:, :h] = history
+    rolling_sum = history[:, -ROLLING_WINDOW:].sum(axis=1)
+    start_times = np.asarray(start_times, dtype="datetime64[h]")
+
+    for step in range(horizon):
+        col = h + step
+        features = serving_features(loads[:, :col], start_times + np.timedelta64(step, "h"),
+                                    temps[:, step], rolling_sum=rolling_sum)
+        x = np.column_stack([features[f] for f in feature_order]).astype(np.float64)
+        if scaler is not None:
+            mean, scale = scaler
+            x = (x - mean) / scale
+
+        preds = np.asarray(predict_fn(x), dtype=np.float64)
+        loads[:, col] = preds
+        rolling_sum = rolling_sum + preds - loads[:, col - ROLLING_WINDOW]
+
+    return loads[:, h:]
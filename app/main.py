@@ -1,17 +1,83 @@
 from __future__ import annotations
 
+import io
 import os
-from typing import Dict, List
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Union
 
 import joblib
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
+from app.batching import MicroBatcher
+from app.forecast import recursive_forecast
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, MODEL_LOAD_SECONDS, MODEL_LOADED, \
+    REQUEST_LATENCY, render_metrics
+from app.prediction_cache import PredictionCache
+from app.registry import FEATURES_FILE, LoadedModel, ModelRegistry, VersionedModelRegistry, load_model as load_model_file, \
+    load_scaler, model_feature_names
+from app.state_store import MAX_INTERPOLATED_GAP_HOURS, HourlyHistory, LoadHistoryBuffer
+from src.feature_engineering import FEATURE_SPEC, FEATURE_SPEC_PATH
+from src.logger import logging_instance
+
+try:
+    import pyarrow as pa
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+# MODEL_PATH papka bo'lsa (masalan models/inference_bundle) yengil bundle predictor yuklanadi
 MODEL_PATH = os.getenv("MODEL_PATH", "models/final_stacking_model.pkl")
+SCALER_PATH = os.getenv("SCALER_PATH", "models/scaler.pkl")
+# Model o'qitilgan xususiyatlar tartibi (run.py yozadi); registry versiyasida o'z nusxasi bo'ladi
+SELECTED_FEATURES_PATH = os.getenv("SELECTED_FEATURES_PATH", "models/selected_features.pkl")
+# Ko'p qatorli rejim: <dir>/<series>/ modellari (?series=<key> bilan tanlanadi)
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "models/series")
+
+# Versiyalangan modellar: <dir>/<versiya>/ (eng yangisi joriy, ?model_version= bilan boshqasi)
+MODEL_VERSIONS_DIR = os.getenv("MODEL_VERSIONS_DIR", "models/registry")
+MODEL_CACHE_VERSIONS = int(os.getenv("MODEL_CACHE_VERSIONS", "3"))
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "0"))  # 0 - cheklanmagan
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))  # soniya, 0 - watcher o'chirilgan
+# Inference bundle massivlarini memory-map qilish: uvicorn worker'lari bitta fizik nusxani bo'lishadi
+MODEL_MMAP = os.getenv("MODEL_MMAP", "0") == "1"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# /predict_from_scaled uchun micro-batching (0 - o'chirilgan)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "2"))
+# Navbatdagi so'rov javobni shundan uzoq kutmaydi (504)
+MICROBATCH_TIMEOUT_S = float(os.getenv("MICROBATCH_TIMEOUT_S", "30"))
+
+# Bashoratlar keshi (LRU + TTL), kalit - model versiyasi + kvantlangan FEATURES vektori (0 - o'chirilgan)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "300"))
+PREDICTION_CACHE_DECIMALS = int(os.getenv("PREDICTION_CACHE_DECIMALS", "6"))
+
+# Online (raw feature) rejim uchun yuklama tarixi: snapshot va ixtiyoriy combined_data (CSV/Feather/Parquet)
+STATE_SNAPSHOT_PATH = os.getenv("STATE_SNAPSHOT_PATH", "models/online_state.npz")
+STATE_HISTORY_CSV = os.getenv("STATE_HISTORY_CSV", "")
+# Training ma'lumoti (PJM) vaqt zonasisiz mahalliy soatlarda. Berilsa (masalan America/New_York) offset'li
+# timestamp'lar shu zonaga o'tkaziladi, aks holda offset'li timestamp 422 bilan rad etiladi
+TRAINING_TIMEZONE = os.getenv("TRAINING_TIMEZONE", "")
+# Online buffer'da interpolatsiya qilinadigan eng uzun uzilish (soat, buffer hajmidan oshmaydi); uzunroq
+# uzilishdan keyin buffer qayta to'planadi va shu paytgacha /predict_online 409 qaytaradi
+ONLINE_MAX_GAP_HOURS = int(os.getenv("ONLINE_MAX_GAP_HOURS", str(MAX_INTERPOLATED_GAP_HOURS)))
+MAX_FORECAST_HORIZON = int(os.getenv("MAX_FORECAST_HORIZON", "168"))
+MAX_FORECAST_STARTS = int(os.getenv("MAX_FORECAST_STARTS", "1000"))
 
+NPY_CONTENT_TYPE = "application/x-npy"
+ARROW_CONTENT_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file")
 
-FEATURES: List[str] = [
+
+# selected_features.pkl ham, model nomlari ham topilmasa ishlatiladigan tartib
+DEFAULT_FEATURES: List[str] = [
     "FE_lag_24h",
     "FE_lag_168h",
     "FE_rolling_mean_24h",
@@ -24,57 +90,747 @@ FEATURES: List[str] = [
     "FE_dayofweek",
     "FE_year",
 ]
+# API kontrakti: startup'da (load_features) model artefaktlaridan to'ldiriladi; ro'yxat obyekti o'zgarmaydi
+# (registry'lar shu tartibni oladi). Har bir versiya/qator o'z tartibini saqlaydi va kirishni o'zi qayta tartiblaydi
+FEATURES: List[str] = list(DEFAULT_FEATURES)
 
 
 class PredictRequest(BaseModel):
     features: Dict[str, float] = Field(
         ...,
-        description="11 ta feature qiymatlari. Masalan: {'FE_lag_24h': 0.12, ...}"
+        description="FEATURES tartibidagi xususiyatlar qiymatlari. Masalan: {'FE_lag_24h': 0.12, ...}"
     )
 
 
 class PredictResponse(BaseModel):
+    # model_version maydoni pydantic'ning 'model_' himoyalangan prefiksiga to'g'ri keladi
+    model_config = ConfigDict(protected_namespaces=())
+
     prediction: float
     used_features: List[str]
+    series: Optional[str] = None
+    model_version: Optional[str] = None
+
+
+class PredictBatchRequest(BaseModel):
+    columns: Optional[Dict[str, List[float]]] = Field(
+        None,
+        description="Ustunli format: {'FE_lag_24h': [0.12, 0.3, ...], ...}"
+    )
+    rows: Optional[List[List[float]]] = Field(
+        None,
+        description="Qatorli format: har bir qator FEATURES tartibidagi qiymatlar"
+    )
+
+
+class PredictBatchResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    predictions: List[float]
+    n_rows: int
+    used_features: List[str]
+    series: Optional[str] = None
+    model_version: Optional[str] = None
+
+
+class PredictOnlineRequest(BaseModel):
+    timestamp: datetime = Field(..., description="Bashorat qilinadigan soat (masalan 2018-08-03T01:00:00)")
+    PJME_MW: float = Field(..., description="Oxirgi kuzatilgan yuklama (timestamp - 1 soat)")
+    Temp_K: float = Field(..., description="timestamp soati uchun harorat (Kelvin)")
+
+
+class PredictOnlineResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    prediction: float
+    timestamp: datetime
+    features: Dict[str, float]
+    model_version: Optional[str] = None
+
+
+class ForecastRequest(BaseModel):
+    start_times: Optional[List[datetime]] = Field(
+        None,
+        description="Forecast boshlanadigan soatlar. Bo'sh bo'lsa online buffer'dagi keyingi soat"
+    )
+    Temp_K: Optional[Union[List[float], List[List[float]]]] = Field(
+        None,
+        description="Prognoz soatlari uchun harorat: [horizon] (hamma startlar uchun) yoki [n_starts][horizon]. "
+                    "Bo'sh bo'lsa tarixdagi haroratlar olinadi"
+    )
+
+
+class ForecastSeries(BaseModel):
+    start: datetime
+    timestamps: List[datetime]
+    predictions: List[float]
+
+
+class ForecastResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    horizon: int
+    forecasts: List[ForecastSeries]
+    model_version: Optional[str] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_model()
+    load_online_state()
+    await start_batcher()
+    start_model_watcher()
+    yield
+    stop_model_watcher()
+    await stop_batcher()
+    save_online_state()
+
+
+app = FastAPI(title="Energy Forecasting API (MVP)", version="0.1.0", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        ERRORS.inc(endpoint=_endpoint_label(request), type=type(e).__name__)
+        raise
+    status = response.status_code
+    endpoint = _endpoint_label(request)
+    REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint, status=status)
+    if status >= 400:
+        ERRORS.inc(endpoint=endpoint, type=f"http_{status}")
+    return response
+
+
+def _endpoint_label(request: Request) -> str:
+    # Yo'l shabloni (masalan /predict_batch), so'rovdagi qiymatlar emas - label'lar soni cheklangan
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+MODEL: Optional[LoadedModel] = None
+SCALER = None
+BATCHER: Optional[MicroBatcher] = None
+REGISTRY: Optional[ModelRegistry] = None
+VERSIONS: Optional[VersionedModelRegistry] = None
+SERIES_BATCHERS: Dict[str, MicroBatcher] = {}
+STATE: Optional[LoadHistoryBuffer] = None
+HISTORY: Optional[HourlyHistory] = None
+CACHE = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S, PREDICTION_CACHE_DECIMALS)
+
 
+def _has_default_model() -> bool:
+    return MODEL is not None or (VERSIONS is not None and VERSIONS.current is not None)
 
-app = FastAPI(title="Energy Forecasting API (MVP)", version="0.1.0")
 
-MODEL = None
+def _current_version() -> Optional[str]:
+    return VERSIONS.current if VERSIONS is not None else None
+
+
+def _version_of(entry: LoadedModel) -> Optional[str]:
+    # MODEL_PATH'dan yuklangan model registry versiyasi emas
+    return None if entry is MODEL else entry.key
+
+
+def _default_model() -> Optional[LoadedModel]:
+    """Joriy registry versiyasi (kerak bo'lsa shu yerda lazy yuklanadi), bo'lmasa MODEL_PATH modeli."""
+    if VERSIONS is not None and VERSIONS.current is not None:
+        return VERSIONS.get()
+    return MODEL
+
+
+def _model_predict(x: np.ndarray) -> np.ndarray:
+    # Har bir chaqiruv joriy versiyani qayta oladi: almashtirish keyingi batch'dan kuchga kiradi
+    return _default_model().predict(x)
+
+
+def _cache_model_key(series: Optional[str] = None, version: Optional[str] = None) -> str:
+    if series is not None:
+        return f"series:{series}"
+    return version or "default"
+
+
+def _on_model_swap(previous: Optional[str], new: str):
+    CACHE.clear()
 
 
-@app.on_event("startup")
 def load_model():
-    global MODEL
-    if not os.path.exists(MODEL_PATH):
-        raise RuntimeError(f"Model topilmadi: {MODEL_PATH}")
-    MODEL = joblib.load(MODEL_PATH)
+    global MODEL, REGISTRY, VERSIONS
+    # Qatorlar va versiyalar modellari lazy yuklanadi: startup faqat papkalarni ko'radi
+    REGISTRY = ModelRegistry(MODEL_REGISTRY_DIR, FEATURES, mmap=MODEL_MMAP)
+    VERSIONS = VersionedModelRegistry(MODEL_VERSIONS_DIR, FEATURES, max_versions=MODEL_CACHE_VERSIONS,
+                                      max_bytes=int(MODEL_CACHE_MAX_MB * 2**20), mmap=MODEL_MMAP)
+    # Model almashganda keshdagi bashoratlar eskiradi
+    CACHE.clear()
+    VERSIONS.on_swap(_on_model_swap)
+    if VERSIONS.current is None and os.path.exists(MODEL_PATH):
+        start = time.perf_counter()
+        MODEL = LoadedModel("default", load_model_file(MODEL_PATH, mmap=MODEL_MMAP))
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - start, kind="default")
+    elif VERSIONS.current is None and not REGISTRY.keys():
+        raise RuntimeError(f"Model topilmadi: {MODEL_PATH} (va {MODEL_VERSIONS_DIR}, {MODEL_REGISTRY_DIR} bo'sh)")
+    load_features()
+    # Qator modellari o'z xususiyatlar tartibi bilan tekshiriladi: mos kelmasa startup to'xtaydi
+    REGISTRY.validate()
 
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+def load_features():
+    """
+    FEATURES - model o'qitilgan tartib: joriy registry versiyasining yoki SELECTED_FEATURES_PATH dagi
+    selected_features.pkl, bo'lmasa model nomlari, faqat qatorlar bo'lsa birinchi qatorning fayli. Model nomlari bilan mos kelmasa yoki FEATURE_SPEC
+    hisoblamaydigan xususiyat bo'lsa startup to'xtaydi: /predict_online va /forecast training bilan
+    ayni xususiyatlarni hisoblashi kerak. Keyin yuklanadigan versiyalar shu to'plamga mos bo'lishi kerak
+    (tartibi farq qilishi mumkin), aks holda rad etiladi.
+    """
+    paths = [SELECTED_FEATURES_PATH]
+    if VERSIONS is not None and VERSIONS.current is not None:
+        paths.insert(0, os.path.join(MODEL_VERSIONS_DIR, VERSIONS.current, FEATURES_FILE))
+    path = next((p for p in paths if os.path.exists(p)), None)
+    names = [str(f) for f in joblib.load(path)] if path is not None else None
 
+    model_names = model_feature_names(MODEL.model) if MODEL is not None else None
+    if names is not None and model_names is not None and names != model_names:
+        raise RuntimeError(f"{path} modelning xususiyatlariga mos emas: {names} != {model_names}")
+    names = names or model_names
+    if names is None and REGISTRY is not None and REGISTRY.keys():
+        path = os.path.join(MODEL_REGISTRY_DIR, REGISTRY.keys()[0], FEATURES_FILE)
+        names = [str(f) for f in joblib.load(path)] if os.path.exists(path) else None
+    if names is None:
+        logging_instance.warning(f"{SELECTED_FEATURES_PATH} topilmadi, default FEATURES tartibi ishlatiladi.")
+        names = list(DEFAULT_FEATURES)
 
-@app.post("/predict_from_scaled", response_model=PredictResponse)
-def predict_from_scaled(req: PredictRequest):
-    global MODEL
-    if MODEL is None:
+    unknown = [f for f in names if f not in FEATURE_SPEC.feature_names]
+    if unknown:
+        raise RuntimeError(f"Model xususiyatlari {unknown} {FEATURE_SPEC_PATH} ta'rifida yo'q "
+                           f"(training va serving xususiyatlari ajralgan)")
+    FEATURES[:] = names
+    logging_instance.info(f"API xususiyatlari ({len(FEATURES)} ta): {FEATURES}")
+
+
+def start_model_watcher():
+    if VERSIONS is not None:
+        VERSIONS.start_watcher(MODEL_WATCH_INTERVAL)
+
+
+def stop_model_watcher():
+    if VERSIONS is not None:
+        VERSIONS.stop_watcher()
+
+
+def load_online_state():
+    global SCALER, STATE, HISTORY
+    if os.path.exists(SCALER_PATH):
+        # Scaler ustunlari tartibini FEATURES tartibiga keltiramiz
+        SCALER = load_scaler(SCALER_PATH, FEATURES)
+
+    if STATE_HISTORY_CSV and os.path.exists(STATE_HISTORY_CSV):
+        HISTORY = HourlyHistory.from_file(STATE_HISTORY_CSV)
+
+    if os.path.exists(STATE_SNAPSHOT_PATH):
+        STATE = LoadHistoryBuffer.load(STATE_SNAPSHOT_PATH, max_gap=ONLINE_MAX_GAP_HOURS)
+    elif HISTORY is not None:
+        STATE = LoadHistoryBuffer.from_history([HISTORY.end_ts], HISTORY.loads, max_gap=ONLINE_MAX_GAP_HOURS)
+    else:
+        STATE = LoadHistoryBuffer(max_gap=ONLINE_MAX_GAP_HOURS)
+
+
+async def start_batcher():
+    global BATCHER
+    if MICROBATCH_ENABLED:
+        BATCHER = MicroBatcher(_model_predict, max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_WAIT_MS,
+                               timeout_s=MICROBATCH_TIMEOUT_S)
+        await BATCHER.start()
+
+
+async def stop_batcher():
+    global BATCHER
+    if BATCHER is not None:
+        await BATCHER.stop()
+        BATCHER = None
+    for batcher in SERIES_BATCHERS.values():
+        await batcher.stop()
+    SERIES_BATCHERS.clear()
+
+
+def save_online_state():
+    if STATE is not None:
+        STATE.save(STATE_SNAPSHOT_PATH)
+
+
+async def _series_model(series: str):
+    """?series= kaliti bo'yicha registry'dagi model (birinchi so'rovda threadpool'da yuklanadi)."""
+    entry = REGISTRY.peek(series) if REGISTRY is not None else None
+    if entry is not None:
+        return entry
+    if REGISTRY is None or series not in REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Noma'lum series: {series}")
+    try:
+        return await run_in_threadpool(REGISTRY.get, series)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Noma'lum series: {series}")
+
+
+async def _series_batcher(series: str, entry) -> Optional[MicroBatcher]:
+    if not MICROBATCH_ENABLED:
+        return None
+    batcher = SERIES_BATCHERS.get(series)
+    if batcher is None:
+        batcher = MicroBatcher(entry.predict, max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_WAIT_MS,
+                               timeout_s=MICROBATCH_TIMEOUT_S)
+        SERIES_BATCHERS[series] = batcher
+        await batcher.start()
+    return batcher
+
+
+async def _resolve_model(version: Optional[str] = None) -> LoadedModel:
+    """?model_version= bo'yicha (yoki joriy) model; yuklanmagan bo'lsa threadpool'da yuklanadi."""
+    if version is not None:
+        if VERSIONS is None or version not in VERSIONS:
+            raise HTTPException(status_code=404, detail=f"Noma'lum model_version: {version}")
+        entry = VERSIONS.peek(version)
+        if entry is not None:
+            return entry
+        try:
+            return await run_in_threadpool(VERSIONS.get, version)
+        except ValueError as e:
+            # Versiya xususiyatlari API kontraktiga mos emas
+            raise HTTPException(status_code=409, detail=str(e))
+
+    entry = VERSIONS.peek() if VERSIONS is not None else None
+    if entry is None:
+        entry = await run_in_threadpool(_default_model)
+    if entry is None:
         raise HTTPException(status_code=500, detail="Model yuklanmagan")
+    return entry
+
+
+async def _predict_row(x: np.ndarray, series: Optional[str] = None, version: Optional[str] = None,
+                       entry: Optional[LoadedModel] = None) -> float:
+    """entry berilsa bashorat aynan shu model bilan (masalan uning scaler'i bilan tayyorlangan x uchun)."""
+    if series is not None and version is not None:
+        raise HTTPException(status_code=422, detail="series va model_version birga ishlatilmaydi")
+    if not CACHE.enabled:
+        return await _predict_row_uncached(x, series, version, entry)
+
+    # generation versiyadan oldin olinadi: almashtirish (current, so'ng CACHE.clear) o'rtasida o'qilgan
+    # versiya uchun hisoblangan natija eski generation bilan yozilmay qoladi
+    generation = CACHE.generation
+    current = None
+    if entry is not None:
+        model_key = _cache_model_key(series, _version_of(entry))
+    else:
+        current = None if series is not None or version is not None else _current_version()
+        model_key = _cache_model_key(series, version or current)
+    keys = CACHE.keys(model_key, x)
+    values, missing = CACHE.get_many(keys)
+    if not missing[0]:
+        return float(values[0])
+    pred = await _predict_row_uncached(x, series, version, entry)
+    # Batcher modelni batch paytida oladi: joriy versiya o'zgargan bo'lsa natija boshqa versiya kaliti
+    # ostida qolmasligi uchun keshlanmaydi
+    if entry is None and series is None and version is None and _current_version() != current:
+        return pred
+    CACHE.put_many(keys, [pred], generation)
+    return pred
+
+
+async def _predict_row_uncached(x: np.ndarray, series: Optional[str] = None, version: Optional[str] = None,
+                                entry: Optional[LoadedModel] = None) -> float:
+    if entry is not None:
+        # Batcher har bir batch'da joriy versiyani qayta oladi: hot swap'da boshqa model ishlashi mumkin
+        return float((await run_in_threadpool(entry.predict, x))[0])
+
+    if version is not None:
+        # Aniq versiya so'rovlari micro-batching'siz (batcher joriy versiyaga xizmat qiladi)
+        entry = await _resolve_model(version)
+        return float((await run_in_threadpool(entry.predict, x))[0])
+
+    if series is not None:
+        entry = await _series_model(series)
+        batcher = await _series_batcher(series, entry)
+        if batcher is not None:
+            return await batcher.submit(x[0])
+        return float((await run_in_threadpool(entry.predict, x))[0])
 
-    missing = [f for f in FEATURES if f not in req.features]
-    extra = [k for k in req.features.keys() if k not in FEATURES]
+    if BATCHER is not None:
+        return await BATCHER.submit(x[0])
+    return float((await run_in_threadpool(_model_predict, x))[0])
+
+
+def _check_feature_names(names):
+    missing = [f for f in FEATURES if f not in names]
+    extra = [k for k in names if k not in FEATURES]
 
     if missing:
         raise HTTPException(status_code=422, detail=f"Missing features: {missing}")
     if extra:
         raise HTTPException(status_code=422, detail=f"Unknown features: {extra}")
 
+
+def _matrix_from_json(body: bytes) -> np.ndarray:
+    try:
+        req = PredictBatchRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    if (req.columns is None) == (req.rows is None):
+        raise HTTPException(status_code=422, detail="Faqat bittasini yuboring: 'columns' yoki 'rows'")
+
+    if req.columns is not None:
+        _check_feature_names(req.columns.keys())
+        lengths = {len(req.columns[f]) for f in FEATURES}
+        if len(lengths) != 1:
+            raise HTTPException(status_code=422, detail=f"Ustunlar uzunligi har xil: {sorted(lengths)}")
+        return np.array([req.columns[f] for f in FEATURES], dtype=float).T
+
+    try:
+        x = np.array(req.rows, dtype=float)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Qatorlar uzunligi har xil")
+    return x.reshape(0, len(FEATURES)) if x.size == 0 else x
+
+
+def _matrix_from_npy(body: bytes) -> np.ndarray:
+    try:
+        arr = np.load(io.BytesIO(body), allow_pickle=False)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"NPY parse error: {str(e)}")
+
+    # Structured array bo'lsa ustun nomlari bo'yicha tartiblaymiz
+    if arr.dtype.names is not None:
+        _check_feature_names(arr.dtype.names)
+        arr = np.column_stack([arr[f] for f in FEATURES])
+    # Satr/obyekt massivlari (masalan '<U1') float'ga o'tmaydi yoki jimgina son bo'lib qoladi
+    if not (np.issubdtype(arr.dtype, np.number) or np.issubdtype(arr.dtype, np.bool_)):
+        raise HTTPException(status_code=422, detail=f"NPY massivi sonli bo'lishi kerak, kelgan dtype: {arr.dtype}")
+    return arr.astype(float, copy=False)
+
+
+def _matrix_from_arrow(body: bytes, content_type: str) -> np.ndarray:
+    if not HAS_ARROW:
+        raise HTTPException(status_code=415, detail="Arrow formati uchun pyarrow o'rnatilmagan")
+    try:
+        reader = pa.ipc.open_file if content_type.endswith(".file") else pa.ipc.open_stream
+        table = reader(pa.BufferReader(body)).read_all()
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Arrow parse error: {str(e)}")
+
+    _check_feature_names(table.column_names)
+    return np.column_stack([table.column(f).to_numpy() for f in FEATURES]).astype(float, copy=False)
+
+
+@app.get("/health")
+async def health():
+    """
+    Readiness: asosiy (yoki faqat registry bo'lsa birinchi qator) modeli yuklanadi va bitta
+    warm-up predict bajariladi. Model tayyor bo'lmasa 503.
+    """
+    start = time.perf_counter()
+    try:
+        if _has_default_model():
+            entry = await _resolve_model()
+        elif REGISTRY is not None and REGISTRY.keys():
+            entry = await _series_model(REGISTRY.keys()[0])
+        else:
+            raise RuntimeError("Model yuklanmagan")
+        preds = await run_in_threadpool(entry.predict, np.zeros((1, len(FEATURES))))
+        if not np.all(np.isfinite(preds)):
+            raise ValueError("Warm-up bashorati chekli son emas")
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": detail})
+    return {
+        "status": "ok",
+        "model": entry.key,
+        "model_version": _version_of(entry),
+        "warmup_ms": round((time.perf_counter() - start) * 1000.0, 3),
+    }
+
+
+@app.get("/health/live")
+def liveness():
+    """Liveness: jarayon javob beryapti (model tekshirilmaydi)."""
+    return {"status": "ok"}
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus formatidagi metrikalar: so'rov/inference latency, batch hajmi, xatolar, model yuklash."""
+    MODEL_LOADED.set(1 if MODEL is not None else 0, kind="default")
+    MODEL_LOADED.set(len(VERSIONS.loaded()) if VERSIONS is not None else 0, kind="version")
+    MODEL_LOADED.set(len(REGISTRY.loaded()) if REGISTRY is not None else 0, kind="series")
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/models")
+def list_models():
+    """Registry versiyalari: joriy, mavjud va xotiradagi (LRU) versiyalar."""
+    stats = VERSIONS.stats() if VERSIONS is not None else {}
+    return {**stats, "fallback_model": MODEL_PATH if MODEL is not None else None}
+
+
+@app.get("/series")
+def list_series():
+    """Registry'dagi qatorlar va qaysilari xotiraga yuklangani."""
+    if REGISTRY is None:
+        return {"series": []}
+    loaded = set(REGISTRY.loaded())
+    return {"series": [{"key": key, "loaded": key in loaded} for key in REGISTRY.keys()]}
+
+
+@app.get("/batching/stats")
+def batching_stats():
+    if BATCHER is None:
+        return {"enabled": False}
+    return {"enabled": True, **BATCHER.stats()}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Bashoratlar keshi: hajm, hit/miss hisoblagichlari, TTL va tozalashlar soni."""
+    return {"enabled": CACHE.enabled, **CACHE.stats()}
+
+
+@app.post("/predict_from_scaled", response_model=PredictResponse)
+async def predict_from_scaled(req: PredictRequest, series: Optional[str] = Query(None),
+                              model_version: Optional[str] = Query(None)):
+    if series is None and model_version is None and not _has_default_model():
+        raise HTTPException(status_code=500, detail="Model yuklanmagan")
+
+    _check_feature_names(req.features.keys())
+
     x = np.array([[req.features[f] for f in FEATURES]], dtype=float)
 
     try:
-        pred = float(MODEL.predict(x)[0])
+        version = model_version or (None if series is not None else _current_version())
+        pred = await _predict_row(x, series, model_version)
+    except HTTPException:
+        raise
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Bashorat {MICROBATCH_TIMEOUT_S}s ichida tayyor bo'lmadi")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
-    return PredictResponse(prediction=pred, used_features=FEATURES)
+    return PredictResponse(prediction=pred, used_features=FEATURES, series=series, model_version=version)
+
+
+@app.post(
+    "/predict_batch",
+    response_model=PredictBatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": PredictBatchRequest.model_json_schema()},
+                NPY_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+                ARROW_CONTENT_TYPES[0]: {"schema": {"type": "string", "format": "binary"}},
+                ARROW_CONTENT_TYPES[1]: {"schema": {"type": "string", "format": "binary"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def predict_batch(request: Request, series: Optional[str] = Query(None),
+                        model_version: Optional[str] = Query(None)):
+    """
+    Bir nechta qatorni bitta vektorlashgan MODEL.predict chaqiruvida bashorat qiladi.
+    Body: JSON (columns/rows), NPY yoki Arrow IPC. ?series= berilsa registry'dagi qator modeli.
+    """
+    if series is not None and model_version is not None:
+        raise HTTPException(status_code=422, detail="series va model_version birga ishlatilmaydi")
+    # Model tanlanishidan oldin: keyin almashtirish bo'lsa bu batch natijalari keshga yozilmaydi
+    generation = CACHE.generation
+    if series is not None:
+        entry = await _series_model(series)
+    else:
+        entry = await _resolve_model(model_version)
+        model_version = model_version or _current_version()
+
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body = await request.body()
+
+    if content_type == NPY_CONTENT_TYPE:
+        x = _matrix_from_npy(body)
+    elif content_type in ARROW_CONTENT_TYPES:
+        x = _matrix_from_arrow(body, content_type)
+    elif content_type == "application/json":
+        x = _matrix_from_json(body)
+    else:
+        raise HTTPException(status_code=415, detail=f"Qo'llab-quvvatlanmaydigan Content-Type: {content_type}")
+
+    if x.ndim != 2 or x.shape[1] != len(FEATURES):
+        raise HTTPException(status_code=422, detail=f"Kutilgan shakl: (n, {len(FEATURES)}), kelgan: {x.shape}")
+    if x.shape[0] == 0:
+        raise HTTPException(status_code=422, detail="Bo'sh batch")
+    if x.shape[0] > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch hajmi {x.shape[0]} > MAX_BATCH_SIZE={MAX_BATCH_SIZE}")
+
+    # Keshda bor qatorlar modelga yuborilmaydi; kalit haqiqatda ishlatiladigan model (entry) versiyasi bo'yicha
+    keys = CACHE.keys(_cache_model_key(series, _version_of(entry)), x) if CACHE.enabled else None
+    try:
+        if keys is None:
+            preds = await run_in_threadpool(entry.predict, x)
+        else:
+            preds, missing = CACHE.get_many(keys)
+            if missing.any():
+                preds[missing] = await run_in_threadpool(entry.predict, x[missing])
+                CACHE.put_many([k for k, m in zip(keys, missing) if m], preds[missing], generation)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    return PredictBatchResponse(
+        predictions=np.asarray(preds, dtype=float).tolist(),
+        n_rows=int(x.shape[0]),
+        used_features=FEATURES,
+        series=series,
+        model_version=model_version,
+    )
+
+
+@app.get("/state")
+def online_state():
+    if STATE is None:
+        return {"ready": False}
+    return {
+        "ready": STATE.ready,
+        "hours": min(STATE.count, STATE.size),
+        "last_timestamp": str(STATE.last_ts) if STATE.last_ts is not None else None,
+        "reset_reason": STATE.reset_reason,
+    }
+
+
+def _training_hour(ts: datetime) -> np.datetime64:
+    """So'rov vaqti training vaqt zonasidagi soat sifatida (offset'ni shunchaki tashlab yubormaymiz)."""
+    if ts.tzinfo is not None:
+        if not TRAINING_TIMEZONE:
+            raise HTTPException(status_code=422, detail=f"Vaqt zonasi bilan timestamp qabul qilinmaydi: {ts.isoformat()} "
+                                                        f"(training vaqti zonasiz; TRAINING_TIMEZONE sozlanmagan)")
+        from zoneinfo import ZoneInfo
+        ts = ts.astimezone(ZoneInfo(TRAINING_TIMEZONE)).replace(tzinfo=None)
+    return np.datetime64(ts, "h")
+
+
+def _reject_series(series: Optional[str]):
+    # Online ring buffer va to'liq tarix bitta (asosiy) qator uchun: boshqa zona tarixi bilan aralashmasin
+    if series is not None:
+        raise HTTPException(status_code=422, detail="?series= bu endpoint'da qo'llab-quvvatlanmaydi "
+                                                    "(online tarix faqat asosiy model uchun)")
+
+
+@app.post("/predict_online", response_model=PredictOnlineResponse)
+async def predict_online(req: PredictOnlineRequest, model_version: Optional[str] = Query(None),
+                         series: Optional[str] = Query(None)):
+    """
+    Faqat vaqt, oxirgi PJME_MW va Temp_K qabul qiladi. Lag/rolling xususiyatlari
+    server xotirasidagi ring buffer'dan olinadi, scaler shu yerda qo'llanadi
+    (versiya papkasida scaler.pkl bo'lsa o'shanisi). Multi-series zonalari uchun emas.
+    """
+    _reject_series(series)
+    entry = await _resolve_model(model_version)
+    scaler = entry.scaler or SCALER
+    if scaler is None:
+        raise HTTPException(status_code=500, detail=f"Scaler topilmadi: {SCALER_PATH}")
+
+    target = _training_hour(req.timestamp)
+    if STATE.update(target - np.timedelta64(1, "h"), req.PJME_MW):
+        await run_in_threadpool(STATE.save, STATE_SNAPSHOT_PATH)
+
+    try:
+        raw = STATE.raw_features(target, req.Temp_K)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    mean, scale = scaler
+    x = ((np.array([raw[f] for f in FEATURES], dtype=float) - mean) / scale).reshape(1, -1)
+
+    try:
+        # Scaler va model bitta entry'dan: o'rtada versiya almashsa ham javobdagi model_version to'g'ri
+        pred = await _predict_row(x, entry=entry)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    return PredictOnlineResponse(prediction=pred, timestamp=req.timestamp, features=raw,
+                                 model_version=_version_of(entry))
+
+
+def _forecast_inputs(req: ForecastRequest, horizon: int):
+    """Start vaqtlari, tarix oynalari va haroratlar matritsasini tayyorlaydi."""
+    if req.start_times:
+        start_times = np.array([_training_hour(t) for t in req.start_times])
+    elif STATE is not None and STATE.ready:
+        start_times = np.array([STATE.last_ts + np.timedelta64(1, "h")])
+    else:
+        raise HTTPException(status_code=409, detail="Online tarix tayyor emas, start_times yuboring")
+
+    if len(start_times) > MAX_FORECAST_STARTS:
+        raise HTTPException(status_code=413, detail=f"start_times soni > MAX_FORECAST_STARTS={MAX_FORECAST_STARTS}")
+
+    # Online buffer'dagi keyingi soat buffer'dan, qolganlari to'liq tarixdan olinadi
+    live_next = STATE.last_ts + np.timedelta64(1, "h") if STATE is not None and STATE.ready else None
+    history = np.empty((len(start_times), STATE.size if STATE is not None else 168))
+    is_live = start_times == live_next if live_next is not None else np.zeros(len(start_times), dtype=bool)
+    try:
+        if is_live.any():
+            history[is_live] = STATE.history()
+        if (~is_live).any():
+            if HISTORY is None:
+                raise ValueError("To'liq tarix yuklanmagan (STATE_HISTORY_CSV)")
+            history[~is_live] = HISTORY.windows(start_times[~is_live], history.shape[1])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if req.Temp_K is None:
+        if HISTORY is None:
+            raise HTTPException(status_code=422, detail="Temp_K yuborilmagan va harorat tarixi yo'q")
+        try:
+            temps = HISTORY.future_temps(start_times, horizon)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    else:
+        temps = np.array(req.Temp_K, dtype=float)
+        if temps.ndim == 1:
+            temps = np.broadcast_to(temps, (len(start_times), temps.shape[0]))
+        if temps.shape != (len(start_times), horizon):
+            raise HTTPException(status_code=422,
+                                detail=f"Temp_K shakli ({len(start_times)}, {horizon}) bo'lishi kerak, kelgan: {temps.shape}")
+
+    return start_times, history, temps
+
+
+@app.post("/forecast", response_model=ForecastResponse)
+async def forecast(req: ForecastRequest, horizon: int = Query(24, ge=1), model_version: Optional[str] = Query(None),
+                   series: Optional[str] = Query(None)):
+    """
+    Keyingi `horizon` soat uchun rekursiv forecast. Har bir qadam barcha
+    start vaqtlari uchun bitta vektorlashgan predict bilan hisoblanadi.
+    Butun forecast bitta model versiyasi bilan hisoblanadi (o'rtada almashsa ham).
+    Multi-series zonalari uchun emas (tarix faqat asosiy qator uchun).
+    """
+    _reject_series(series)
+    entry = await _resolve_model(model_version)
+    scaler = entry.scaler or SCALER
+    if scaler is None:
+        raise HTTPException(status_code=500, detail=f"Scaler topilmadi: {SCALER_PATH}")
+    if horizon > MAX_FORECAST_HORIZON:
+        raise HTTPException(status_code=422, detail=f"horizon <= {MAX_FORECAST_HORIZON} bo'lishi kerak")
+
+    start_times, history, temps = _forecast_inputs(req, horizon)
+
+    try:
+        preds = await run_in_threadpool(
+            recursive_forecast, entry.predict, history, start_times, temps, horizon, FEATURES, scaler
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Forecast error: {str(e)}")
+
+    steps = np.arange(horizon).astype("timedelta64[h]")
+    forecasts = [
+        ForecastSeries(
+            start=start.astype(datetime),
+            timestamps=(start + steps).astype(datetime).tolist(),
+            predictions=row.tolist(),
+        )
+        for start, row in zip(start_times, preds)
+    ]
+    return ForecastResponse(horizon=horizon, forecasts=forecasts, model_version=_version_of(entry))
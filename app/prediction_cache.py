@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bashoratlar keshi (LRU + TTL). Kalit - model versiyasi va FEATURES tartibidagi
+    vektorning kvantlangan (decimals xonagacha yaxlitlangan) hash'i: bir xil qatorni
+    qayta so'ragan dashboard/demo so'rovlari modelga bormaydi.
+
+    Model almashganda clear() chaqiriladi. generation hisoblagichi almashtirishdan oldin
+    boshlangan predict natijasi keshga yozilib qolishining oldini oladi.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_s: float = 300.0, decimals: int = 6):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.decimals = decimals
+        self.generation = 0
+
+        self._items: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrikalar
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def keys(self, model_key: str, x: np.ndarray) -> List[bytes]:
+        """Har bir qator uchun kalit: blake2b(model_key + kvantlangan qator baytlari)."""
+        q = np.round(np.asarray(x, dtype=np.float64), self.decimals) + 0.0  # -0.0 -> 0.0
+        prefix = model_key.encode() + b"\x00"
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest()
+                for row in np.ascontiguousarray(q)]
+
+    def get_many(self, keys: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """return: (qiymatlar, topilmadi maskasi); topilmagan qatorlar NaN."""
+        values = np.full(len(keys), np.nan)
+        missing = np.ones(len(keys), dtype=bool)
+        if not self.enabled:
+            self.misses += len(keys)
+            return values, missing
+
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                item = self._items.get(key)
+                if item is None:
+                    continue
+                value, expires = item
+                if expires <= now:
+                    del self._items[key]
+                    self.expirations += 1
+                    continue
+                self._items.move_to_end(key)
+                values[i] = value
+                missing[i] = False
+            n_hits = int((~missing).sum())
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return values, missing
+
+    def put_many(self, keys: List[bytes], values, generation: Optional[int] = None):
+        """generation berilgan va o'shandan beri kesh tozalangan bo'lsa natija yozilmaydi."""
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            for key, value in zip(keys, values):
+                self._items[key] = (float(value), expires)
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size = len(self._items)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "decimals": self.decimals,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from app.metrics import BATCH_SIZE, ERRORS, INFERENCE_LATENCY, MODEL_LOAD_SECONDS
+from src.inference_bundle import load_model
+from src.logger import logging_instance
+
+MODEL_FILE = "final_stacking_model.pkl"
+BUNDLE_DIR = "inference_bundle"
+SCALER_FILE = "scaler.pkl"
+# Model o'qitilgan xususiyatlar tartibi (run.py / multi_series yozadi)
+FEATURES_FILE = "selected_features.pkl"
+
+
+def load_scaler(path: str, feature_order: List[str],
+                fitted_order: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    StandardScaler'ning mean/scale qiymatlari feature_order tartibida. Scaler'da ustun nomlari
+    bo'lmasa u fitted_order (berilmasa feature_order) tartibida o'qitilgan deb olinadi.
+    """
+    scaler = joblib.load(path)
+    names = list(getattr(scaler, "feature_names_in_", fitted_order or feature_order))
+    order = [names.index(f) for f in feature_order]
+    return np.asarray(scaler.mean_)[order], np.asarray(scaler.scale_)[order]
+
+
+def model_feature_names(model) -> Optional[List[str]]:
+    # sklearn pickle: feature_names_in_, inference bundle: manifest'dagi nomlar
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        names = getattr(model, "manifest", {}).get("feature_names")
+    return [str(f) for f in names] if names is not None and len(names) else None
+
+
+def load_feature_order(directory: str, model, serving_order: List[str]) -> List[str]:
+    """
+    Papkadagi modelning o'z xususiyatlar tartibi: selected_features.pkl, bo'lmasa model nomlari.
+    Fayl model nomlariga yoki xususiyatlar to'plami API kontraktiga (serving_order) mos kelmasa ValueError.
+    """
+    path = os.path.join(directory, FEATURES_FILE)
+    names = [str(f) for f in joblib.load(path)] if os.path.exists(path) else None
+    model_names = model_feature_names(model)
+    if names is not None and model_names is not None and names != model_names:
+        raise ValueError(f"{path} modelning xususiyatlariga mos emas: {names} != {model_names}")
+    order = names or model_names or list(serving_order)
+    if sorted(order) != sorted(serving_order):
+        raise ValueError(f"{directory} xususiyatlari API kontraktiga mos emas: {order} != {list(serving_order)}")
+    return order
+
+
+def _valid_name(name: str) -> bool:
+    # Kalit/versiya faqat registry ichidagi papka nomi bo'lishi mumkin
+    return bool(name) and not name.startswith(".") and os.path.basename(name) == name
+
+
+def artifact_path(directory: str, prefer_bundle: bool = True) -> Optional[str]:
+    """Papkadagi model artefakti: inference bundle yoki pickle (qaysi biri afzal bo'lsa)."""
+    candidates = [BUNDLE_DIR, MODEL_FILE] if prefer_bundle else [MODEL_FILE, BUNDLE_DIR]
+    for name in candidates:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def _mapped_size(bundle_dir: str) -> int:
+    return sum(os.path.getsize(os.path.join(bundle_dir, name))
+               for name in os.listdir(bundle_dir) if name.endswith(".npy"))
+
+
+def _stages(model):
+    """
+    Stacking modelini bosqichlarga ajratadi: [(bazaviy model nomi, predict), ...] va meta predict.
+    Natija model.predict bilan bir xil, lekin har bir bosqich vaqtini alohida o'lchash mumkin.
+    Tanilmagan model uchun None.
+    """
+    if hasattr(model, "predict_components") and hasattr(model, "coef"):
+        # InferenceBundlePredictor
+        def meta(stacked, x):
+            if model.passthrough:
+                stacked = np.hstack([stacked, x])
+            return stacked @ model.coef + model.intercept
+        return [(name, fn) for name, fn in model.components], meta
+
+    if hasattr(model, "estimators_") and hasattr(model, "final_estimator_"):
+        # StackingRegressor / OOFStackingRegressor
+        names = [name for name, est in model.estimators if est != "drop"]
+        learners = [(name, est.predict) for name, est in zip(names, model.estimators_)]
+
+        def meta(stacked, x):
+            if getattr(model, "passthrough", False):
+                stacked = np.hstack([stacked, x])
+            return model.final_estimator_.predict(stacked)
+        return learners, meta
+    return None
+
+
+class LoadedModel:
+    """
+    Yuklangan model (qator yoki versiya) va uning scaler'i. predict har bir bazaviy model,
+    meta-learner va butun chaqiruv vaqtini /metrics histogrammalariga yozadi.
+    """
+
+    def __init__(self, key: str, model, scaler: Optional[Tuple[np.ndarray, np.ndarray]] = None, nbytes: int = 0,
+                 feature_order: Optional[List[str]] = None, serving_order: Optional[List[str]] = None):
+        self.key = key
+        self.model = model
+        # scaler API (serving_order) tartibida: kirish shu tartibda scale qilinadi
+        self.scaler = scaler
+        # Xotira hajmi bahosi (artefaktlarning diskdagi hajmi)
+        self.nbytes = nbytes
+        self._stages = _stages(model)
+        # Model o'qitilgan tartib; API tartibidan farq qilsa predict ustunlarni qayta tartiblaydi
+        self.feature_order = list(feature_order) if feature_order is not None else None
+        self._columns = None
+        if feature_order is not None and serving_order is not None and list(feature_order) != list(serving_order):
+            self._columns = np.array([list(serving_order).index(f) for f in feature_order])
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """x - API (serving_order) tartibidagi ustunlar."""
+        try:
+            if self._columns is not None:
+                x = np.asarray(x)[:, self._columns]
+            return self._predict(x)
+        except Exception as e:
+            ERRORS.inc(endpoint="model", type=type(e).__name__)
+            raise
+
+    def _predict(self, x: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        if self._stages is None:
+            preds = self.model.predict(x)
+        else:
+            learners, meta = self._stages
+            if hasattr(self.model, "predict_components"):
+                x = np.asarray(x, dtype=np.float64)
+                if x.ndim != 2 or x.shape[1] != self.model.n_features_in_:
+                    raise ValueError(f"Kutilgan shakl: (n, {self.model.n_features_in_}), kelgan: {x.shape}")
+            columns = []
+            for name, fn in learners:
+                t0 = time.perf_counter()
+                columns.append(np.asarray(fn(x), dtype=np.float64).reshape(-1))
+                INFERENCE_LATENCY.observe(time.perf_counter() - t0, learner=name)
+            t0 = time.perf_counter()
+            preds = meta(np.column_stack(columns), x)
+            INFERENCE_LATENCY.observe(time.perf_counter() - t0, learner="meta")
+        INFERENCE_LATENCY.observe(time.perf_counter() - start, learner="total")
+        BATCH_SIZE.observe(len(x))
+        return preds
+
+
+def load_entry(key: str, directory: str, feature_order: List[str], prefer_bundle: bool = True,
+               mmap: bool = False, kind: str = "series") -> LoadedModel:
+    """
+    Papkadagi model, uning o'z xususiyatlar tartibi (selected_features.pkl) va scaler'i.
+    feature_order - API kontrakti: kirish shu tartibda keladi, model o'z tartibiga o'tkazadi.
+    """
+    path = artifact_path(directory, prefer_bundle)
+    if path is None:
+        raise KeyError(key)
+    start = time.perf_counter()
+    model = load_model(path, mmap=mmap)
+    model_order = load_feature_order(directory, model, feature_order)
+    scaler_path = os.path.join(directory, SCALER_FILE)
+    scaler = load_scaler(scaler_path, feature_order, model_order) if os.path.exists(scaler_path) else None
+    # Memory-map qilingan massivlar worker xotirasiga hisoblanmaydi (page cache'da umumiy)
+    nbytes = _disk_size(path)
+    if mmap and os.path.isdir(path):
+        nbytes -= _mapped_size(path)
+    MODEL_LOAD_SECONDS.observe(time.perf_counter() - start, kind=kind)
+    return LoadedModel(key, model, scaler, nbytes=nbytes, feature_order=model_order, serving_order=feature_order)
+
+
+class ModelRegistry:
+    """
+    root_dir/<series>/ papkalaridagi modellar (run.py --series natijasi). Har bir qator
+    birinchi so'rovda (yoki validate() da) yuklanadi va jarayon ichida barcha so'rovlar uchun umumiy
+    bo'ladi. Inference bundle bo'lsa pickle o'rniga u ishlatiladi. Har bir qator o'z
+    selected_features.pkl tartibidan foydalanadi.
+    """
+
+    def __init__(self, root_dir: str, feature_order: List[str], prefer_bundle: bool = True, mmap: bool = False):
+        self.root_dir = root_dir
+        self.feature_order = feature_order
+        self.prefer_bundle = prefer_bundle
+        self.mmap = mmap
+        self._models: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _valid_key(key: str) -> bool:
+        return _valid_name(key)
+
+    def _model_path(self, key: str) -> Optional[str]:
+        return artifact_path(os.path.join(self.root_dir, key), self.prefer_bundle)
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sorted(k for k in os.listdir(self.root_dir)
+                      if os.path.isdir(os.path.join(self.root_dir, k)) and self._model_path(k) is not None)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._models or (self._valid_key(key) and self._model_path(key) is not None)
+
+    def peek(self, key: str) -> Optional[LoadedModel]:
+        """Yuklangan bo'lsa model, aks holda None (I/O qilmaydi)."""
+        return self._models.get(key)
+
+    def get(self, key: str) -> LoadedModel:
+        entry = self._models.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                if not self._valid_key(key):
+                    raise KeyError(key)
+                entry = load_entry(key, os.path.join(self.root_dir, key), self.feature_order, self.prefer_bundle,
+                                   self.mmap)
+                self._models[key] = entry
+        return entry
+
+    def validate(self):
+        """
+        Barcha qatorlarni yuklaydi: har birining selected_features.pkl fayli model nomlari va API
+        kontrakti bilan tekshiriladi. Mos kelmasa ValueError (startup to'xtaydi).
+        """
+        for key in self.keys():
+            self.get(key)
+
+    def loaded(self) -> List[str]:
+        return sorted(self._models)
+
+
+class VersionedModelRegistry:
+    """
+    Versiyalangan model registry'si: root_dir/<versiya>/ (src.model_registry.publish_model_version).
+
+    * Joriy versiya - eng yangi tayyor versiya; birinchi so'rovda lazy yuklanadi.
+    * Watcher thread papkani kuzatadi, yangi versiyani fonda yuklaydi va joriy versiyani
+      atomik almashtiradi: davom etayotgan so'rovlar eski model bilan tugaydi.
+    * Oxirgi ishlatilgan versiyalar LRU'da (soni va xotira chegarasi bilan) saqlanadi, shuning
+      uchun bir nechta versiya yonma-yon ishlatilishi mumkin (?model_version=).
+    """
+
+    def __init__(self, root_dir: str, feature_order: List[str], max_versions: int = 3,
+                 max_bytes: int = 0, prefer_bundle: bool = True, mmap: bool = False):
+        self.root_dir = root_dir
+        self.feature_order = feature_order
+        self.max_versions = max(1, max_versions)
+        self.max_bytes = max_bytes
+        self.prefer_bundle = prefer_bundle
+        self.mmap = mmap
+        self.current: Optional[str] = None
+        self.swaps = 0
+        # Yuklab bo'lmagan yoki API kontraktiga mos kelmagan versiyalar: versiya -> xato
+        self.rejected: Dict[str, str] = {}
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._callbacks: List[Callable[[Optional[str], str], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.current = self.latest()
+
+    def versions(self) -> List[str]:
+        from src.model_registry import list_versions
+        return list_versions(self.root_dir)
+
+    def latest(self) -> Optional[str]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def __contains__(self, version: str) -> bool:
+        return version in self._models or (
+            _valid_name(version) and artifact_path(os.path.join(self.root_dir, version), self.prefer_bundle) is not None)
+
+    def on_swap(self, callback: Callable[[Optional[str], str], None]):
+        """Joriy versiya almashganda chaqiriladi: callback(eski, yangi)."""
+        self._callbacks.append(callback)
+
+    def peek(self, version: Optional[str] = None) -> Optional[LoadedModel]:
+        """Yuklangan bo'lsa model, aks holda None (I/O qilmaydi)."""
+        version = version or self.current
+        return self._models.get(version) if version is not None else None
+
+    def get(self, version: Optional[str] = None) -> LoadedModel:
+        """Versiya (default - joriy) modeli; yuklanmagan bo'lsa shu yerda yuklanadi."""
+        version = version or self.current
+        if version is None:
+            raise KeyError("registry bo'sh")
+        with self._lock:
+            entry = self._models.get(version)
+            if entry is not None:
+                self._models.move_to_end(version)
+                return entry
+            if version not in self:
+                raise KeyError(version)
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+
+        # Bir versiyani faqat bitta thread yuklaydi, boshqa versiyalar bloklanmaydi
+        with load_lock:
+            entry = self._models.get(version)
+            if entry is None:
+                entry = load_entry(version, os.path.join(self.root_dir, version), self.feature_order,
+                                   self.prefer_bundle, self.mmap, kind="version")
+            with self._lock:
+                self._models[version] = entry
+                self._models.move_to_end(version)
+                self._evict(keep=version)
+                self._load_locks.pop(version, None)
+        return entry
+
+    def _evict(self, keep: Optional[str] = None):
+        # Joriy versiya va hozirgina yuklangan versiya (keep) chiqarilmaydi: aks holda max_bytes'da
+        # ?model_version= bilan so'ralgan versiya darhol chiqarilib, har so'rovda diskdan qayta yuklanardi
+        def over_limit():
+            total = sum(m.nbytes for m in self._models.values())
+            return len(self._models) > self.max_versions or (self.max_bytes and total > self.max_bytes)
+
+        for version in list(self._models):
+            if not over_limit():
+                break
+            if version not in (self.current, keep):
+                del self._models[version]
+        if over_limit():
+            logging_instance.warning(f"Model keshi chegaradan oshdi: {list(self._models)} "
+                                     f"(joriy va oxirgi yuklangan versiya chiqarilmaydi)")
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(m.nbytes for m in self._models.values())
+
+    def refresh(self) -> bool:
+        """
+        Yangi versiya bo'lsa uni yuklab joriy versiyaga almashtiradi. return: almashdimi.
+        Versiya current'ga o'tishdan oldin yuklanadi va tekshiriladi: buzilgan versiya (yoki xususiyatlari
+        API kontraktiga mos kelmaydigan) rad etiladi va joriy model ishlashda davom etadi.
+        """
+        newest = self.latest()
+        if newest is None or newest == self.current or newest in self.rejected:
+            return False
+        previous = self.current
+        try:
+            self.get(newest)
+        except Exception as e:
+            self.rejected[newest] = str(e)
+            logging_instance.error(f"Model versiyasi rad etildi: {newest}: {str(e)}")
+            raise e
+        with self._lock:
+            self.current = newest
+            self.swaps += 1
+            self._evict()
+        for callback in self._callbacks:
+            callback(previous, newest)
+        return True
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Buzilgan versiya joriy modelni to'xtatmasligi kerak
+                logging_instance.error(f"Model registry watcher xatosi: {str(e)}")
+
+    def start_watcher(self, interval: float = 5.0):
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name="model-registry-watcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop_watcher(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "current": self.current,
+                "available": self.versions(),
+                "loaded": list(self._models),
+                "memory_mb": round(sum(m.nbytes for m in self._models.values()) / 2**20, 2),
+                "max_versions": self.max_versions,
+                "max_mb": round(self.max_bytes / 2**20, 2) if self.max_bytes else None,
+                "swaps": self.swaps,
+                "rejected": dict(self.rejected),
+            }
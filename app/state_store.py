@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.feature_engineering import HISTORY_HOURS, ROLLING_WINDOW, serving_features
+
+# Online rejimda interpolatsiya qilinadigan eng uzun uzilish (soat); undan uzunida tarix qayta to'planadi
+MAX_INTERPOLATED_GAP_HOURS = 3
+
+
+class LoadHistoryBuffer:
+    """
+    Oxirgi HISTORY_HOURS soatlik PJME_MW qiymatlari uchun ring buffer.
+    Rolling yig'indi har bir yangi soatda O(1) da yangilanadi, shuning uchun
+    lag/rolling xususiyatlari butun tarixni qayta hisoblamasdan olinadi.
+    max_gap soatdan uzun uzilishlar interpolatsiya qilinmaydi: bufer tozalanadi va qayta to'ldirilguncha
+    tayyor emas (lag/rolling o'ylab topilgan yuklamalardan hisoblanmaydi).
+    """
+
+    def __init__(self, size: int = HISTORY_HOURS, window: int = ROLLING_WINDOW,
+                 max_gap: int = MAX_INTERPOLATED_GAP_HOURS):
+        self.size = size
+        self.window = window
+        self.max_gap = max(0, min(max_gap, size))
+        self.values = np.full(size, np.nan, dtype=np.float64)
+        self.pos = 0  # keyingi yoziladigan slot
+        self.count = 0
+        self.last_ts: Optional[np.datetime64] = None
+        self.rolling_sum = 0.0
+        # Oxirgi qayta to'plash sababi (bufer yana tayyor bo'lguncha xato xabarida ko'rsatiladi)
+        self.reset_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.size
+
+    def _push(self, value: float):
+        leaving = self.values[(self.pos - self.window) % self.size]
+        if self.count >= self.window:
+            self.rolling_sum += value - leaving
+        else:
+            self.rolling_sum += value
+
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+        # Float xatolari yig'ilmasligi uchun har aylanishda aniq qayta hisoblaymiz
+        if self.pos == 0 and self.count >= self.window:
+            self.rolling_sum = float(self.lag_window().sum())
+
+    def _reset(self):
+        self.values.fill(np.nan)
+        self.pos = 0
+        self.count = 0
+        self.rolling_sum = 0.0
+
+    def update(self, ts, load: float) -> bool:
+        """
+        ts soatidagi kuzatilgan yuklamani qo'shadi. Dublikat/eski vaqtlar e'tiborsiz
+        qoldiriladi, max_gap soatgacha uzilishlar ingestion kabi chiziqli interpolatsiya qilinadi,
+        uzunroq uzilishda bufer tozalanib shu qiymatdan qayta to'planadi.
+        """
+        ts = np.datetime64(ts, "h")
+        with self._lock:
+            if self.last_ts is not None:
+                gap = int((ts - self.last_ts) / np.timedelta64(1, "h"))
+                if gap <= 0:
+                    return False
+                if gap - 1 > self.max_gap:
+                    self.reset_reason = (f"{self.last_ts} va {ts} orasida {gap - 1} soat uzilish "
+                                         f"(> {self.max_gap}), tarix qayta to'planmoqda")
+                    self._reset()
+                else:
+                    last_value = self.values[(self.pos - 1) % self.size]
+                    for step in range(1, gap):
+                        self._push(last_value + (load - last_value) * step / gap)
+            self._push(float(load))
+            if self.ready:
+                self.reset_reason = None
+            self.last_ts = ts
+            return True
+
+    def lag_window(self) -> np.ndarray:
+        idx = (self.pos - np.arange(self.window, 0, -1)) % self.size
+        return self.values[idx]
+
+    def raw_features(self, ts, temp_k: float) -> Dict[str, float]:
+        """
+        FeatureEngineer.run_feature_engineering bilan bir xil xususiyatlar,
+        ts = last_ts + 1h bo'lgan soat uchun (scale qilinmagan).
+        """
+        ts = np.datetime64(ts, "h")
+        with self._lock:
+            if not self.ready:
+                reason = f" ({self.reset_reason})" if self.reset_reason else ""
+                raise ValueError(f"Tarix yetarli emas: {self.count}/{self.size} soat{reason}")
+            if ts != self.last_ts + np.timedelta64(1, "h"):
+                raise ValueError(f"Kutilgan vaqt: {self.last_ts + np.timedelta64(1, 'h')}, kelgan: {ts}")
+
+            features = serving_features(self.history(), np.array([ts]), [temp_k], rolling_sum=[self.rolling_sum])
+
+        return {name: float(values[0]) for name, values in features.items()}
+
+    def history(self) -> np.ndarray:
+        """Buferdagi qiymatlar xronologik tartibda."""
+        n = min(self.count, self.size)
+        idx = (self.pos - np.arange(n, 0, -1)) % self.size
+        return self.values[idx]
+
+    def save(self, path: str):
+        """Snapshot'ni atomik yozadi (restartdan keyin tiklash uchun)."""
+        with self._lock:
+            if self.last_ts is None:
+                return
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, values=self.history(), last_ts=np.array(self.last_ts.astype(np.int64)),
+                         size=np.array(self.size), window=np.array(self.window))
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, max_gap: int = MAX_INTERPOLATED_GAP_HOURS) -> "LoadHistoryBuffer":
+        with np.load(path) as data:
+            buffer = cls(size=int(data["size"]), window=int(data["window"]), max_gap=max_gap)
+            buffer.extend(data["values"])
+            buffer.last_ts = np.datetime64(int(data["last_ts"]), "h")
+        return buffer
+
+    def extend(self, loads):
+        """Uzluksiz soatlik qiymatlar bilan to'ldirish (last_ts chaqiruvchi tomonidan qo'yiladi)."""
+        with self._lock:
+            for value in np.asarray(loads, dtype=np.float64)[-self.size:]:
+                self._push(float(value))
+
+    @classmethod
+    def from_history(cls, timestamps, loads, size: int = HISTORY_HOURS, window: int = ROLLING_WINDOW,
+                     max_gap: int = MAX_INTERPOLATED_GAP_HOURS) -> "LoadHistoryBuffer":
+        """combined_data kabi uzluksiz soatlik tarixdan buferni tiklaydi."""
+        buffer = cls(size=size, window=window, max_gap=max_gap)
+        buffer.extend(loads)
+        buffer.last_ts = np.datetime64(np.asarray(timestamps)[-1], "h")
+        return buffer
+
+
+class HourlyHistory:
+    """
+    To'liq soatlik yuklama/harorat tarixi (masalan combined_data.csv). Ixtiyoriy
+    boshlanish vaqtlari uchun forecast oynalarini olishda ishlatiladi.
+    """
+
+    def __init__(self, start_ts, loads, temps):
+        self.start_ts = np.datetime64(start_ts, "h")
+        self.loads = np.asarray(loads, dtype=np.float64)
+        self.temps = np.asarray(temps, dtype=np.float64)
+
+    @property
+    def end_ts(self) -> np.datetime64:
+        return self.start_ts + np.timedelta64(len(self.loads) - 1, "h")
+
+    @classmethod
+    def from_file(cls, path: str) -> "HourlyHistory":
+        """combined_data artefaktidan (CSV/Feather/Parquet) tarixni yuklaydi."""
+        import pandas as pd
+        from src.artifacts import load_frame
+
+        df = load_frame(path, columns=["PJME_MW", "Temp_K"]).sort_index()
+        df = df[~df.index.duplicated(keep="first")]
+        # Ingestion'dagi kabi vaqt uzilishlarini to'ldiramiz
+        df = df.reindex(pd.date_range(df.index.min(), df.index.max(), freq="h"))
+        df["PJME_MW"] = df["PJME_MW"].interpolate(method="linear")
+        df["Temp_K"] = df["Temp_K"].ffill()
+        return cls(df.index[0].to_datetime64(), df["PJME_MW"].values, df["Temp_K"].values)
+
+    def _offsets(self, start_times) -> np.ndarray:
+        start_times = np.asarray(start_times, dtype="datetime64[h]")
+        return ((start_times - self.start_ts) / np.timedelta64(1, "h")).astype(np.int64)
+
+    def windows(self, start_times, hours: int = HISTORY_HOURS) -> np.ndarray:
+        """Har bir start uchun [start - hours, start) oralig'idagi yuklamalar: (n, hours)."""
+        offsets = self._offsets(start_times)
+        if (offsets - hours < 0).any() or (offsets > len(self.loads)).any():
+            raise ValueError(f"Tarix {self.start_ts + np.timedelta64(hours, 'h')} .. "
+                             f"{self.end_ts + np.timedelta64(1, 'h')} oralig'idagi startlarni qamraydi")
+        return self.loads[offsets[:, None] + np.arange(-hours, 0)]
+
+    def future_temps(self, start_times, horizon: int) -> np.ndarray:
+        """Tarixda mavjud bo'lsa [start, start + horizon) oralig'idagi haroratlar: (n, horizon)."""
+        offsets = self._offsets(start_times)
+        if (offsets < 0).any() or (offsets + horizon > len(self.temps)).any():
+            raise ValueError("Harorat tarixi forecast gorizontini qamramaydi, Temp_K yuboring")
+        temps = self.temps[offsets[:, None] + np.arange(horizon)]
+        if np.isnan(temps).any():
+            raise ValueError("Harorat tarixida bo'shliqlar bor, Temp_K yuboring")
+        return temps
@@ -0,0 +1,218 @@
+"""API yuklama benchmarki: FastAPI ilovasi jarayon ichida (ASGI transport, tarmoqsiz).
+
+app.main lifespan'i bilan (model yuklash, micro-batcher) ishga tushiriladi va httpx.AsyncClient
+ASGITransport orqali yopiq tsiklda (har bir "foydalanuvchi" javobni kutib keyingisini yuboradi)
+quyidagi ssenariylar har bir concurrency darajasida o'lchanadi:
+
+* single           - /predict_from_scaled, bitta qator (JSON)
+* batch<N>         - /predict_batch, N qatorli batch (--batch-format json | npy)
+* direct<N>        - HTTP'siz MODEL.predict (serverning o'z narxini ajratish uchun), concurrency=1
+
+Har bir ssenariy uchun p50/p95/p99/o'rtacha kechikish (ms), so'rov/s, qator/s va xatolar soni.
+Klient va server bitta event loop va CPU'ni bo'lishadi: mutlaq qiymatlar haqiqiy tarmoqdagidan
+farq qiladi, lekin commit'lar orasidagi solishtirish uchun barqaror. Bashorat keshi default
+o'chiriladi (--cache bilan yoqiladi), kirishlar tasodifiy (seed bilan) standartlashtirilgan qatorlar.
+
+    python benchmarks/api_load.py --model models/final_stacking_model.pkl \\
+        --concurrency 1 8 32 --batch-sizes 32 256 --output benchmarks/results/api_load.json
+    python benchmarks/compare.py benchmarks/results/api_load.json new.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.pipeline_stages import git_commit  # noqa: E402
+
+BASE_URL = "http://bench"
+
+
+def configure_env(args, state_dir):
+    """app.main konfiguratsiyasi import paytida o'qiladi: env undan oldin o'rnatiladi."""
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ["MODEL_MMAP"] = "1" if args.mmap else os.environ.get("MODEL_MMAP", "0")
+    os.environ["MODEL_WATCH_INTERVAL"] = "0"
+    # Registry/versiya papkalari benchmark'ga aralashmasin (faqat default model)
+    os.environ.setdefault("MODEL_REGISTRY_DIR", os.path.join(state_dir, "series"))
+    os.environ.setdefault("MODEL_VERSIONS_DIR", os.path.join(state_dir, "registry"))
+    # Shutdown'da yoziladigan online holat repo'dagi models/ ga tushmasin
+    os.environ["STATE_SNAPSHOT_PATH"] = os.path.join(state_dir, "online_state.npz")
+    if not args.cache:
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+
+def percentiles(latencies_s):
+    ms = np.asarray(latencies_s) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(ms.mean()), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+def make_payloads(kind, n_requests, batch_size, features, fmt, seed):
+    """Har bir so'rov uchun alohida (takrorlanmaydigan) kirish: kesh yoqilgan bo'lsa ham haqiqiy miss."""
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for _ in range(n_requests):
+        if kind == "single":
+            row = rng.normal(size=len(features))
+            payloads.append({"json": {"features": dict(zip(features, row.tolist()))}})
+        elif fmt == "npy":
+            buffer = io.BytesIO()
+            np.save(buffer, rng.normal(size=(batch_size, len(features))))
+            payloads.append({"content": buffer.getvalue(), "headers": {"content-type": "application/x-npy"}})
+        else:
+            payloads.append({"json": {"rows": rng.normal(size=(batch_size, len(features))).tolist()}})
+    return payloads
+
+
+async def run_scenario(client, path, payloads, concurrency):
+    """Yopiq tsikl: `concurrency` ta ishchi umumiy navbatdan so'rov olib ketma-ket yuboradi."""
+    latencies, errors, samples = [], 0, []
+    queue = iter(payloads)
+
+    async def worker():
+        nonlocal errors
+        for payload in queue:
+            start = time.perf_counter()
+            response = await client.post(path, **payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+                if len(samples) < 3:
+                    samples.append(f"{response.status_code}: {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed, errors, samples
+
+
+def scenario_result(latencies, elapsed, errors, samples, rows_per_request):
+    result = {"requests": len(latencies), "errors": errors, "elapsed_s": round(elapsed, 4),
+              "rps": round(len(latencies) / elapsed, 2),
+              "rows_per_s": round(len(latencies) * rows_per_request / elapsed, 1),
+              **percentiles(latencies)}
+    if samples:
+        result["error_samples"] = samples
+    return result
+
+
+async def run_benchmark(args):
+    import httpx
+    from app import main as api
+
+    results = {}
+    async with api.app.router.lifespan_context(api.app):
+        model = api._default_model()
+        if model is None:
+            raise RuntimeError(f"Model yuklanmadi: {args.model}")
+        features = api.FEATURES
+
+        scenarios = [("single", "/predict_from_scaled", 1)]
+        scenarios += [(f"batch{n}", "/predict_batch", n) for n in args.batch_sizes]
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url=BASE_URL, timeout=args.timeout) as client:
+            for name, path, rows in scenarios:
+                kind = "single" if name == "single" else "batch"
+                warmup = make_payloads(kind, args.warmup, rows, features, args.batch_format, args.seed + 1)
+                await run_scenario(client, path, warmup, min(args.warmup, max(args.concurrency)) or 1)
+                for concurrency in args.concurrency:
+                    n_requests = max(args.requests if kind == "single" else args.batch_requests, concurrency)
+                    payloads = make_payloads(kind, n_requests, rows, features, args.batch_format,
+                                             args.seed + concurrency)
+                    result = scenario_result(*await run_scenario(client, path, payloads, concurrency), rows)
+                    results[f"{name}/c{concurrency}"] = result
+                    print(f"{name:10s} c={concurrency:<4d} {result['rps']:9.1f} req/s {result['rows_per_s']:11.1f} qator/s  "
+                          f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms"
+                          + (f"  xatolar: {result['errors']}" if result["errors"] else ""))
+
+        # HTTP qatlamisiz model narxi: API qo'shimcha narxini ajratish uchun
+        rng = np.random.default_rng(args.seed)
+        for rows in [1] + list(args.batch_sizes):
+            x = rng.normal(size=(rows, len(features)))
+            model.predict(x)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(args.direct_requests):
+                t0 = time.perf_counter()
+                model.predict(x)
+                latencies.append(time.perf_counter() - t0)
+            result = scenario_result(latencies, time.perf_counter() - start, 0, [], rows)
+            results[f"direct{rows}/c1"] = result
+            print(f"direct{rows:<4d} c=1    {result['rps']:9.1f} req/s {result['rows_per_s']:11.1f} qator/s  "
+                  f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms")
+
+        server = {"batching": api.BATCHER.stats() if getattr(api, "BATCHER", None) is not None else None,
+                  "cache": api.CACHE.stats()}
+    return results, server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process FastAPI load benchmark")
+    parser.add_argument("--model", default=os.path.join(ROOT, "models/final_stacking_model.pkl"),
+                        help="Model (pickle yoki inference bundle papkasi)")
+    parser.add_argument("--mmap", action="store_true", help="Bundle massivlarini mmap bilan yuklash")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256])
+    parser.add_argument("--batch-format", choices=["json", "npy"], default="json")
+    parser.add_argument("--requests", type=int, default=500, help="single ssenariysi uchun so'rovlar soni")
+    parser.add_argument("--batch-requests", type=int, default=100, help="batch ssenariylari uchun so'rovlar soni")
+    parser.add_argument("--direct-requests", type=int, default=200, help="direct (HTTP'siz) chaqiruvlar soni")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cache", action="store_true", help="Bashorat keshini yoqilgan holda qoldirish")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Natija JSON fayli")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        parser.error(f"Model topilmadi: {args.model} (avval `python run.py` yoki --model)")
+
+    # sklearn pickle modeli ndarray bilan har chaqiruvda ogohlantiradi: o'lchovga shovqin qo'shmasin
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    with tempfile.TemporaryDirectory(prefix="bench_api_") as state_dir:
+        configure_env(args, state_dir)
+        # app.main nisbiy yo'llari (logs/, configs/) repo ildiziga nisbatan
+        os.chdir(ROOT)
+        results, server = asyncio.run(run_benchmark(args))
+
+    report = {
+        "benchmark": "api_load",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {key: getattr(args, key) for key in
+                   ("concurrency", "batch_sizes", "batch_format", "requests", "batch_requests",
+                    "direct_requests", "warmup", "cache", "mmap", "seed")},
+        "env": {key: os.environ.get(key) for key in
+                ("MICROBATCH_ENABLED", "MICROBATCH_MAX_SIZE", "MICROBATCH_WAIT_MS", "MODEL_MMAP",
+                 "PREDICTION_CACHE_SIZE")},
+        "server": server,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Natija saqlandi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Ikki benchmark natijasini (baseline va yangi commit) solishtirish.
+
+pipeline_stages.py, api_load.py va import_time.py JSON natijalarini o'qiydi: umumiy kalitlar
+(masalan `x10/features`, `batch256/c8`) bo'yicha har bir metrikaning nisbiy o'zgarishi
+chiqariladi. Nisbiy `--threshold` dan va metrika turining shovqin chegarasidan ko'proq
+yomonlashgan metrikalar regressiya hisoblanadi, bunda chiqish kodi 1 bo'ladi (CI uchun).
+
+    python benchmarks/compare.py benchmarks/results/pipeline_stages.json new_stages.json
+    python benchmarks/compare.py old_api.json new_api.json --threshold 0.15 --metrics p95_ms rps
+"""
+import argparse
+import json
+import sys
+
+# Metrika: (kamroq yaxshimi, shovqin sifatida e'tiborsiz qoldiriladigan mutlaq farq)
+METRICS = {
+    "wall_s": (True, 0.05),
+    "cpu_s": (True, 0.05),
+    "peak_rss_mb": (True, 20.0),
+    "peak_delta_mb": (True, 20.0),
+    "p50_ms": (True, 0.5),
+    "p95_ms": (True, 1.0),
+    "p99_ms": (True, 2.0),
+    "mean_ms": (True, 0.5),
+    "import_ms": (True, 30.0),
+    "rps": (False, 1.0),
+    "rows_per_s": (False, 10.0),
+    "errors": (True, 0),
+}
+DEFAULT_METRICS = ["wall_s", "peak_rss_mb", "p50_ms", "p95_ms", "p99_ms", "rps", "import_ms", "errors"]
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    # import_time.py natijalari "modules" ostida
+    return report, report.get("results") or report.get("modules") or {}
+
+
+def compare(baseline, current, metrics, threshold):
+    """return: (barcha o'zgarishlar, regressiyalar) - har biri (kalit, metrika, eski, yangi, nisbat)."""
+    rows, regressions = [], []
+    for key in sorted(set(baseline) & set(current)):
+        for metric in metrics:
+            old, new = baseline[key].get(metric), current[key].get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            lower_is_better, min_delta = METRICS.get(metric, (True, 0.0))
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            rows.append((key, metric, old, new, change))
+            worse = new - old if lower_is_better else old - new
+            if worse > min_delta and worse > abs(old) * threshold:
+                regressions.append((key, metric, old, new, change))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark natijalarini solishtirish")
+    parser.add_argument("baseline", help="Oldingi (baseline) JSON natija")
+    parser.add_argument("current", help="Yangi JSON natija")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Ruxsat etilgan nisbiy yomonlashish")
+    parser.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS, help="Solishtiriladigan metrikalar")
+    args = parser.parse_args(argv)
+
+    base_report, baseline = load_results(args.baseline)
+    current_report, current = load_results(args.current)
+    if base_report.get("benchmark") != current_report.get("benchmark"):
+        print(f"Ogohlantirish: turli benchmark'lar ({base_report.get('benchmark')} vs {current_report.get('benchmark')})")
+    print(f"baseline: {base_report.get('git_commit')} ({base_report.get('created_at')}), "
+          f"yangi: {current_report.get('git_commit')} ({current_report.get('created_at')})")
+
+    rows, regressions = compare(baseline, current, args.metrics, args.threshold)
+    for key, metric, old, new, change in rows:
+        print(f"{key:24s} {metric:12s} {old:12.3f} -> {new:12.3f}  {change:+8.1%}")
+
+    only_base = sorted(set(baseline) - set(current))
+    if only_base:
+        print(f"Yangi natijada yo'q: {only_base}")
+    for key, metric, old, new, change in regressions:
+        print(f"REGRESSIYA: {key} {metric} {old:.3f} -> {new:.3f} ({change:+.1%})")
+    if regressions:
+        return 1
+    print("Regressiya yo'q.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Import vaqti benchmarki: `run`, `app.main` va har bir `src` moduli uchun start narxi.
+
+Har bir modul alohida toza jarayonda `python -X importtime -c "import <modul>"` bilan
+o'lchanadi (bir nechta takrorlashning minimumi) va natija JSON'ga yoziladi.
+`--baseline` berilsa oldingi natija bilan solishtiriladi va regressiya bo'lsa
+chiqish kodi 1 bo'ladi (CI uchun).
+
+    python benchmarks/import_time.py --output benchmarks/results/import_time.json
+    python benchmarks/import_time.py --baseline benchmarks/results/import_time.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Eski, pipeline'da ishlatilmaydigan skriptlar (import paytida fayl o'qiydi)
+SKIP_MODULES = {"src.evaluate_step0"}
+
+
+def default_modules():
+    modules = ["run", "app.main"]
+    for name in sorted(os.listdir(os.path.join(ROOT, "src"))):
+        if name.endswith(".py") and name != "__init__.py":
+            module = f"src.{name[:-3]}"
+            if module not in SKIP_MODULES:
+                modules.append(module)
+    return modules
+
+
+def measure_once(module):
+    """Bitta toza jarayonda modul importining kumulyativ vaqti (ms) va eng qimmat bog'liqliklar."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import qilinmadi:\n{result.stderr[-2000:]}")
+
+    total_us, top_level = None, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # sarlavha qatori
+        # Chekinishsiz nomlar — to'g'ridan-to'g'ri import qilingan top-level paketlar
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative) / 1000
+        if name.strip() == module:
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError(f"{module} uchun importtime natijasi topilmadi")
+    heaviest = dict(sorted(top_level.items(), key=lambda kv: -kv[1])[:5])
+    return total_us / 1000, heaviest
+
+
+def measure(modules, repeat):
+    results = {}
+    for module in modules:
+        runs = [measure_once(module) for _ in range(repeat)]
+        best_ms, heaviest = min(runs, key=lambda r: r[0])
+        results[module] = {"import_ms": round(best_ms, 1), "heaviest": heaviest}
+        print(f"{module:30s} {best_ms:9.1f} ms")
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Baseline'dan `threshold` ulushdan (va `min_delta_ms` dan) ko'proq sekinlashgan modullar."""
+    regressions = []
+    for module, current in results.items():
+        previous = baseline.get("modules", {}).get(module)
+        if previous is None:
+            continue
+        old, new = previous["import_ms"], current["import_ms"]
+        if new - old > min_delta_ms and new > old * (1 + threshold):
+            regressions.append((module, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument("modules", nargs="*", help="Modullar (default: run, app.main va src.*)")
+    parser.add_argument("--repeat", type=int, default=5, help="Har bir modul uchun takrorlashlar (minimum olinadi)")
+    parser.add_argument("--output", default=None, help="Natija JSON fayli")
+    parser.add_argument("--baseline", default=None, help="Solishtirish uchun oldingi JSON natija")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Ruxsat etilgan nisbiy sekinlashish")
+    parser.add_argument("--min-delta-ms", type=float, default=30.0, help="Shovqin sifatida e'tiborsiz qoldiriladigan farq")
+    args = parser.parse_args(argv)
+
+    results = measure(args.modules or default_modules(), args.repeat)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "modules": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Natija saqlandi: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for module, old, new in regressions:
+            print(f"REGRESSIYA: {module} {old:.1f} ms -> {new:.1f} ms")
+        if regressions:
+            return 1
+        print("Import vaqti regressiyasi yo'q.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""Pipeline bosqichlari benchmarki: har bir bosqichning wall/CPU vaqti va peak xotirasi.
+
+`data/raw/PJME_hourly.csv` (scale=1) va undan 10-100 marta katta sintetik ma'lumotda
+run.py bilan bir xil chaqiruvlar o'lchanadi:
+
+* ingestion - DataIngestor.run_ingestion (series rejimida har bir zona uchun)
+* features  - FeatureEngineer.run_feature_engineering
+* selection - FeatureSelector.analyze_importance (--fast-selection run.py'dagi kabi)
+* scaling   - StandardScaler + train/test_scaled artefaktlari
+* baseline  - train_base_models
+* predict   - o'qitilgan model (--model) bilan butun xususiyatlar jadvalini bashorat qilish:
+              scaler.pkl + selected_features.pkl modelning yonida bo'lishi kerak
+
+Sintetik ma'lumot ikki xil kattalashtiriladi (--layout):
+
+* history - asl qator vaqt bo'yicha orqaga k marta (hafta kunlari saqlanadi) uzaytiriladi.
+  pandas Timestamp chegarasi (1677 yil) tufayli PJME uchun ~20x gacha.
+* series  - k ta zona (har biri asl uzunlikda, o'z shovqini bilan) multi-series pipeline'da.
+
+temperature.csv bo'lmasa mavsumiy + sutkalik sintetik harorat (Philadelphia ustuni) yaratiladi.
+Har bir scale alohida toza jarayonda o'lchanadi (oldingi scale xotirasi aralashmaydi);
+--repeat > 1 bo'lsa vaqt bo'yicha minimum, xotira bo'yicha maksimum olinadi.
+
+    python benchmarks/pipeline_stages.py --scales 1 10 --output benchmarks/results/pipeline_stages.json
+    python benchmarks/pipeline_stages.py --layout series --scales 100 --fast-selection \\
+        --stages ingestion features selection scaling
+    python benchmarks/compare.py benchmarks/results/pipeline_stages.json new.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+STAGES = ["ingestion", "features", "selection", "scaling", "baseline", "predict"]
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+SPLIT_DATE = "2017-01-01"
+TEMP_COL = "Philadelphia"
+# Hafta kunlari (kalendar xususiyatlari) saqlanishi uchun bloklar butun haftalarga suriladi
+WEEK = pd.Timedelta(hours=168)
+# pandas datetime64[ns] quyi chegarasi (1677-09-21) dan bir oz keyin
+TIMESTAMP_FLOOR = datetime(1678, 1, 1)
+
+
+def resolve_stages(selected):
+    """Tanlangan bosqichlar + ular bog'liq bo'lgan oldingi bosqichlar (predict faqat features'ga bog'liq)."""
+    upstream = [STAGES.index(s) for s in selected if s != "predict"] or [STAGES.index("features")]
+    stages = [s for s in STAGES[:max(upstream) + 1] if s != "predict"]
+    return stages + (["predict"] if "predict" in selected else [])
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def synthetic_temperature(timestamps, seed=0):
+    """Mavsumiy va sutkalik tsikl + AR(1) shovqin: Kelvin'da soatlik harorat."""
+    ts = pd.DatetimeIndex(timestamps)
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 1.0, len(ts))
+    # AR(1): ob-havo bir necha soat davom etadi
+    noise = pd.Series(noise).ewm(alpha=0.1).mean().to_numpy() * 3
+    doy = ts.dayofyear.to_numpy()
+    hour = ts.hour.to_numpy()
+    return (285.0 + 12.0 * np.sin(2 * np.pi * (doy - 110) / 365.25)
+            + 4.0 * np.sin(2 * np.pi * (hour - 9) / 24) + noise)
+
+
+def load_raw(energy_path, temp_path):
+    energy = pd.read_csv(energy_path)
+    energy["Datetime"] = pd.to_datetime(energy["Datetime"], format=DATETIME_FORMAT)
+    if temp_path and os.path.exists(temp_path):
+        temp = pd.read_csv(temp_path, usecols=["datetime", TEMP_COL])
+        temp["datetime"] = pd.to_datetime(temp["datetime"], format=DATETIME_FORMAT)
+        temp_source = temp_path
+    else:
+        hours = pd.date_range(energy["Datetime"].min(), energy["Datetime"].max(), freq="h")
+        temp = pd.DataFrame({"datetime": hours, TEMP_COL: synthetic_temperature(hours)})
+        temp_source = "synthetic"
+    return energy, temp, temp_source
+
+
+def _jitter(values, rng, level=0.02):
+    """Blok bo'yicha masshtab + qator bo'yicha shovqin: nusxalar bir xil bo'lib qolmaydi."""
+    return values * rng.normal(1.0, level) * rng.normal(1.0, level / 2, len(values))
+
+
+def make_history(energy, temp, scale, seed=0):
+    """Asl qatorni vaqt bo'yicha orqaga `scale` marta uzaytiradi (bloklar butun haftalarga surilgan)."""
+    span = energy["Datetime"].max() - energy["Datetime"].min() + pd.Timedelta(hours=1)
+    step = WEEK * int(np.ceil(span / WEEK))
+    start = min(energy["Datetime"].min(), temp["datetime"].min())
+    # Timedelta 292 yildan oshmaydi: chegara datetime orqali hisoblanadi
+    max_scale = 1 + int((start.to_pydatetime() - TIMESTAMP_FLOOR) / step.to_pytimedelta())
+    if scale > max_scale:
+        raise ValueError(f"history rejimida scale={scale} Timestamp chegarasidan chiqadi "
+                         f"(maksimum {max_scale}); --layout series ishlating")
+
+    rng = np.random.default_rng(seed)
+    energy_blocks, temp_blocks = [], []
+    for i in range(scale):
+        shift = step * i
+        energy_blocks.append(pd.DataFrame({
+            "Datetime": energy["Datetime"] - shift,
+            "PJME_MW": energy["PJME_MW"].to_numpy() if i == 0 else _jitter(energy["PJME_MW"].to_numpy(), rng),
+        }))
+        temp_values = temp[TEMP_COL].to_numpy()
+        temp_blocks.append(pd.DataFrame({
+            "datetime": temp["datetime"] - shift,
+            TEMP_COL: temp_values if i == 0 else temp_values + rng.normal(0, 0.5, len(temp_values)),
+        }))
+    return pd.concat(energy_blocks[::-1], ignore_index=True), pd.concat(temp_blocks[::-1], ignore_index=True)
+
+
+def prepare_data(args, scale, work_dir):
+    """Scale uchun xom CSV'lar; natija: {'energy': [...], 'temp': path, 'rows': energy qatorlari}."""
+    energy, temp, temp_source = load_raw(args.energy, args.temp)
+    data_dir = os.path.join(work_dir, f"data_x{scale}")
+    os.makedirs(data_dir, exist_ok=True)
+    temp_path = os.path.join(data_dir, "temperature.csv")
+
+    if args.layout == "history":
+        energy, temp = make_history(energy, temp, scale, seed=args.seed)
+        energy_path = os.path.join(data_dir, "energy.csv")
+        energy.to_csv(energy_path, index=False, date_format=DATETIME_FORMAT)
+        energy_paths = [energy_path]
+        rows = len(energy)
+    else:
+        rng = np.random.default_rng(args.seed)
+        energy_paths = []
+        for i in range(scale):
+            path = os.path.join(data_dir, f"energy_{i:03d}.csv")
+            values = energy["PJME_MW"].to_numpy()
+            zone = pd.DataFrame({"Datetime": energy["Datetime"],
+                                 "PJME_MW": values if i == 0 else _jitter(values, rng, level=0.1)})
+            zone.to_csv(path, index=False, date_format=DATETIME_FORMAT)
+            energy_paths.append(path)
+        rows = len(energy) * scale
+
+    temp.to_csv(temp_path, index=False, date_format=DATETIME_FORMAT)
+    return {"energy": energy_paths, "temp": temp_path, "rows": rows, "temp_source": temp_source}
+
+
+def _load_predictor(model_path):
+    """predict bosqichi uchun model, scaler va tanlangan xususiyatlar (bo'lmasa None + sabab)."""
+    import joblib
+    model_dir = os.path.dirname(model_path)
+    scaler_path = os.path.join(model_dir, "scaler.pkl")
+    features_path = os.path.join(model_dir, "selected_features.pkl")
+    missing = [p for p in (model_path, scaler_path, features_path) if not os.path.exists(p)]
+    if missing:
+        return None, f"topilmadi: {missing}"
+    from app.registry import load_model
+    return (load_model(model_path), joblib.load(scaler_path), joblib.load(features_path)), None
+
+
+def run_scale(args, scale, data, work_dir):
+    """Bitta toza jarayonda barcha tanlangan bosqichlar; natija: profiler hisobotidan bosqichlar."""
+    from src.artifacts import SERIES_COL, SERIES_TARGET_COL, TARGET_COL, ArtifactStore
+    from src.feature_engineering import FeatureEngineer
+    from src.ingestion import DataIngestor
+    from src.profiling import PipelineProfiler
+
+    out_dir = os.path.join(work_dir, f"run_x{scale}")
+    store = ArtifactStore(os.path.join(out_dir, "processed"))
+    profiler = PipelineProfiler(out_dir).activate()
+    series_mode = args.layout == "series"
+    target = SERIES_TARGET_COL if series_mode else TARGET_COL
+    info = {}
+    state = {}
+
+    try:
+        if "ingestion" in args.stages:
+            with profiler.stage("ingestion") as record:
+                if series_mode:
+                    from src.multi_series import ingest_series
+                    series = [{"key": f"Z{i:03d}", "energy_path": path, "target_col": TARGET_COL, "temp_col": TEMP_COL}
+                              for i, path in enumerate(data["energy"])]
+                    combined = ingest_series(series, data["temp"], os.path.join(out_dir, "combined"))
+                else:
+                    ingestor = DataIngestor(data["energy"][0], data["temp"], os.path.join(out_dir, "combined"),
+                                            store=ArtifactStore(os.path.join(out_dir, "combined")))
+                    combined = ingestor.run_ingestion()
+                record["rows"] = len(combined)
+            state["ingestion"] = combined
+
+        if "features" in args.stages:
+            with profiler.stage("features") as record:
+                engineer = FeatureEngineer(split_date=SPLIT_DATE, target_col=target,
+                                           series_col=SERIES_COL if series_mode else None)
+                train_df, test_df = engineer.run_feature_engineering(state.pop("ingestion"))
+                if series_mode:
+                    train_df = train_df.drop(columns=[SERIES_COL])
+                    test_df = test_df.drop(columns=[SERIES_COL])
+                record["rows"] = len(train_df) + len(test_df)
+            state["features"] = (train_df, test_df)
+
+        if "selection" in args.stages:
+            from src.feature_selection import FeatureSelector
+            train_df, test_df = state["features"]
+            with profiler.stage("selection") as record:
+                selector = FeatureSelector(model_dir=out_dir, fast=args.fast_selection, make_plots=False)
+                selected, _ = selector.analyze_importance(train_df.drop(columns=[target]), train_df[target])
+                record["rows"] = len(train_df)
+                record["n_features"] = len(selected)
+            state["selection"] = selected
+
+        if "scaling" in args.stages:
+            from sklearn.preprocessing import StandardScaler
+            train_df, test_df = state["features"]
+            selected = state["selection"]
+            with profiler.stage("scaling") as record:
+                scaler = StandardScaler()
+                X_train = pd.DataFrame(scaler.fit_transform(train_df[selected]), columns=selected, index=train_df.index)
+                X_test = pd.DataFrame(scaler.transform(test_df[selected]), columns=selected, index=test_df.index)
+                train_path = store.save(pd.concat([X_train, train_df[target]], axis=1), "train_scaled")
+                test_path = store.save(pd.concat([X_test, test_df[target]], axis=1), "test_scaled")
+                record["rows"] = len(X_train) + len(X_test)
+            state["scaling"] = (train_path, test_path)
+
+        if "baseline" in args.stages:
+            from src.model_trainer import train_base_models
+            train_path, test_path = state["scaling"]
+            with profiler.stage("baseline") as record:
+                results = train_base_models(train_path, test_path, target_col=target)
+                record["rows"] = len(state["features"][0])
+                record["mape"] = {name: round(float(mape), 3) for name, mape in results.items()}
+            state["baseline"] = results
+
+        if "predict" in args.stages:
+            loaded, reason = _load_predictor(args.model)
+            if loaded is None:
+                info["predict"] = f"o'tkazib yuborildi: {reason}"
+            else:
+                model, scaler, features = loaded
+                # Butun xususiyatlar jadvali: test qismi (2017+) scale bilan o'smaydi
+                frame = pd.concat(state["features"])
+                missing = [f for f in features if f not in frame.columns]
+                if missing:
+                    info["predict"] = f"o'tkazib yuborildi: ustunlar yo'q {missing}"
+                else:
+                    with profiler.stage("predict") as record:
+                        x = pd.DataFrame(scaler.transform(frame[features]), columns=features)
+                        model.predict(x)
+                        record["rows"] = len(x)
+    finally:
+        profiler.deactivate()
+
+    report = profiler.report()
+    stages = {}
+    for stage in report["stages"]:
+        entry = {key: stage[key] for key in ("wall_s", "cpu_s", "children_cpu_s", "peak_rss_mb") if key in stage}
+        # Bosqichning o'zi qo'shgan xotira (oldingi bosqichlar ma'lumoti RSS'da qoladi)
+        entry["peak_delta_mb"] = round(stage["peak_rss_mb"] - stage["rss_start_mb"], 1)
+        for key in ("rows", "n_features", "mape"):
+            if key in stage:
+                entry[key] = stage[key]
+        if entry.get("rows") and entry["wall_s"] > 0:
+            entry["rows_per_s"] = round(entry["rows"] / entry["wall_s"], 1)
+        stages[stage["name"]] = entry
+    # Model fit'lari kabi ichki qismlar (src.profiling.profile_section orqali)
+    events = [{key: e[key] for key in ("name", "stage", "wall_s", "cpu_s") if key in e} for e in report["events"]]
+    return {"stages": stages, "events": events, "notes": info}
+
+
+def _run_scale_worker(args, scale, data, work_dir):
+    return run_scale(args, scale, data, work_dir)
+
+
+def aggregate(runs):
+    """Takrorlashlar: vaqt bo'yicha minimum, xotira bo'yicha maksimum."""
+    result = {}
+    for name in runs[0]["stages"]:
+        samples = [run["stages"][name] for run in runs if name in run["stages"]]
+        entry = dict(samples[0])
+        for key in ("wall_s", "cpu_s", "children_cpu_s"):
+            if key in entry:
+                entry[key] = min(s[key] for s in samples)
+        for key in ("peak_rss_mb", "peak_delta_mb"):
+            if key in entry:
+                entry[key] = max(s[key] for s in samples)
+        if entry.get("rows") and entry["wall_s"] > 0:
+            entry["rows_per_s"] = round(entry["rows"] / entry["wall_s"], 1)
+        result[name] = entry
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmark")
+    parser.add_argument("--energy", default=os.path.join(ROOT, "data/raw/PJME_hourly.csv"))
+    parser.add_argument("--temp", default=os.path.join(ROOT, "data/raw/temperature.csv"),
+                        help="Harorat CSV; bo'lmasa sintetik harorat yaratiladi")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="Ma'lumot hajmi koeffitsientlari")
+    parser.add_argument("--layout", choices=["history", "series"], default="history",
+                        help="history - uzunroq tarix, series - k ta zona (multi-series pipeline)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="O'lchanadigan bosqichlar (kerakli oldingi bosqichlar ham ishlaydi)")
+    parser.add_argument("--fast-selection", action="store_true", help="FeatureSelector(fast=True), run.py kabi")
+    parser.add_argument("--model", default=os.path.join(ROOT, "models/final_stacking_model.pkl"),
+                        help="predict bosqichi uchun model (yonida scaler.pkl va selected_features.pkl)")
+    parser.add_argument("--repeat", type=int, default=1, help="Har bir scale uchun takrorlashlar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="Sintetik ma'lumot va artefaktlar (default: vaqtinchalik)")
+    parser.add_argument("--output", default=None, help="Natija JSON fayli")
+    args = parser.parse_args(argv)
+
+    args.energy, args.temp, args.model = (os.path.abspath(p) for p in (args.energy, args.temp, args.model))
+    args.stages = resolve_stages(args.stages)
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix="bench_stages_")
+    os.makedirs(work_dir, exist_ok=True)
+    # Repo logger'i va nisbiy yo'llar uchun ishchi jarayonlar repo ildizidan ishlaydi
+    os.chdir(ROOT)
+
+    results, scales, notes = {}, {}, {}
+    try:
+        for scale in args.scales:
+            data = prepare_data(args, scale, work_dir)
+            print(f"x{scale}: {data['rows']} qator ({args.layout}, harorat: {data['temp_source']})")
+            runs = []
+            for _ in range(args.repeat):
+                # Har bir o'lchov yangi spawn jarayonda: peak RSS oldingi scale'dan ta'sirlanmaydi
+                with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                    runs.append(pool.submit(_run_scale_worker, args, scale, data, work_dir).result())
+            stages = aggregate(runs)
+            scales[f"x{scale}"] = {"rows": data["rows"], "temp_source": data["temp_source"],
+                                   "events": runs[0]["events"]}
+            if runs[0]["notes"]:
+                notes[f"x{scale}"] = runs[0]["notes"]
+            for name, entry in stages.items():
+                results[f"x{scale}/{name}"] = entry
+                print(f"  {name:10s} {entry['wall_s']:9.2f} s  peak {entry['peak_rss_mb']:8.0f} MB "
+                      f"(+{entry['peak_delta_mb']:.0f})  {entry.get('rows_per_s', 0):>12,.0f} qator/s")
+            for message in runs[0]["notes"].values():
+                print(f"  {message}")
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "pipeline_stages",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"layout": args.layout, "scales": args.scales, "stages": args.stages,
+                   "fast_selection": args.fast_selection, "repeat": args.repeat, "seed": args.seed},
+        "scales": scales,
+        "notes": notes,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Natija saqlandi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
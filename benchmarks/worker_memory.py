@@ -0,0 +1,148 @@
+"""Worker xotirasi benchmarki: N ta jarayon (uvicorn worker'lari kabi) bitta modelni yuklaydi.
+
+Har bir rejim uchun (pickle, bundle, bundle + mmap) N ta `spawn` jarayon modelni yuklaydi,
+bitta predict qiladi va hammasi yuklangan paytda (barrier) xotirasini o'lchaydi:
+
+* RSS  - jarayonga tegishli barcha rezident sahifalar (umumiy sahifalar ham har birida hisoblanadi)
+* PSS  - umumiy sahifalar jarayonlar soniga bo'lingan ulush; yig'indisi - tugunning haqiqiy sarfi
+* USS  - faqat shu jarayonning shaxsiy sahifalari
+
+PSS/USS Linux'da /proc/self/smaps_rollup dan olinadi.
+
+    python benchmarks/worker_memory.py --workers 16 \\
+        --pickle models/final_stacking_model.pkl --bundle models/inference_bundle \\
+        --output benchmarks/results/worker_memory.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_mb():
+    """Joriy jarayonning RSS/PSS/USS qiymatlari (MB)."""
+    result = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+        result["rss"] = fields["Rss"] / 1024
+        result["pss"] = fields["Pss"] / 1024
+        result["uss"] = (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024
+    except (OSError, KeyError):
+        import resource
+        # Linux bo'lmagan tizimlarda faqat maksimal RSS (KB yoki bayt - platformaga bog'liq)
+        scale = 1 if sys.platform == "darwin" else 1024
+        result["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+    return result
+
+
+def _worker(mode, path, n_features, barrier, queue):
+    sys.path.insert(0, ROOT)
+    import numpy as np
+    from app.registry import load_model
+
+    # Kutubxonalar importi bazaviy xotiraga kiradi, faqat model yuklash "after"ga
+    import importlib
+    import sklearn.ensemble  # noqa: F401
+    from src.inference_bundle import HAS_LGBM, HAS_XGB
+    for name, available in (("lightgbm", HAS_LGBM), ("xgboost", HAS_XGB)):
+        if available:
+            importlib.import_module(name)
+    before = memory_mb()
+
+    model = load_model(path, mmap=(mode == "bundle-mmap"))
+    x = np.random.default_rng(0).normal(size=(256, n_features))
+    model.predict(x)
+
+    barrier.wait()
+    after = memory_mb()
+    queue.put({"before": before, "after": after})
+    # Boshqa worker'lar o'lchab bo'lguncha sahifalar map qilingan holda qoladi
+    barrier.wait()
+
+
+def model_n_features(mode, path):
+    """Xususiyatlar soni aynan o'lchanadigan modeldan olinadi (bundle manifest yoki pickle)."""
+    if mode != "pickle":
+        with open(os.path.join(path, "manifest.json")) as f:
+            return json.load(f)["n_features"]
+    import joblib
+    return joblib.load(path).n_features_in_
+
+
+def run_mode(mode, path, workers, n_features):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, path, n_features, barrier, queue)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    samples = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    def mean(key, stage):
+        values = [s[stage][key] for s in samples if key in s[stage]]
+        return round(sum(values) / len(values), 2) if values else None
+
+    summary = {
+        "mode": mode,
+        "path": path,
+        "workers": workers,
+        "rss_before_mb": mean("rss", "before"),
+        "rss_after_mb": mean("rss", "after"),
+        "model_rss_per_worker_mb": round(mean("rss", "after") - mean("rss", "before"), 2),
+        "pss_after_mb": mean("pss", "after"),
+        "uss_after_mb": mean("uss", "after"),
+    }
+    if summary["pss_after_mb"] is not None:
+        summary["total_pss_mb"] = round(sum(s["after"]["pss"] for s in samples), 2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-worker model memory benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pickle", default="models/final_stacking_model.pkl")
+    parser.add_argument("--bundle", default="models/inference_bundle")
+    parser.add_argument("--modes", nargs="+", default=["pickle", "bundle", "bundle-mmap"],
+                        choices=["pickle", "bundle", "bundle-mmap"])
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for mode in args.modes:
+        path = args.pickle if mode == "pickle" else args.bundle
+        if not os.path.exists(path):
+            print(f"O'tkazib yuborildi ({mode}): {path} topilmadi")
+            continue
+        summary = run_mode(mode, path, args.workers, model_n_features(mode, path))
+        results.append(summary)
+        print(f"{mode:12s} model RSS/worker: {summary['model_rss_per_worker_mb']:8.1f} MB   "
+              f"PSS/worker: {summary['pss_after_mb']} MB   jami PSS: {summary.get('total_pss_mb')} MB")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "workers": args.workers,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Natija saqlandi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,70 @@
 import json
+import asyncio
+import tempfile
+import time
+import httpx
+import numpy as np
 import requests
 import pandas as pd
 import gradio as gr
 
 import os
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000/predict_from_scaled")
+BATCH_API_URL = os.getenv("BATCH_API_URL", API_URL.rsplit("/", 1)[0] + "/predict_batch")
+# Butun faylni baholash: batch hajmi (server MAX_BATCH_SIZE dan oshmasin) va parallel so'rovlar
+BATCH_SIZE = int(os.getenv("DEMO_BATCH_SIZE", "1000"))
+MAX_CONCURRENCY = int(os.getenv("DEMO_CONCURRENCY", "4"))
+HTTP_TIMEOUT = float(os.getenv("DEMO_TIMEOUT", "60"))
+PREVIEW_ROWS = 1000
+PLOT_MAX_POINTS = 5000
+NON_FEATURE_COLS = ("Datetime", "PJME_MW")
+PROGRESS_INTERVAL = 0.5  # soniya
+
+# Bitta keep-alive ulanishlar hovuzi: har bir so'rov uchun yangi TCP ulanish ochilmaydi
+SESSION = requests.Session()
+_ASYNC_CLIENT = None
+
+
+def get_async_client():
+    """Gradio event loop'idagi umumiy httpx.AsyncClient (keep-alive, ulanishlar soni cheklangan)."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        )
+    return _ASYNC_CLIENT
+
+
+def load_upload(file):
+    """
+    Yuklangan faylni bir marta o'qiydi (CSV / Parquet / Feather) va sessiya keshi uchun lug'at qaytaradi:
+    {"path", "name", "features" (float64 DataFrame), "datetime", "actual"}
+    """
+    path = getattr(file, "name", file)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        df = pd.read_parquet(path)
+    elif ext in (".feather", ".arrow"):
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path)
+
+    return {
+        "path": path,
+        "name": os.path.basename(path),
+        "features": df.drop(columns=[c for c in NON_FEATURE_COLS if c in df.columns]).astype("float64"),
+        "datetime": pd.to_datetime(df["Datetime"]) if "Datetime" in df.columns else None,
+        "actual": df["PJME_MW"].to_numpy(dtype=float) if "PJME_MW" in df.columns else None,
+    }
+
+
+def _cached_upload(file, cache):
+    """Sessiya keshidagi fayl shu bo'lsa qayta o'qilmaydi."""
+    path = getattr(file, "name", file)
+    if cache is not None and cache["path"] == path:
+        return cache
+    return load_upload(file)
 
 
 
@@ -27,7 +87,7 @@ def call_api(features_json: str):
     payload = {"features": features}
 
     try:
-        r = requests.post(API_URL, json=payload, timeout=20)
+        r = SESSION.post(API_URL, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return f"❌ API error {r.status_code}: {r.text}"
         data = r.json()
@@ -36,31 +96,130 @@ def call_api(features_json: str):
         return f"❌ API ga ulanish xato: {e}"
 
 
-def from_csv(file, row_index: int):
+def from_csv(file, row_index: int, cache=None):
     """
     Upload test_scaled.csv (yoki shunga o‘xshash)
     row_index qatordan feature olib API ga yuboradi.
+    Fayl sessiya keshida (gr.State) saqlanadi: har bir bosishda qayta o'qilmaydi.
     """
     try:
-        df = pd.read_csv(file.name)
-        if "Datetime" in df.columns:
-            df = df.drop(columns=["Datetime"])
-        if "PJME_MW" in df.columns:
-            df = df.drop(columns=["PJME_MW"])
+        cache = _cached_upload(file, cache)
+        df = cache["features"]
 
         if row_index < 0 or row_index >= len(df):
-            return f"❌ row_index 0..{len(df)-1} oralig‘ida bo‘lsin"
+            return f"❌ row_index 0..{len(df)-1} oralig‘ida bo‘lsin", cache
 
-        features = df.iloc[row_index].to_dict()
+        features = df.iloc[int(row_index)].to_dict()
         payload = {"features": {k: float(v) for k, v in features.items()}}
 
-        r = requests.post(API_URL, json=payload, timeout=20)
+        r = SESSION.post(API_URL, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
-            return f"❌ API error {r.status_code}: {r.text}"
+            return f"❌ API error {r.status_code}: {r.text}", cache
         data = r.json()
-        return f"✅ Prediction: {data['prediction']}"
+        return f"✅ Prediction: {data['prediction']}", cache
+    except Exception as e:
+        return f"❌ CSV dan o‘qish/yuborish xato: {e}", cache
+
+
+def on_upload(file):
+    """Butun fayl tab'i: yuklangan fayl bir marta o'qiladi va sessiya keshiga (gr.State) qo'yiladi."""
+    if file is None:
+        return None, ""
+    try:
+        cache = load_upload(file)
     except Exception as e:
-        return f"❌ CSV dan o‘qish/yuborish xato: {e}"
+        return None, f"❌ Faylni o‘qish xato: {e}"
+    extra = []
+    if cache["datetime"] is not None:
+        extra.append(f"{cache['datetime'].min()} … {cache['datetime'].max()}")
+    if cache["actual"] is not None:
+        extra.append("PJME_MW bor (MAPE hisoblanadi)")
+    info = f"📄 **{cache['name']}**: {len(cache['features'])} qator, {cache['features'].shape[1]} ta feature"
+    return cache, info + (f" — {', '.join(extra)}" if extra else "")
+
+
+async def _post_batch(client, semaphore, features, start, stop):
+    """Bitta /predict_batch so'rovi; semaphore bir vaqtdagi so'rovlar sonini cheklaydi."""
+    async with semaphore:
+        chunk = features.iloc[start:stop]
+        payload = {"columns": {col: chunk[col].tolist() for col in chunk.columns}}
+        r = await client.post(BATCH_API_URL, json=payload)
+    if r.status_code != 200:
+        raise RuntimeError(f"API error {r.status_code}: {r.text[:300]}")
+    return r.json()["predictions"]
+
+
+def _result_outputs(cache, preds):
+    """Natija jadvali (CSV fayl sifatida ham) va grafik uchun uzun formatdagi DataFrame."""
+    result = pd.DataFrame({"prediction": preds})
+    if cache["datetime"] is not None:
+        result.insert(0, "Datetime", cache["datetime"].to_numpy())
+    if cache["actual"] is not None:
+        result.insert(len(result.columns) - 1, "PJME_MW", cache["actual"])
+
+    with tempfile.NamedTemporaryFile("w", suffix="_predictions.csv", delete=False) as f:
+        result.to_csv(f, index=False)
+        download_path = f.name
+
+    # Grafik: ko'pi bilan PLOT_MAX_POINTS nuqta (brauzer sekinlashmasin)
+    step = max(1, int(np.ceil(len(result) / PLOT_MAX_POINTS)))
+    sampled = result.iloc[::step]
+    x = sampled["Datetime"] if "Datetime" in sampled.columns else pd.Series(sampled.index, index=sampled.index)
+    frames = [pd.DataFrame({"vaqt": x, "MW": sampled["prediction"], "series": "prediction"})]
+    if "PJME_MW" in sampled.columns:
+        frames.append(pd.DataFrame({"vaqt": x, "MW": sampled["PJME_MW"], "series": "PJME_MW"}))
+    return result, pd.concat(frames, ignore_index=True), download_path
+
+
+async def score_file(cache, batch_size, concurrency):
+    """
+    Butun faylni /predict_batch orqali baholaydi: batch'lar umumiy keep-alive klient orqali,
+    ko'pi bilan `concurrency` ta parallel so'rovda yuboriladi. Jarayon holati stream qilinadi,
+    oxirida bashoratlar jadvali, grafik va yuklab olinadigan CSV qaytariladi.
+    """
+    if cache is None:
+        yield "❌ Avval faylni yuklang", None, None, None
+        return
+
+    features = cache["features"]
+    n_rows = len(features)
+    batch_size = max(1, int(batch_size))
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+    client = get_async_client()
+    starts = list(range(0, n_rows, batch_size))
+
+    start_time = time.perf_counter()
+    tasks = [asyncio.create_task(_post_batch(client, semaphore, features, s, min(s + batch_size, n_rows)))
+             for s in starts]
+    try:
+        pending, done_rows = set(tasks), 0
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=PROGRESS_INTERVAL,
+                                               return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    yield f"❌ Baholash to‘xtadi: {task.exception()}", None, None, None
+                    return
+                done_rows += len(task.result())
+            elapsed = time.perf_counter() - start_time
+            yield (f"⏳ {done_rows}/{n_rows} qator ({len(tasks) - len(pending)}/{len(tasks)} batch), "
+                   f"{done_rows / max(elapsed, 1e-9):,.0f} qator/s", gr.skip(), gr.skip(), gr.skip())
+    finally:
+        # Xato yoki foydalanuvchi bekor qilsa qolgan so'rovlar to'xtatiladi
+        for task in tasks:
+            task.cancel()
+
+    preds = np.concatenate([np.asarray(task.result(), dtype=float) for task in tasks])
+    elapsed = time.perf_counter() - start_time
+    result, plot_df, download_path = _result_outputs(cache, preds)
+
+    status = (f"✅ {n_rows} qator baholandi: {len(tasks)} batch, {elapsed:.1f} s "
+              f"({n_rows / max(elapsed, 1e-9):,.0f} qator/s)")
+    if cache["actual"] is not None:
+        actual = cache["actual"]
+        mape = np.mean(np.abs(preds - actual) / np.maximum(np.abs(actual), np.finfo(float).eps)) * 100
+        status += f", MAPE: {mape:.2f}%"
+    yield status, result.head(PREVIEW_ROWS), plot_df, download_path
 
 
 with gr.Blocks(title="Energy Forecasting Demo") as demo:
@@ -76,9 +235,31 @@ with gr.Blocks(title="Energy Forecasting Demo") as demo:
     with gr.Tab("CSV upload (test_scaled.csv)"):
         gr.Markdown("test_scaled.csv ni upload qiling, qaysi qatordan olishni tanlang.")
         file_in = gr.File(label="CSV file")
+        csv_cache = gr.State(None)
         row_in = gr.Number(value=0, precision=0, label="row_index (0 dan boshlanadi)")
         out2 = gr.Textbox(label="Natija")
         btn2 = gr.Button("Predict from CSV row")
-        btn2.click(from_csv, inputs=[file_in, row_in], outputs=out2)
+        btn2.click(from_csv, inputs=[file_in, row_in, csv_cache], outputs=[out2, csv_cache])
+
+    with gr.Tab("Butun faylni baholash (batch)"):
+        gr.Markdown("Scaled feature'lar fayli (CSV / Parquet / Feather) bir marta o‘qiladi va "
+                    "`/predict_batch` ga batch'lar bilan parallel yuboriladi. "
+                    "`Datetime` va `PJME_MW` ustunlari bo‘lsa grafik va MAPE uchun ishlatiladi.")
+        file_all = gr.File(label="Fayl", file_types=[".csv", ".parquet", ".feather"])
+        file_info = gr.Markdown()
+        file_cache = gr.State(None)
+        with gr.Row():
+            batch_in = gr.Slider(100, 10000, value=BATCH_SIZE, step=100, label="Batch hajmi (qator)")
+            conc_in = gr.Slider(1, 16, value=MAX_CONCURRENCY, step=1, label="Parallel so‘rovlar")
+        btn3 = gr.Button("Butun faylni baholash")
+        status3 = gr.Markdown()
+        plot3 = gr.LinePlot(x="vaqt", y="MW", color="series", label="Bashorat vs haqiqiy")
+        table3 = gr.Dataframe(label=f"Bashoratlar (birinchi {PREVIEW_ROWS} qator)")
+        download3 = gr.File(label="To‘liq natija (CSV)")
+
+        file_all.upload(on_upload, inputs=file_all, outputs=[file_cache, file_info])
+        file_all.clear(lambda: (None, ""), outputs=[file_cache, file_info])
+        btn3.click(score_file, inputs=[file_cache, batch_in, conc_in],
+                   outputs=[status3, table3, plot3, download3])
 
 demo.launch(server_name="0.0.0.0", server_port=7860)
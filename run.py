@@ -1,21 +1,150 @@
 import os
 import sys
+import json
+import argparse
+from contextlib import nullcontext
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_percentage_error
 
 # Modullarni import qilish
+# sklearn / optuna / statsmodels / matplotlib kabi og'ir kutubxonalarni talab qiladigan modullar
+# shu bosqich haqiqatan ishga tushgandagina import qilinadi (tez start, --append rejimi va keshdan olish)
 from src.logger import logging_instance
+from src.artifacts import APPEND_PARTITION_PREFIX, FORMAT_EXTENSIONS, TARGET_COL, ArtifactStore, clear_partitions, \
+    list_partitions, load_partitions, load_tail
+from src.stage_cache import STAGES, StageCache, hash_file
 from src.ingestion import DataIngestor
-from src.feature_engineering import FeatureEngineer
-from src.feature_selection import FeatureSelector
-from src.model_trainer import train_base_models
-from src.tuner import run_all_tuning
-from src.ensemble import create_stacking_ensemble
+from src.feature_engineering import HISTORY_HOURS, FeatureEngineer
+from src.profiling import PipelineProfiler
 
-def main():
+# --profile-stage uchun: keshlanadigan bosqichlar + model eksporti, baholash va multi-series o'qitish
+PROFILE_STAGES = STAGES + ["export", "evaluation", "training"]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Energy forecasting training pipeline")
+    parser.add_argument("--force-from", choices=STAGES, default=None,
+                        help="Shu bosqich va undan keyingilarini keshdan qat'i nazar qayta hisoblash")
+    parser.add_argument("--no-cache", action="store_true", help="Bosqich keshini butunlay o'chirish")
+    parser.add_argument("--cache-dir", default=".cache/stages", help="Bosqich keshi papkasi")
+    parser.add_argument("--chunked-ingestion", action="store_true",
+                        help="Xom fayllarni bo'laklab (streaming) o'qish va oylik bo'laklar yozish")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="Chunked ingestion uchun qatorlar soni")
+    parser.add_argument("--fast-selection", action="store_true",
+                        help="VIF korrelyatsiya matritsasi inversiyasidan, MI subsample'da parallel")
+    parser.add_argument("--no-plots", action="store_true", help="Feature selection grafiklarini chizmaslik")
+    parser.add_argument("--parallel-tuning", action="store_true",
+                        help="Optuna study'larini process pool'da, pruning va early stopping bilan ishga tushirish")
+    parser.add_argument("--tuning-workers", type=int, default=None, help="Parallel tuning ishchilari soni")
+    parser.add_argument("--pruner", choices=["median", "hyperband", "none"], default="median")
+    parser.add_argument("--oof-stacking", action="store_true",
+                        help="Stacking'ni keshlangan vaqt tartibidagi OOF bashoratlaridan yig'ish (.cache/oof)")
+    parser.add_argument("--append", nargs=2, metavar=("ENERGY_CSV", "TEMP_CSV"), default=None,
+                        help="Faqat yangi soatlik qatorlarni qo'shish va xususiyatlar jadvalini kengaytirish (o'qitishsiz)")
+    parser.add_argument("--series", metavar="SERIES_JSON", default=None,
+                        help="Ko'p qatorli rejim: configs/series.json dagi barcha zonalar bitta jarayonda (models/series/<key>/)")
+    parser.add_argument("--publish", action="store_true",
+                        help="Yakuniy modelni models/registry/<versiya>/ ga e'lon qilish (API uni restartsiz oladi)")
+    parser.add_argument("--series-workers", type=int, default=None, help="Qatorlar bo'yicha parallel o'qitish ishchilari")
+    parser.add_argument("--profile", action="store_true",
+                        help="Bosqichlar wall/CPU vaqti va peak RSS hisoboti (models/profile_report.json)")
+    parser.add_argument("--profile-stage", choices=PROFILE_STAGES, default=None,
+                        help="Shu bosqichni cProfile bilan o'lchash (models/profile_<bosqich>.prof); --profile'ni yoqadi")
+    return parser.parse_args(argv)
+
+def profile_stage(profiler, name):
+    """Profiler yoqilgan bo'lsa bosqich o'lchovi, aks holda bo'sh kontekst."""
+    return profiler.stage(name) if profiler is not None else nullcontext({})
+
+def run_stage(cache, profiler, stage, fn, **kwargs):
+    """cache.run + profil yozuvi (bosqich keshdan olinganmi)."""
+    with profile_stage(profiler, stage) as record:
+        result = cache.run(stage, fn, **kwargs)
+        record["cached"] = cache.last_cached
+    return result
+
+def artifact_files(directory, name, fmt, csv_export):
+    """ArtifactStore.save yozadigan fayllar (asosiy format va ixtiyoriy CSV nusxasi)."""
+    extensions = {FORMAT_EXTENSIONS[fmt]} | ({FORMAT_EXTENSIONS["csv"]} if csv_export else set())
+    return [os.path.join(directory, f"{name}{ext}") for ext in sorted(extensions)]
+
+def selection_outputs(model_dir, plots_dir, make_plots):
+    """FeatureSelector.analyze_importance yozadigan fayllar: keshdan olinganda ular ham tiklanadi."""
+    files = [os.path.join(model_dir, "selected_features.json")]
+    if make_plots:
+        files += [os.path.join(plots_dir, "mi_importance.png"), os.path.join(plots_dir, "correlation_heatmap.png")]
+    return files
+
+def run_multi_series(args, cache, raw_temp, combined_dir, model_dir, config_path, artifact_format,
+                     csv_export, split_date, n_trials, processed_store, profiler=None):
+    """
+    Ko'p qatorli pipeline: har bir zona ingest qilinadi, xususiyatlar uzun jadvalda bitta
+    vektorlashgan o'tishda hisoblanadi, feature selection umumiy (API uchun yagona FEATURES tartibi),
+    modellar esa har bir qator uchun process pool'da parallel o'qitiladi.
+    """
+    from src.artifacts import SERIES_COL, SERIES_TARGET_COL
+    from src.multi_series import ingest_series, load_series_config, series_summary, train_all_series
+
+    series = load_series_config(args.series)
+    logging_instance.info(f"--- MULTI-SERIES PIPELINE: {[item['key'] for item in series]} ---")
+
+    combined_df, ingestion_key = run_stage(
+        cache, profiler, "ingestion",
+        lambda: ingest_series(series, raw_temp, combined_dir, fmt=artifact_format, csv_export=csv_export),
+        inputs=[hash_file(raw_temp)] + [hash_file(item["energy_path"]) for item in series],
+        code=[DataIngestor, "src.multi_series"], config={"series": series},
+        outputs=[path for item in series
+                 for path in artifact_files(os.path.join(combined_dir, item["key"]), "combined_data",
+                                            artifact_format, csv_export)],
+    )
+
+    engineer = FeatureEngineer(split_date=split_date, target_col=SERIES_TARGET_COL, series_col=SERIES_COL)
+    (train_df, test_df), features_key = run_stage(
+        cache, profiler, "features", lambda: engineer.run_feature_engineering(combined_df),
+        inputs=[ingestion_key], code=[FeatureEngineer],
+        config={"split_date": split_date, "spec": engineer.spec.to_dict(), "series": True},
+    )
+
+    series_model_dir = os.path.join(model_dir, "series")
+    series_plots_dir = os.path.join("plots", "series")
+    def select():
+        from src.feature_selection import FeatureSelector
+        selector = FeatureSelector(model_dir=series_model_dir, plots_dir=series_plots_dir,
+                                   fast=args.fast_selection, make_plots=not args.no_plots)
+        return selector.analyze_importance(train_df.drop(columns=[SERIES_TARGET_COL, SERIES_COL]),
+                                           train_df[SERIES_TARGET_COL])[0]
+
+    selected_features, _ = run_stage(
+        cache, profiler, "selection", select, inputs=[features_key], code=["src.feature_selection"],
+        config={"fast": args.fast_selection, "series": True},
+        outputs=selection_outputs(series_model_dir, series_plots_dir, not args.no_plots),
+    )
+
+    # Giperparametrlar: mavjud best_params.json, bo'lmasa birinchi qator bo'yicha tuning
+    if not os.path.exists(config_path):
+        with profile_stage(profiler, "tuning"):
+            from sklearn.preprocessing import StandardScaler
+            from src.tuner import run_all_tuning
+            first = train_df[train_df[SERIES_COL] == series[0]["key"]]
+            scaled = pd.DataFrame(StandardScaler().fit_transform(first[selected_features]),
+                                  columns=selected_features, index=first.index)
+            tuning_path = processed_store.save(pd.concat([scaled, first[SERIES_TARGET_COL]], axis=1),
+                                               "series_tuning_train")
+            run_all_tuning(tuning_path, config_path, n_trials=n_trials, target_col=SERIES_TARGET_COL)
+
+    with profile_stage(profiler, "training"):
+        results = train_all_series(train_df, test_df, selected_features, params_path=config_path,
+                                   model_dir=series_model_dir, n_workers=args.series_workers)
+
+    print("\n" + "="*65)
+    print("📊 MULTI-SERIES PIPELINE YAKUNLANDI. NATIJALAR:")
+    print(series_summary(results).to_string(index=False))
+    print(f"\n📂 Modellar '{series_model_dir}/<series>/' papkalarida saqlandi.")
+    print("="*65)
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiler = None
     try:
         # 1. KONFIGURATSIYA
         RAW_ENERGY = "data/raw/PJME_hourly.csv"
@@ -23,69 +152,214 @@ def main():
         COMBINED_DIR = "data/combined"
         PROCESSED_DIR = "data/processed"
         MODEL_DIR = "models"
+        PLOTS_DIR = "plots"
         CONFIG_PATH = "configs/best_params.json"
+        # Bosqichlar orasidagi artefaktlar formati: feather | parquet | csv
+        ARTIFACT_FORMAT = os.getenv("ARTIFACT_FORMAT", "feather")
+        # Qo'shimcha ravishda CSV nusxa ham yozilsinmi (demo / tashqi vositalar uchun)
+        CSV_EXPORT = os.getenv("CSV_EXPORT", "0") == "1"
+        SPLIT_DATE = '2017-01-01'
+        N_TRIALS = 15
         
         os.makedirs(MODEL_DIR, exist_ok=True)
         os.makedirs(PROCESSED_DIR, exist_ok=True)
         
         logging_instance.info("--- INTEGRATSIYALASHGAN PIPELINE BOSHLANDI ---")
 
+        # Profil rejimi: bosqichlar (va trial'lar / model fit'lari) vaqti va xotirasi models/ ga yoziladi
+        if args.profile or args.profile_stage:
+            profiler = PipelineProfiler(MODEL_DIR, profile_stage=args.profile_stage).activate()
+
+        # Bosqich keshi: kirish ma'lumoti + kod + konfiguratsiya o'zgarmasa natija diskdan olinadi
+        cache = StageCache(args.cache_dir, enabled=not args.no_cache, force_from=args.force_from)
+
         # 2. DATA INGESTION
-        ingestor = DataIngestor(RAW_ENERGY, RAW_TEMP, COMBINED_DIR)
-        ingestor.run_ingestion()
-        combined_path = os.path.join(COMBINED_DIR, "combined_data.csv")
-        combined_df = pd.read_csv(combined_path)
+        combined_store = ArtifactStore(COMBINED_DIR, fmt=ARTIFACT_FORMAT, csv_export=CSV_EXPORT)
+        processed_store = ArtifactStore(PROCESSED_DIR, fmt=ARTIFACT_FORMAT, csv_export=CSV_EXPORT)
+
+        COMBINED_PARTS_DIR = os.path.join(COMBINED_DIR, "combined_partitions")
+        FEATURES_PARTS_DIR = os.path.join(PROCESSED_DIR, "features_partitions")
+        features_store = ArtifactStore(FEATURES_PARTS_DIR, fmt=ARTIFACT_FORMAT)
+
+        ingestor = DataIngestor(RAW_ENERGY, RAW_TEMP, COMBINED_DIR, store=combined_store)
+        engineer = FeatureEngineer(split_date=SPLIT_DATE)
+
+        # APPEND REJIMI: soatlik yangilanish narxi faqat yangi qatorlar soniga bog'liq
+        if args.append:
+            new_rows = ingestor.append_new_data(*args.append, dataset_dir=COMBINED_PARTS_DIR)
+            if new_rows.empty:
+                print("ℹ️ Qo'shiladigan yangi qatorlar yo'q.")
+                return
+            context = load_tail(COMBINED_PARTS_DIR, HISTORY_HOURS + len(new_rows))
+            context = context[context.index < new_rows['Datetime'].min()]
+            new_features = engineer.extend_features(context, new_rows)
+            if not new_features.empty:
+                features_store.save(new_features,
+                                    f"{APPEND_PARTITION_PREFIX}{new_features.index.max().strftime('%Y%m%d%H')}")
+            print(f"✅ {len(new_rows)} ta yangi qator qo'shildi, {len(new_features)} ta xususiyat qatori yozildi.")
+            return
+
+        # MULTI-SERIES REJIMI: N ta zona uchun bitta ingestion, guruhlangan FE va parallel o'qitish
+        if args.series:
+            run_multi_series(args, cache, RAW_TEMP, COMBINED_DIR, MODEL_DIR, CONFIG_PATH, ARTIFACT_FORMAT,
+                             CSV_EXPORT, SPLIT_DATE, N_TRIALS, processed_store, profiler)
+            return
+
+        def ingest():
+            if not args.chunked_ingestion:
+                return ingestor.run_ingestion()
+            ingestor.run_ingestion_chunked(chunksize=args.chunksize)
+            # Xotira faqat ingestion ichida cheklangan: feature engineering butun tarixni bitta jadvalda oladi
+            return load_partitions(COMBINED_PARTS_DIR, appended=False).reset_index()
+
+        def ingestion_outputs():
+            if args.chunked_ingestion:
+                return list_partitions(COMBINED_PARTS_DIR, appended=False)
+            return artifact_files(COMBINED_DIR, "combined_data", combined_store.fmt, CSV_EXPORT)
+
+        # Asosiy bo'laklar bosqich yoki keshdan qayta yoziladi (append bo'laklari qoladi)
+        clear_partitions(COMBINED_PARTS_DIR, keep_appended=True)
+        combined_df, ingestion_key = run_stage(
+            cache, profiler, "ingestion", ingest,
+            inputs=[hash_file(RAW_ENERGY), hash_file(RAW_TEMP)], code=[DataIngestor],
+            config={"chunked": args.chunked_ingestion}, outputs=ingestion_outputs,
+        )
+        # --append bilan qo'shilgan qatorlar ham o'qitishga kiradi: keyingi bosqichlar kaliti ularga bog'lanadi
+        combined_df, appended_parts = ingestor.merge_appended(combined_df, COMBINED_PARTS_DIR)
+        if appended_parts:
+            ingestion_key = cache.key("ingestion", inputs=[ingestion_key] + [hash_file(p) for p in appended_parts])
 
         # 3. FEATURE ENGINEERING
-        engineer = FeatureEngineer(split_date='2017-01-01')
-        train_df, test_df = engineer.run_feature_engineering(combined_df)
+        (train_df, test_df), features_key = run_stage(
+            cache, profiler, "features", lambda: engineer.run_feature_engineering(combined_df),
+            inputs=[ingestion_key], code=[FeatureEngineer],
+            config={"split_date": SPLIT_DATE, "spec": engineer.spec.to_dict()},
+        )
+        # Model qaysi xususiyatlar ta'rifida o'qitilganini saqlash
+        with open(os.path.join(MODEL_DIR, "feature_spec.json"), 'w') as f:
+            json.dump(engineer.spec.to_dict(), f, indent=4)
+        # To'liq xususiyatlar jadvali (append rejimi shu jadvalni kengaytiradi)
+        features_df = pd.concat([train_df, test_df])
+        clear_partitions(FEATURES_PARTS_DIR)
+        features_store.save(features_df, f"part-{features_df.index.max().strftime('%Y%m')}")
 
         # 4. FEATURE SELECTION
-        X_selector = train_df.drop(columns=['PJME_MW'])
-        y_selector = train_df['PJME_MW']
+        X_selector = train_df.drop(columns=[TARGET_COL])
+        y_selector = train_df[TARGET_COL]
         
-        selector = FeatureSelector()
-        selected_features, _ = selector.analyze_importance(X_selector, y_selector)
+        def select():
+            from src.feature_selection import FeatureSelector
+            selector = FeatureSelector(model_dir=MODEL_DIR, plots_dir=PLOTS_DIR, fast=args.fast_selection,
+                                       make_plots=not args.no_plots)
+            return selector.analyze_importance(X_selector, y_selector)[0]
+
+        selected_features, selection_key = run_stage(
+            cache, profiler, "selection", select,
+            inputs=[features_key], code=["src.feature_selection"],
+            config={"fast": args.fast_selection},
+            outputs=selection_outputs(MODEL_DIR, PLOTS_DIR, not args.no_plots),
+        )
         
         # Tanlangan feature'larni saqlash (Keyinchalik prediction uchun kerak)
         joblib.dump(selected_features, os.path.join(MODEL_DIR, "selected_features.pkl"))
         logging_instance.info(f"Tanlangan xususiyatlar saqlandi: {len(selected_features)} ta")
 
         # 5. DATA PREPARATION & SCALING
-        X_train = train_df[selected_features]
-        y_train = train_df['PJME_MW']
-        X_test = test_df[selected_features]
-        y_test = test_df['PJME_MW']
-
-        scaler = StandardScaler()
-        X_train_scaled = pd.DataFrame(scaler.fit_transform(X_train), columns=selected_features, index=X_train.index)
-        X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=selected_features, index=X_test.index)
-        
-        # Scalerni saqlash
-        joblib.dump(scaler, os.path.join(MODEL_DIR, "scaler.pkl"))
+        with profile_stage(profiler, "scaling"):
+            X_train = train_df[selected_features]
+            y_train = train_df[TARGET_COL]
+            X_test = test_df[selected_features]
+            y_test = test_df[TARGET_COL]
 
-        # Fayllarni saqlash (Base trainer o'qishi uchun)
-        train_path_scaled = os.path.join(PROCESSED_DIR, "train_scaled.csv")
-        test_path_scaled = os.path.join(PROCESSED_DIR, "test_scaled.csv")
-        pd.concat([X_train_scaled, y_train], axis=1).to_csv(train_path_scaled)
-        pd.concat([X_test_scaled, y_test], axis=1).to_csv(test_path_scaled)
+            from sklearn.preprocessing import StandardScaler
+            scaler = StandardScaler()
+            X_train_scaled = pd.DataFrame(scaler.fit_transform(X_train), columns=selected_features, index=X_train.index)
+            X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=selected_features, index=X_test.index)
+
+            # Scalerni saqlash
+            joblib.dump(scaler, os.path.join(MODEL_DIR, "scaler.pkl"))
+
+            # Fayllarni saqlash (Base trainer va tuner memory-map orqali o'qiydi)
+            train_path_scaled = processed_store.save(pd.concat([X_train_scaled, y_train], axis=1), "train_scaled")
+            # test_scaled.csv doim yoziladi: Gradio demo va README shu faylga tayanadi
+            test_path_scaled = processed_store.save(pd.concat([X_test_scaled, y_test], axis=1), "test_scaled",
+                                                    csv_export=True)
+
+            # Stacking va baholash ham diskdagi (float32) freymlardan foydalanadi:
+            # tuning va yakuniy model bir xil kirish ma'lumotini ko'radi
+            train_scaled = processed_store.load("train_scaled")
+            test_scaled = processed_store.load("test_scaled")
+            X_train_scaled, y_train = train_scaled[selected_features], train_scaled[TARGET_COL]
+            X_test_scaled, y_test = test_scaled[selected_features], test_scaled[TARGET_COL]
+        # Scaling arzon, shuning uchun keshlanmaydi; kalit faqat keyingi bosqichlar uchun
+        scaling_key = cache.key("scaling", inputs=[features_key, selection_key])
 
         # 6. BASE MODELS & TUNING
-        base_results = train_base_models(train_path_scaled, test_path_scaled)
-        run_all_tuning(train_path_scaled, CONFIG_PATH)
+        def train_baseline():
+            from src.model_trainer import train_base_models
+            return train_base_models(train_path_scaled, test_path_scaled)
+
+        base_results, _ = run_stage(
+            cache, profiler, "baseline", train_baseline,
+            inputs=[scaling_key], code=["src.model_trainer"],
+        )
+        def tune():
+            from src.tuner import run_all_tuning, run_all_tuning_parallel
+            if not args.parallel_tuning:
+                return run_all_tuning(train_path_scaled, CONFIG_PATH, n_trials=N_TRIALS)
+            # Study nomi ma'lumot kalitiga bog'langan: boshqa ma'lumotdagi eski study davom ettirilmaydi
+            return run_all_tuning_parallel(train_path_scaled, CONFIG_PATH, n_trials=N_TRIALS,
+                                           n_workers=args.tuning_workers, pruner=args.pruner,
+                                           study_prefix=f"energy-{scaling_key}")
+
+        best_params, tuning_key = run_stage(
+            cache, profiler, "tuning", tune,
+            inputs=[scaling_key], code=["src.tuner"],
+            config={"n_trials": N_TRIALS, "parallel": args.parallel_tuning, "pruner": args.pruner},
+        )
+        # Keshdan olinganda ham ensemble shu fayldan o'qiydi
+        os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
+        with open(CONFIG_PATH, 'w') as f:
+            json.dump(best_params, f, indent=4)
 
         # 7. STACKING ENSEMBLE
-        stack_model = create_stacking_ensemble(CONFIG_PATH)
-        logging_instance.info("Kuchaytirilgan Stacking Ensemble o'qitilmoqda...")
-        stack_model.fit(X_train_scaled, y_train)
+        def fit_stacking():
+            from src.ensemble import build_oof_stacking_ensemble, create_stacking_ensemble
+            if args.oof_stacking:
+                return build_oof_stacking_ensemble(X_train_scaled, y_train, CONFIG_PATH)
+            model = create_stacking_ensemble(CONFIG_PATH)
+            logging_instance.info("Kuchaytirilgan Stacking Ensemble o'qitilmoqda...")
+            model.fit(X_train_scaled, y_train)
+            return model
+
+        stack_model, _ = run_stage(
+            cache, profiler, "stacking", fit_stacking,
+            inputs=[scaling_key, tuning_key], code=["src.ensemble"],
+            config={"params": best_params, "oof": args.oof_stacking},
+        )
         
         # Yakuniy modelni saqlash
-        joblib.dump(stack_model, os.path.join(MODEL_DIR, "final_stacking_model.pkl"))
-        logging_instance.info(f"Model '{MODEL_DIR}/' papkasiga saqlandi.")
+        with profile_stage(profiler, "export"):
+            joblib.dump(stack_model, os.path.join(MODEL_DIR, "final_stacking_model.pkl"))
+            logging_instance.info(f"Model '{MODEL_DIR}/' papkasiga saqlandi.")
+
+            # API uchun yengil inference bundle (sklearn'siz predict)
+            from src.inference_bundle import export_inference_bundle
+            export_inference_bundle(stack_model, os.path.join(MODEL_DIR, "inference_bundle"))
+
+            if args.publish:
+                from src.model_registry import publish_model_version
+                version = publish_model_version(
+                    [os.path.join(MODEL_DIR, name) for name in
+                     ("final_stacking_model.pkl", "inference_bundle", "scaler.pkl", "selected_features.pkl", "feature_spec.json")],
+                    os.path.join(MODEL_DIR, "registry"))
+                print(f"🚀 Model versiyasi e'lon qilindi: {version}")
 
         # 8. NATIJALARNI HISOBLASH
-        stack_preds = stack_model.predict(X_test_scaled)
-        stack_mape = mean_absolute_percentage_error(y_test, stack_preds) * 100
+        with profile_stage(profiler, "evaluation"):
+            from sklearn.metrics import mean_absolute_percentage_error
+            stack_preds = stack_model.predict(X_test_scaled)
+            stack_mape = mean_absolute_percentage_error(y_test, stack_preds) * 100
 
         # NATIJALARNI SOLISHTIRISH
         comparison = []
@@ -102,6 +376,12 @@ def main():
     except Exception as e:
         logging_instance.error(f"Pipeline xatosi: {str(e)}")
         sys.exit(1)
+    finally:
+        # Xato bilan tugagan run ham hisobotga tushadi (qaysi bosqichda to'xtagani ko'rinadi)
+        if profiler is not None:
+            profiler.deactivate()
+            report_path = profiler.save(argv)
+            print(f"⏱️ Profil hisoboti: {report_path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+import pandas as pd
+from src.logger import logging_instance
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+DATETIME_COL = "Datetime"
+TARGET_COL = "PJME_MW"
+# Ko'p qatorli (multi-series) uzun format: har bir qator kaliti va umumiy yuklama ustuni
+SERIES_COL = "series"
+SERIES_TARGET_COL = "load_MW"
+TARGET_COLS = (TARGET_COL, SERIES_TARGET_COL)
+
+FORMAT_EXTENSIONS = {"feather": ".feather", "parquet": ".parquet", "csv": ".csv"}
+# Append rejimida qo'shilgan bo'laklar: xom fayllarda yo'q, shuning uchun to'liq qayta ingestion ularni o'chirmaydi
+APPEND_PARTITION_PREFIX = "part-append-"
+
+
+def optimize_dtypes(df, keep_float64=TARGET_COLS):
+    """Xususiyatlarni float32 ga, butun sonlarni eng kichik int turiga o'tkazadi (target float64 qoladi)."""
+    df = df.copy()
+    for col in df.columns:
+        if col in keep_float64:
+            continue
+        if pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def save_frame(df, path, optimize=True):
+    """DataFrame'ni kengaytmasiga qarab Feather/Parquet/CSV formatida saqlaydi."""
+    ext = os.path.splitext(path)[1].lower()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Datetime indeksi oddiy ustun sifatida yoziladi
+    if df.index.name == DATETIME_COL:
+        df = df.reset_index()
+    if DATETIME_COL in df.columns:
+        df[DATETIME_COL] = pd.to_datetime(df[DATETIME_COL])
+    if optimize:
+        df = optimize_dtypes(df)
+
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+    elif not HAS_ARROW:
+        raise ImportError(f"{ext} formati uchun pyarrow o'rnatilmagan")
+    elif ext in (".feather", ".arrow"):
+        # Siqilmagan Feather memory-map bilan nusxasiz o'qiladi
+        feather.write_feather(df, path, compression="uncompressed")
+    elif ext == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Noma'lum artefakt formati: {path}")
+    return path
+
+
+def load_frame(path, columns=None, memory_map=True):
+    """
+    Artefaktni o'qiydi va 'Datetime' ustuni bo'lsa uni datetime64 indeksga aylantiradi.
+    Feather fayllar memory-map orqali o'qiladi: ustunlar sahifalab yuklanadi.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if columns is not None and DATETIME_COL not in columns:
+        columns = [DATETIME_COL] + list(columns)
+
+    if ext == ".csv":
+        header = pd.read_csv(path, nrows=0).columns
+        usecols = [c for c in columns if c in header] if columns is not None else None
+        df = pd.read_csv(path, usecols=usecols,
+                         parse_dates=[DATETIME_COL] if DATETIME_COL in header else False)
+    elif not HAS_ARROW:
+        raise ImportError(f"{ext} formati uchun pyarrow o'rnatilmagan")
+    elif ext in (".feather", ".arrow"):
+        table = feather.read_table(path, memory_map=memory_map)
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+    elif ext == ".parquet":
+        schema = pq.read_schema(path)
+        cols = [c for c in columns if c in schema.names] if columns is not None else None
+        df = pq.read_table(path, columns=cols, memory_map=memory_map).to_pandas(split_blocks=True, self_destruct=True)
+    else:
+        raise ValueError(f"Noma'lum artefakt formati: {path}")
+
+    if DATETIME_COL in df.columns:
+        df = df.set_index(DATETIME_COL)
+    return df
+
+
+def list_partitions(directory, appended=None):
+    """
+    Bo'lakli dataset fayllari (part-*), nomi bo'yicha xronologik tartibda (append bo'laklari oxirida).
+    appended=True - faqat append bo'laklari, False - faqat asosiy bo'laklar, None - hammasi.
+    """
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+             if name.startswith("part-") and os.path.splitext(name)[1].lower() in (".feather", ".arrow", ".parquet", ".csv")]
+    if appended is None:
+        return paths
+    return [path for path in paths if os.path.basename(path).startswith(APPEND_PARTITION_PREFIX) == appended]
+
+
+def clear_partitions(directory, keep_appended=False):
+    """Bo'lakli datasetni tozalaydi (to'liq qayta yozishdan oldin); keep_appended - append bo'laklari qoladi."""
+    for path in list_partitions(directory, appended=False if keep_appended else None):
+        os.remove(path)
+
+
+def load_partitions(directory, columns=None, appended=None):
+    """Bo'lakli datasetni bitta DataFrame qilib o'qiydi (appended - list_partitions'dagi kabi)."""
+    parts = [load_frame(path, columns=columns) for path in list_partitions(directory, appended=appended)]
+    if not parts:
+        raise FileNotFoundError(f"Bo'laklar topilmadi: {directory}")
+    return pd.concat(parts).sort_index()
+
+
+def load_tail(directory, n_rows, columns=None):
+    """Bo'lakli datasetning oxirgi n_rows qatori: faqat oxirgi kerakli bo'laklar o'qiladi."""
+    parts, total = [], 0
+    for path in reversed(list_partitions(directory)):
+        part = load_frame(path, columns=columns)
+        parts.append(part)
+        total += len(part)
+        if total >= n_rows:
+            break
+    if not parts:
+        raise FileNotFoundError(f"Bo'laklar topilmadi: {directory}")
+    return pd.concat(parts[::-1]).sort_index().tail(n_rows)
+
+
+class ArtifactStore:
+    """
+    Pipeline bosqichlari orasidagi oraliq natijalar uchun ombor.
+    Asosiy format Feather (yoki Parquet), CSV esa ixtiyoriy eksport sifatida yoziladi.
+    """
+
+    def __init__(self, base_dir, fmt="feather", csv_export=False):
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Format {list(FORMAT_EXTENSIONS)} dan biri bo'lishi kerak: {fmt}")
+        if fmt != "csv" and not HAS_ARROW:
+            logging_instance.warning("pyarrow topilmadi, artefaktlar CSV formatida saqlanadi.")
+            fmt = "csv"
+        self.base_dir = base_dir
+        self.fmt = fmt
+        self.csv_export = csv_export
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def path(self, name, fmt=None):
+        return os.path.join(self.base_dir, f"{name}{FORMAT_EXTENSIONS[fmt or self.fmt]}")
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def save(self, df, name, csv_export=None):
+        """csv_export=None bo'lsa ombor sozlamasi ishlatiladi; True ayrim artefaktlar uchun CSV nusxasini majburlaydi."""
+        path = save_frame(df, self.path(name))
+        if csv_export is None:
+            csv_export = self.csv_export
+        if csv_export and self.fmt != "csv":
+            save_frame(df, self.path(name, "csv"), optimize=False)
+        logging_instance.info(f"Artefakt saqlandi: {path}")
+        return path
+
+    def load(self, name, columns=None, memory_map=True):
+        return load_frame(self.path(name), columns=columns, memory_map=memory_map)
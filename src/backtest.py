@@ -0,0 +1,250 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.logger import logging_instance
+from src.artifacts import TARGET_COL, load_partitions
+
+FEATURES_PARTS_DIR = "data/processed/features_partitions"
+SELECTED_FEATURES_PATH = "models/selected_features.pkl"
+BACKTEST_DIR = "reports/backtest"
+# Bazaviy model nomlari: ensemble._base_learners dagi qisqa nomlar
+LEARNERS = ("lgbm", "xgb", "rf", "stacking")
+# Warm-start: keyingi fold'da qo'shiladigan daraxtlar ulushi (to'liq n_estimators'ga nisbatan)
+WARM_START_FRACTION = 0.2
+
+
+def make_folds(index, n_folds, horizon, step=None, window="expanding", train_hours=None, min_train_hours=24 * 90):
+    """
+    Rolling-origin fold'lari: oxirgi fold ma'lumot oxirida tugaydi, origin'lar `step` soatdan siljiydi.
+    window='expanding' - train boshidan origin'gacha; 'sliding' - origin'dan oldingi train_hours soat.
+    return: [{"fold", "train": (i0, i1), "test": (j0, j1)}] - qator indekslari (yarim ochiq oraliqlar)
+    """
+    if window not in ("expanding", "sliding"):
+        raise ValueError(f"window 'expanding' yoki 'sliding' bo'lishi kerak: {window}")
+    if window == "sliding" and not train_hours:
+        raise ValueError("sliding oyna uchun train_hours kerak")
+    step = step or horizon
+
+    times = index.values.astype("datetime64[h]")
+    end = times[-1] + np.timedelta64(1, "h")
+    folds = []
+    for k in range(n_folds):
+        origin = end - np.timedelta64(horizon + (n_folds - 1 - k) * step, "h")
+        train_start = times[0] if window == "expanding" else origin - np.timedelta64(train_hours, "h")
+        i0, i1 = np.searchsorted(times, [train_start, origin])
+        j0, j1 = np.searchsorted(times, [origin, origin + np.timedelta64(horizon, "h")])
+        if i1 - i0 < min_train_hours or j1 <= j0:
+            logging_instance.warning(f"Fold {k} o'tkazib yuborildi: train {i1 - i0} / test {j1 - j0} qator")
+            continue
+        folds.append({"fold": k, "train": (int(i0), int(i1)), "test": (int(j0), int(j1))})
+    return folds
+
+
+def _make_model(learner, params_path, n_jobs):
+    from src.ensemble import _base_learners, _load_best_params, create_stacking_ensemble
+    if learner == "stacking":
+        model = create_stacking_ensemble(params_path)
+        model.set_params(n_jobs=1, **{f"{name}__n_jobs": n_jobs for name, _ in model.estimators})
+        return model
+    learners = dict(_base_learners(_load_best_params(params_path)))
+    if learner not in learners:
+        raise ValueError(f"'{learner}' o'rnatilmagan yoki noma'lum: {list(learners)}")
+    return learners[learner].set_params(n_jobs=n_jobs)
+
+
+def _warm_fit(model, previous, X, y):
+    """Oldingi fold modelidan davom ettirib o'qitish (boosterlarga qo'shimcha daraxtlar, RF'ga yangi daraxtlar)."""
+    n_estimators = model.get_params()["n_estimators"]
+    extra = max(1, int(n_estimators * WARM_START_FRACTION))
+    name = type(model).__name__
+    if name == "LGBMRegressor":
+        return model.set_params(n_estimators=extra).fit(X, y, init_model=previous.booster_)
+    if name == "XGBRegressor":
+        return model.set_params(n_estimators=extra).fit(X, y, xgb_model=previous.get_booster())
+    if name == "RandomForestRegressor":
+        previous.set_params(warm_start=True, n_estimators=previous.n_estimators + extra)
+        return previous.fit(X, y)
+    return model.fit(X, y)
+
+
+def _run_chain(arrays_dir, folds, learner, params_path, n_jobs, warm_start):
+    """
+    Process pool ishchisi: ketma-ket fold'lar zanjiri. Feature matritsasi .npy'dan memory-map
+    qilinadi (faqat o'qish uchun, nusxa har bir jarayonga pickle qilinmaydi); warm_start bo'lsa
+    zanjirdagi har bir fold oldingisining modelidan davom etadi.
+    """
+    from src.evaluate_step0 import metrics
+
+    X = np.load(os.path.join(arrays_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(arrays_dir, "y.npy"), mmap_mode="r")
+    times = np.load(os.path.join(arrays_dir, "times.npy"), mmap_mode="r")
+
+    rows, predictions, previous = [], [], None
+    for fold in folds:
+        (i0, i1), (j0, j1) = fold["train"], fold["test"]
+        start = time.perf_counter()
+        model = _make_model(learner, params_path, n_jobs)
+        warm = warm_start and previous is not None and learner != "stacking"
+        if warm:
+            model = _warm_fit(model, previous, X[i0:i1], y[i0:i1])
+        else:
+            model.fit(X[i0:i1], y[i0:i1])
+        fit_s = time.perf_counter() - start
+
+        preds = model.predict(X[j0:j1])
+        predictions.append((fold["fold"], j0, np.asarray(preds, dtype=np.float64)))
+        rows.append({
+            "fold": fold["fold"],
+            "train_start": pd.Timestamp(times[i0]),
+            "train_end": pd.Timestamp(times[i1 - 1]),
+            "test_start": pd.Timestamp(times[j0]),
+            "test_end": pd.Timestamp(times[j1 - 1]),
+            "n_train": i1 - i0,
+            "n_test": j1 - j0,
+            "warm_start": warm,
+            "fit_s": round(fit_s, 3),
+            **metrics(y[j0:j1], preds),
+        })
+        previous = model
+    return rows, predictions
+
+
+def _chains(folds, n_chains):
+    """Fold'larni n_chains ta ketma-ket zanjirga bo'ladi (warm-start zanjir ichida ishlaydi)."""
+    return [chain.tolist() for chain in np.array_split(np.array(folds, dtype=object), n_chains) if len(chain)]
+
+
+def run_backtest(features_df, features, n_folds=12, horizon=24 * 30, step=None, window="expanding",
+                 train_hours=None, learner="lgbm", params_path="configs/best_params.json", n_workers=None,
+                 warm_start=False, target_col=TARGET_COL, work_dir=None, return_predictions=False):
+    """
+    Rolling-origin backtest. Feature matritsasi bir marta float32 .npy ga yoziladi va barcha
+    ishchilar uni memory-map qiladi. Warm-start o'chirilgan bo'lsa har bir fold alohida vazifa;
+    yoqilgan bo'lsa fold'lar n_workers ta ketma-ket zanjirga bo'linadi.
+    Daraxt modellari masshtabga befarq, shuning uchun fold'lar ichida scaler ishlatilmaydi.
+    return: fold'lar bo'yicha metrikalar jadvali; return_predictions=True bo'lsa
+    (jadval, test bashoratlari: Datetime indeksli fold, y_true, y_pred)
+    """
+    try:
+        if learner not in LEARNERS:
+            raise ValueError(f"learner {LEARNERS} dan biri bo'lishi kerak: {learner}")
+        df = features_df.sort_index()
+        folds = make_folds(df.index, n_folds, horizon, step, window, train_hours)
+        if not folds:
+            raise ValueError("Birorta ham fold hosil bo'lmadi (ma'lumot juda qisqa)")
+
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(folds)))
+        # Har bir fold ichidagi model yadrolarni ishchilar bilan bo'lishadi
+        n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+
+        work_dir = tempfile.mkdtemp(prefix="backtest-", dir=work_dir)
+        try:
+            np.save(os.path.join(work_dir, "X.npy"), np.ascontiguousarray(df[features].to_numpy(dtype=np.float32)))
+            np.save(os.path.join(work_dir, "y.npy"), df[target_col].to_numpy(dtype=np.float64))
+            np.save(os.path.join(work_dir, "times.npy"), df.index.values.astype("datetime64[ns]"))
+
+            tasks = _chains(folds, n_workers) if warm_start else [[fold] for fold in folds]
+            logging_instance.info(f"--- BACKTEST: {len(folds)} fold ({window}, horizon={horizon}h), "
+                                  f"learner={learner}, {n_workers} ishchi, {len(tasks)} vazifa ---")
+
+            rows, predictions = [], []
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = [pool.submit(_run_chain, work_dir, chain, learner, params_path, n_jobs, warm_start)
+                           for chain in tasks]
+                for future in futures:
+                    chain_rows, chain_preds = future.result()
+                    predictions += chain_preds
+                    for row in chain_rows:
+                        rows.append(row)
+                        logging_instance.info(f"[fold {row['fold']}] {row['test_start']:%Y-%m-%d} - "
+                                              f"MAPE {row['MAPE(%)']:.2f}%, fit {row['fit_s']:.1f}s")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        table = pd.DataFrame(rows).sort_values("fold").reset_index(drop=True)
+        if not return_predictions:
+            return table
+
+        y = df[target_col].to_numpy()
+        frames = [pd.DataFrame({"fold": fold, target_col: y[j0:j0 + len(preds)], "y_pred": preds},
+                               index=df.index[j0:j0 + len(preds)]) for fold, j0, preds in predictions]
+        return table, pd.concat(frames).sort_values("fold", kind="stable")
+
+    except Exception as e:
+        logging_instance.error(f"Backtest xatosi: {str(e)}")
+        raise e
+
+
+def summarize(table):
+    """Fold'lar bo'yicha o'rtacha/median/eng yomon metrikalar."""
+    cols = ["MAPE(%)", "MAE", "RMSE"]
+    return table[cols].agg(["mean", "median", "std", "max"]).round(3)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest")
+    parser.add_argument("--features-dir", default=FEATURES_PARTS_DIR, help="run.py yozgan xususiyatlar bo'laklari")
+    parser.add_argument("--selected-features", default=SELECTED_FEATURES_PATH,
+                        help="Xususiyatlar ro'yxati (.pkl); fayl bo'lmasa target'dan boshqa barcha ustunlar")
+    parser.add_argument("--params", default="configs/best_params.json")
+    parser.add_argument("--folds", type=int, default=12)
+    parser.add_argument("--horizon", type=int, default=24 * 30, help="Test oynasi (soat)")
+    parser.add_argument("--step", type=int, default=None, help="Origin'lar orasidagi qadam (soat), default=horizon")
+    parser.add_argument("--window", choices=["expanding", "sliding"], default="expanding")
+    parser.add_argument("--train-hours", type=int, default=None, help="sliding oyna uzunligi (soat)")
+    parser.add_argument("--learner", choices=LEARNERS, default="lgbm")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--warm-start", action="store_true", help="Har bir fold oldingi fold modelidan davom etadi")
+    parser.add_argument("--slices", nargs="*", default=None,
+                        help="Fold'lar bo'yicha slice metrikalari (src.slice_metrics): masalan hour dayofweek month temp "
+                             "hour,dayofweek (vergul - kesishma)")
+    parser.add_argument("--output", default=os.path.join(BACKTEST_DIR, "folds.csv"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    df = load_partitions(args.features_dir)
+    if os.path.exists(args.selected_features):
+        features = list(joblib.load(args.selected_features))
+    else:
+        features = [c for c in df.columns if c != TARGET_COL]
+
+    start = time.perf_counter()
+    result = run_backtest(df, features, n_folds=args.folds, horizon=args.horizon, step=args.step,
+                          window=args.window, train_hours=args.train_hours, learner=args.learner,
+                          params_path=args.params, n_workers=args.workers, warm_start=args.warm_start,
+                          return_predictions=args.slices is not None)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    table = result[0] if args.slices is not None else result
+    table.to_csv(args.output, index=False)
+
+    if args.slices is not None:
+        from src.slice_metrics import calendar_keys, evaluate_slices
+        preds = result[1]
+        temp = df.loc[preds.index, "Temp_K"].to_numpy() if "Temp_K" in df.columns else None
+        keys = {**calendar_keys(preds.index, temp), "fold": preds["fold"].to_numpy()}
+        # Har bir slice fold kesimida ham: fold x <slice>
+        specs = ["fold"] + [("fold", *s.split(",")) for s in args.slices]
+        slice_table = evaluate_slices(preds[TARGET_COL], {args.learner: preds["y_pred"]}, keys, slices=specs)
+        slices_path = os.path.join(os.path.dirname(args.output) or ".", "slices.csv")
+        slice_table.to_csv(slices_path, index=False)
+        print(f"Slice jadvali: {slices_path} ({len(slice_table)} qator)")
+
+    print("\n================ ROLLING-ORIGIN BACKTEST ================\n")
+    print(table.to_string(index=False))
+    print("\n" + summarize(table).to_string())
+    print(f"\n{len(table)} fold, {elapsed:.1f}s. Jadval: {args.output}")
+    print("\n=========================================================\n")
+
+
+if __name__ == "__main__":
+    main()
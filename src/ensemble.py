@@ -1,9 +1,15 @@
+import hashlib
 import json
 import os
+import joblib
+import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import StackingRegressor, RandomForestRegressor
 from sklearn.linear_model import RidgeCV
+from sklearn.model_selection import TimeSeriesSplit
 from src.logger import logging_instance
+from src.profiling import profile_section
 
 try:
     from xgboost import XGBRegressor
@@ -17,16 +23,15 @@ try:
 except ImportError:
     HAS_LGBM = False
 
-def create_stacking_ensemble(params_path="configs/best_params.json"):
+def _load_best_params(params_path):
     if not os.path.exists(params_path):
         logging_instance.error(f"Parametrlar fayli topilmadi: {params_path}")
         raise FileNotFoundError(f"{params_path} mavjud emas!")
 
     with open(params_path, 'r') as f:
-        best_params = json.load(f)
-
-    logging_instance.info("Stacking Ensemble uchun bazaviy modellar yig'ilmoqda...")
+        return json.load(f)
 
+def _base_learners(best_params):
     # Bazaviy o'rganuvchilar
     base_learners = []
     
@@ -37,6 +42,14 @@ def create_stacking_ensemble(params_path="configs/best_params.json"):
         base_learners.append(('xgb', XGBRegressor(**best_params['XGBoost'])))
         
     base_learners.append(('rf', RandomForestRegressor(**best_params['RandomForest'])))
+    return base_learners
+
+def create_stacking_ensemble(params_path="configs/best_params.json"):
+    best_params = _load_best_params(params_path)
+
+    logging_instance.info("Stacking Ensemble uchun bazaviy modellar yig'ilmoqda...")
+
+    base_learners = _base_learners(best_params)
 
     # Stacking modeli
     stack_model = StackingRegressor(
@@ -46,4 +59,92 @@ def create_stacking_ensemble(params_path="configs/best_params.json"):
         n_jobs=-1
     )
 
-    return stack_model
\ No newline at end of file
+    return stack_model
+
+
+class OOFStackingRegressor:
+    """
+    Keshlangan OOF bashoratlaridan yig'ilgan stacking modeli. Atributlari StackingRegressor
+    bilan mos (estimators, estimators_, final_estimator_), shuning uchun API va
+    export_inference_bundle uni xuddi shunday ishlatadi.
+    """
+
+    def __init__(self, estimators, estimators_, final_estimator_, feature_names_in_=None):
+        self.estimators = estimators
+        self.estimators_ = estimators_
+        self.named_estimators_ = dict(zip([name for name, _ in estimators], estimators_))
+        self.final_estimator_ = final_estimator_
+        self.passthrough = False
+        self.n_features_in_ = len(feature_names_in_) if feature_names_in_ is not None else None
+        if feature_names_in_ is not None:
+            self.feature_names_in_ = np.asarray(feature_names_in_, dtype=object)
+
+    def transform(self, X):
+        return np.column_stack([est.predict(X) for est in self.estimators_])
+
+    def predict(self, X):
+        return self.final_estimator_.predict(self.transform(X))
+
+
+def _learner_key(name, estimator, data_key, n_splits):
+    payload = json.dumps({"name": name, "type": type(estimator).__name__, "params": estimator.get_params(),
+                          "data": data_key, "n_splits": n_splits}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _oof_for_learner(estimator, X, y, n_splits):
+    """Vaqt tartibidagi OOF bashoratlari: birinchi fold'gacha bo'lgan qatorlar NaN qoladi."""
+    oof = np.full(len(X), np.nan)
+    for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        model = clone(estimator).fit(X.iloc[train_idx], y.iloc[train_idx])
+        oof[val_idx] = model.predict(X.iloc[val_idx])
+    return oof
+
+def build_oof_stacking_ensemble(X, y, params_path="configs/best_params.json", cache_dir=".cache/oof", n_splits=5):
+    """
+    Har bir bazaviy model uchun OOF bashoratlarini bir marta hisoblab diskka keshlaydi va
+    RidgeCV meta-learner'ni keshlangan OOF matritsasidan o'qitadi. Bitta model almashsa
+    yoki qayta tuning qilinsa faqat o'sha modelning ustuni qayta hisoblanadi.
+    """
+    try:
+        best_params = _load_best_params(params_path)
+        base_learners = _base_learners(best_params)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        digest = hashlib.sha256(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+        digest.update(pd.util.hash_pandas_object(y, index=True).values.tobytes())
+        digest.update(json.dumps(list(map(str, X.columns))).encode())
+        data_key = digest.hexdigest()
+
+        oof_columns, fitted = [], []
+        for name, estimator in base_learners:
+            key = _learner_key(name, estimator, data_key, n_splits)
+            oof_path = os.path.join(cache_dir, f"{name}-{key}.npy")
+            model_path = os.path.join(cache_dir, f"{name}-{key}.pkl")
+
+            if os.path.exists(oof_path) and os.path.exists(model_path):
+                logging_instance.info(f"[oof] {name}: OOF va to'liq model keshdan olindi ({key}).")
+                oof = np.load(oof_path)
+                model = joblib.load(model_path)
+            else:
+                logging_instance.info(f"[oof] {name}: {n_splits} fold OOF + to'liq fit hisoblanmoqda...")
+                with profile_section(f"{name}/oof", kind="base_learner_fit", folds=n_splits):
+                    oof = _oof_for_learner(estimator, X, y, n_splits)
+                with profile_section(f"{name}/fit", kind="base_learner_fit"):
+                    model = clone(estimator).fit(X, y)
+                np.save(oof_path, oof)
+                joblib.dump(model, model_path)
+
+            oof_columns.append(oof)
+            fitted.append(model)
+
+        # Meta-learner faqat barcha modellar uchun OOF bor qatorlarda o'qitiladi
+        oof_matrix = np.column_stack(oof_columns)
+        mask = ~np.isnan(oof_matrix).any(axis=1)
+        meta = RidgeCV().fit(oof_matrix[mask], np.asarray(y)[mask])
+        logging_instance.info(f"[oof] Meta-learner {mask.sum()} ta OOF qatorda o'qitildi. Koeff: {np.round(meta.coef_, 3)}")
+
+        return OOFStackingRegressor(base_learners, fitted, meta, feature_names_in_=list(X.columns))
+
+    except Exception as e:
+        logging_instance.error(f"OOF stacking xatosi: {str(e)}")
+        raise e
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pandas as pd
 import joblib
@@ -7,14 +8,40 @@ from sklearn.metrics import (
     mean_absolute_percentage_error,
 )
 
+from src.artifacts import DATETIME_COL, TARGET_COL, load_frame
+from src.slice_metrics import calendar_keys, evaluate_slices
+
 # =============================
-# PATHLAR (SENING KOMPYUTERING)
+# PATHLAR (repo ildiziga nisbatan, env orqali o'zgartiriladi)
 # =============================
-TEST_SCALED_PATH = r"C:\Users\sarva\Desktop\energy_forecasting_pro\data\processed\test_scaled.csv"
-MODEL_PATH = r"C:\Users\sarva\Desktop\energy_forecasting_pro\models\final_stacking_model.pkl"
-
-TARGET_COL = "PJME_MW"
-DATETIME_COL = "Datetime"
+# Bo'sh bo'lsa data/processed/test_scaled.{feather,parquet,csv} dan birinchi mavjudi olinadi
+TEST_SCALED_PATH = os.getenv("TEST_SCALED_PATH", "")
+MODEL_PATH = os.getenv("MODEL_PATH", "models/final_stacking_model.pkl")
+# Harorat bucket'lari uchun Temp_K ni asl (Kelvin) shkalaga qaytarish
+SCALER_PATH = os.getenv("SCALER_PATH", "models/scaler.pkl")
+# Berilsa barcha slice'lar va modellar bo'yicha tidy jadval shu CSV'ga yoziladi
+SLICES_OUTPUT = os.getenv("SLICES_OUTPUT", "")
+PROCESSED_DIR = "data/processed"
+
+
+def _default_test_path():
+    for ext in (".feather", ".parquet", ".csv"):
+        path = os.path.join(PROCESSED_DIR, f"test_scaled{ext}")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"test_scaled topilmadi: {PROCESSED_DIR}")
+
+
+def _unscaled_temp(df):
+    """test_scaled dagi Temp_K Kelvin'ga qaytariladi; scaler yoki ustun bo'lmasa None."""
+    if "Temp_K" not in df.columns or not os.path.exists(SCALER_PATH):
+        return None
+    scaler = joblib.load(SCALER_PATH)
+    names = list(getattr(scaler, "feature_names_in_", []))
+    if "Temp_K" not in names:
+        return None
+    i = names.index("Temp_K")
+    return df["Temp_K"].to_numpy() * scaler.scale_[i] + scaler.mean_[i]
 
 
 def metrics(y_true, y_pred):
@@ -26,14 +53,14 @@ def metrics(y_true, y_pred):
 
 
 def main():
-    # 1) test_scaled.csv ni o‘qiymiz
-    df = pd.read_csv(TEST_SCALED_PATH)
+    # 1) test_scaled ni o‘qiymiz (Feather/Parquet/CSV; Datetime indeksdan ustunga qaytariladi)
+    df = load_frame(TEST_SCALED_PATH or _default_test_path()).reset_index()
 
     if DATETIME_COL not in df.columns:
-        raise ValueError("❌ test_scaled.csv ichida 'Datetime' ustuni yo‘q")
+        raise ValueError(f"❌ test_scaled ichida '{DATETIME_COL}' ustuni yo‘q")
 
     if TARGET_COL not in df.columns:
-        raise ValueError("❌ test_scaled.csv ichida 'PJME_MW' ustuni yo‘q")
+        raise ValueError(f"❌ test_scaled ichida '{TARGET_COL}' ustuni yo‘q")
 
     df[DATETIME_COL] = pd.to_datetime(df[DATETIME_COL])
     df = df.sort_values(DATETIME_COL)
@@ -49,36 +76,30 @@ def main():
     # 4) Predict
     preds = model.predict(X)
 
-    # 5) Natijalar
-    report = []
-
-    # OVERALL
-    report.append({"Slice": "OVERALL", **metrics(y, preds)})
-
-    # WEEKDAY / WEEKEND
-    is_weekend = df[DATETIME_COL].dt.dayofweek >= 5
-    report.append({
-        "Slice": "WEEKDAY",
-        **metrics(y[~is_weekend], preds[~is_weekend])
-    })
-    report.append({
-        "Slice": "WEEKEND",
-        **metrics(y[is_weekend], preds[is_weekend])
-    })
-
-    # PEAK HOURS (17–21)
-    hours = df[DATETIME_COL].dt.hour
-    peak_mask = (hours >= 17) & (hours <= 21)
-    report.append({
-        "Slice": "PEAK_17_21",
-        **metrics(y[peak_mask], preds[peak_mask])
-    })
+    # 5) Natijalar: barcha slice'lar bitta guruhlangan o'tishda (src.slice_metrics)
+    keys = calendar_keys(df[DATETIME_COL], _unscaled_temp(df))
+    table = evaluate_slices(y, {"stacking": preds}, keys, slices=["weekend", "peak"])
+    table = table[table["group"] != "OFF_PEAK"]
+    report = table.rename(columns={"group": "Slice"})[["Slice", "MAPE(%)", "MAE", "RMSE"]]
+
+    # Batafsil jadval: stacking va har bir bazaviy model, soat x hafta kuni x oy x harorat bucket'i
+    if SLICES_OUTPUT:
+        predictions = {"stacking": preds}
+        for name, est in getattr(model, "named_estimators_", {}).items():
+            predictions[name] = est.predict(X)
+        slices = ["hour", "dayofweek", "month", "weekend", "peak", ("hour", "dayofweek"),
+                  ("hour", "dayofweek", "month") + (("temp",) if "temp" in keys else ())]
+        detail = evaluate_slices(y, predictions, keys, slices=slices + (["temp"] if "temp" in keys else []))
+        os.makedirs(os.path.dirname(SLICES_OUTPUT) or ".", exist_ok=True)
+        detail.to_csv(SLICES_OUTPUT, index=False)
 
     # 6) Print
-    result_df = pd.DataFrame(report)
+    result_df = report
     print("\n================ STEP-0 EVALUATION REPORT ================\n")
     print(result_df.to_string(index=False))
     print(f"\nUsed features count: {len(feature_cols)}")
+    if SLICES_OUTPUT:
+        print(f"Slice jadvali: {SLICES_OUTPUT} ({len(detail)} qator)")
     print("\n==========================================================\n")
 
 
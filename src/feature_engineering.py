@@ -1,40 +1,271 @@
+import json
 import pandas as pd
 import numpy as np
 import os
+from numpy.lib.stride_tricks import sliding_window_view
 from src.logger import logging_instance
+from src.artifacts import TARGET_COL
+
+FEATURE_SPEC_PATH = os.getenv("FEATURE_SPEC_PATH", "configs/feature_spec.json")
+
+CALENDAR_FIELDS = ("hour", "dayofweek", "month", "quarter", "year", "dayofyear")
+# Sin/cos kodlash uchun davrlar (dayofyear kabisa yilini hisobga olmaydi)
+CYCLE_PERIODS = {"hour": 24, "dayofweek": 7, "month": 12, "dayofyear": 365.25}
+ROLLING_STATS = ("mean", "std", "min", "max")
+# Kalendar maydonlari uchun ixcham butun turlar
+CALENDAR_DTYPES = {"hour": np.int8, "dayofweek": np.int8, "month": np.int8, "quarter": np.int8,
+                   "year": np.int16, "dayofyear": np.int16}
+
+DEFAULT_SPEC = {
+    "lags": [24, 168],
+    "rolling": [{"window": 24, "stats": ["mean"]}],
+    "calendar": list(CALENDAR_FIELDS),
+    "cyclical": [],
+    "temperature": {"raw": True, "square": True, "degree_days": False, "base_k": 291.15},
+}
+
+
+def calendar_features(timestamps):
+    """datetime64 massividan kalendar xususiyatlarini vektorlashgan holda hisoblaydi."""
+    ts = np.asarray(timestamps, dtype="datetime64[h]")
+    days = ts.astype("datetime64[D]")
+    years = ts.astype("datetime64[Y]")
+    month = (ts.astype("datetime64[M]") - years.astype("datetime64[M]")).astype(np.int64) + 1
+
+    return {
+        'FE_hour': (ts - days.astype("datetime64[h]")).astype(np.int64),
+        # 1970-01-01 payshanba edi (Dushanba=0)
+        'FE_dayofweek': (days.astype(np.int64) + 3) % 7,
+        'FE_month': month,
+        'FE_quarter': (month - 1) // 3 + 1,
+        'FE_year': years.astype(np.int64) + 1970,
+        'FE_dayofyear': (days - years.astype("datetime64[D]")).astype(np.int64) + 1,
+    }
+
+
+class FeatureSpec:
+    """
+    Deklarativ xususiyatlar ta'rifi (configs/feature_spec.json). Training va serving
+    bir xil evaluate() dan foydalanadi, shuning uchun ta'riflar ajralib keta olmaydi.
+
+    {
+        "lags": [24, 168],                                   -> FE_lag_{L}h
+        "rolling": [{"window": 24, "stats": ["mean"]}],      -> FE_rolling_{stat}_{W}h (mean/std/min/max)
+        "calendar": ["hour", "dayofweek", ...],              -> FE_{field}
+        "cyclical": ["hour", "dayofweek"],                   -> FE_{field}_sin / FE_{field}_cos
+        "temperature": {"raw": true, "square": true,         -> Temp_K, FE_Temp_K_sq,
+                        "degree_days": true, "base_k": 291.15}  FE_HDD, FE_CDD (soatlik degree-day)
+    }
+    """
+
+    def __init__(self, spec=None):
+        spec = {**DEFAULT_SPEC, **(spec or {})}
+        self.lags = sorted({int(lag) for lag in spec["lags"]})
+        self.rolling = [(int(r["window"]), tuple(r.get("stats", ["mean"]))) for r in spec["rolling"]]
+        self.calendar = list(spec["calendar"])
+        self.cyclical = list(spec["cyclical"])
+        self.temperature = {**DEFAULT_SPEC["temperature"], **spec["temperature"]}
+
+        if any(lag < 1 for lag in self.lags) or any(window < 1 for window, _ in self.rolling):
+            raise ValueError("Lag va rolling oynalari kamida 1 soat bo'lishi kerak")
+        for field in self.calendar:
+            if field not in CALENDAR_FIELDS:
+                raise ValueError(f"Noma'lum kalendar maydoni: {field}")
+        for field in self.cyclical:
+            if field not in CYCLE_PERIODS:
+                raise ValueError(f"Sin/cos kodlash qo'llab-quvvatlanmaydi: {field}")
+        for _, stats in self.rolling:
+            for stat in stats:
+                if stat not in ROLLING_STATS:
+                    raise ValueError(f"Noma'lum rolling statistikasi: {stat}")
+
+    @classmethod
+    def load(cls, path=FEATURE_SPEC_PATH):
+        """Fayl bo'lmasa default ta'rif (oldingi 11 ta xususiyat) qaytariladi."""
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def to_dict(self):
+        return {
+            "lags": self.lags,
+            "rolling": [{"window": window, "stats": list(stats)} for window, stats in self.rolling],
+            "calendar": self.calendar,
+            "cyclical": self.cyclical,
+            "temperature": self.temperature,
+        }
+
+    @property
+    def history_hours(self):
+        """Bitta qator uchun kerak bo'ladigan oldingi soatlar soni."""
+        return max(self.lags + [window for window, _ in self.rolling] + [1])
+
+    @property
+    def feature_names(self):
+        names = [f'FE_{field}' for field in self.calendar]
+        temperature = self.temperature
+        if temperature["raw"]:
+            names.append('Temp_K')
+        if temperature["square"]:
+            names.append('FE_Temp_K_sq')
+        if temperature["degree_days"]:
+            names += ['FE_HDD', 'FE_CDD']
+        for field in self.cyclical:
+            names += [f'FE_{field}_sin', f'FE_{field}_cos']
+        names += [f'FE_lag_{lag}h' for lag in self.lags]
+        names += [f'FE_rolling_{stat}_{window}h' for window, stats in self.rolling for stat in stats]
+        return names
+
+    def evaluate(self, history, timestamps, temp_k, rolling_sums=None):
+        """
+        Barcha xususiyatlarni bitta o'tishda hisoblaydi (float32 / ixcham int).
+        history: (n, >= history_hours) - har bir qator uchun t-1 soatgacha yuklamalar
+                 (training'da sliding window view, ya'ni nusxasiz).
+        rolling_sums: {window: yig'indi} - serving'dagi inkremental yig'indilar (ixtiyoriy).
+        """
+        history = np.atleast_2d(history)
+        temp_k = np.asarray(temp_k, dtype=np.float64)
+        rolling_sums = rolling_sums or {}
+        features = {}
+
+        if self.calendar or self.cyclical:
+            calendar = calendar_features(timestamps)
+            for field in self.calendar:
+                features[f'FE_{field}'] = calendar[f'FE_{field}'].astype(CALENDAR_DTYPES[field])
+
+        temperature = self.temperature
+        if temperature["raw"]:
+            features['Temp_K'] = temp_k.astype(np.float32)
+        if temperature["square"]:
+            features['FE_Temp_K_sq'] = (temp_k ** 2).astype(np.float32)
+        if temperature["degree_days"]:
+            # Soatlik qiymat kunlik degree-day'ning 1/24 ulushi
+            delta = (temperature["base_k"] - temp_k) / 24.0
+            features['FE_HDD'] = np.maximum(delta, 0.0).astype(np.float32)
+            features['FE_CDD'] = np.maximum(-delta, 0.0).astype(np.float32)
+
+        for field in self.cyclical:
+            angle = 2 * np.pi * calendar[f'FE_{field}'] / CYCLE_PERIODS[field]
+            features[f'FE_{field}_sin'] = np.sin(angle).astype(np.float32)
+            features[f'FE_{field}_cos'] = np.cos(angle).astype(np.float32)
+
+        for lag in self.lags:
+            features[f'FE_lag_{lag}h'] = history[:, -lag].astype(np.float32)
+
+        for window, stats in self.rolling:
+            block = history[:, -window:]
+            total = rolling_sums.get(window)
+            total = block.sum(axis=1) if total is None else np.asarray(total, dtype=np.float64)
+            mean = total / window
+            for stat in stats:
+                if stat == "mean":
+                    values = mean
+                elif stat == "std":
+                    # pandas rolling().std() kabi ddof=1; einsum oraliq massivsiz kvadratlar yig'indisi
+                    sq_sum = np.einsum('ij,ij->i', block, block)
+                    values = np.sqrt(np.maximum(sq_sum - total * mean, 0.0) / max(window - 1, 1))
+                elif stat == "min":
+                    values = block.min(axis=1)
+                else:
+                    values = block.max(axis=1)
+                features[f'FE_rolling_{stat}_{window}h'] = values.astype(np.float32)
+
+        return features
+
+    def evaluate_series(self, load, timestamps, temp_k, group_sizes=None):
+        """
+        Uzluksiz qator uchun training xususiyatlari: history - yuklama massivining
+        NaN bilan to'ldirilgan sliding window view'i (xotirada nusxa yaratilmaydi).
+        group_sizes: massivlar ketma-ket joylashgan bir nechta qatordan iborat bo'lsa (har biri
+        vaqt bo'yicha tartiblangan) ularning uzunliklari. Har bir guruh oldiga history_hours ta NaN
+        qo'yiladi: lag/rolling guruh chegarasidan o'tmaydi va barcha qatorlar bitta evaluate bilan hisoblanadi.
+        """
+        load = np.asarray(load, dtype=np.float64)
+        hours = self.history_hours
+        n = len(load)
+        sizes = np.asarray([n] if group_sizes is None else group_sizes, dtype=np.int64)
+        if sizes.sum() != n:
+            raise ValueError(f"group_sizes yig'indisi ({sizes.sum()}) qatorlar soniga ({n}) teng emas")
+
+        # padded'dagi o'rin: i + hours * (guruh raqami + 1); view qatori r -> padded[r + hours] tarixi
+        positions = np.arange(n) + hours * (np.repeat(np.arange(len(sizes)), sizes) + 1)
+        padded = np.full(n + hours * len(sizes), np.nan)
+        padded[positions] = load
+        history = sliding_window_view(padded[:-1], hours)
+        if len(sizes) == 1:
+            return self.evaluate(history, timestamps, temp_k)
+
+        # Guruhlar orasidagi to'ldiruvchi qatorlar ham hisoblanadi (hours * (guruhlar - 1) ta), so'ng tashlanadi
+        rows = positions - hours
+        timestamps = np.asarray(timestamps, dtype="datetime64[h]")
+        ts_full = np.full(len(history), timestamps[0] if n else np.datetime64(0, "h"))
+        ts_full[rows] = timestamps
+        temp_full = np.full(len(history), np.nan)
+        temp_full[rows] = temp_k
+        return {name: values[rows] for name, values in self.evaluate(history, ts_full, temp_full).items()}
+
+
+FEATURE_SPEC = FeatureSpec.load()
+
+# Lag va rolling oynalari (training va serving bir xil ta'riflardan foydalanadi)
+LAG_HOURS = tuple(FEATURE_SPEC.lags)
+# Serving buferi inkremental yuritadigan rolling yig'indi oynasi
+ROLLING_WINDOW = FEATURE_SPEC.rolling[0][0] if FEATURE_SPEC.rolling else 1
+HISTORY_HOURS = FEATURE_SPEC.history_hours
+
+
+def serving_features(history, timestamps, temp_k, rolling_sum=None, spec=None):
+    """
+    Serving uchun FeatureEngineer bilan bir xil xususiyatlar (scale qilinmagan).
+    history: (n, >= HISTORY_HOURS) - har bir qator uchun t-1 soatgacha bo'lgan yuklamalar.
+    rolling_sum: ROLLING_WINDOW oynasi uchun inkremental yig'indi (ixtiyoriy).
+    """
+    spec = spec or FEATURE_SPEC
+    history = np.atleast_2d(np.asarray(history, dtype=np.float64))
+    rolling_sums = None if rolling_sum is None else {ROLLING_WINDOW: rolling_sum}
+    return spec.evaluate(history, timestamps, temp_k, rolling_sums=rolling_sums)
+
 
 class FeatureEngineer:
-    def __init__(self, split_date='2017-01-01'):
+    def __init__(self, split_date='2017-01-01', spec=None, target_col=TARGET_COL, series_col=None):
+        """
+        series_col berilsa df uzun formatda (bir nechta qator): xususiyatlar har bir qator
+        ichida hisoblanadi, lekin barcha qatorlar uchun bitta vektorlashgan o'tishda.
+        """
         self.split_date = split_date
+        self.spec = spec or FEATURE_SPEC
+        self.target_col = target_col
+        self.series_col = series_col
+
+    def build_features(self, df):
+        """Spec bo'yicha lag, rolling, harorat va kalendar xususiyatlari (train/test ajratishsiz)."""
+        if 'Datetime' not in df.columns:
+            df = df.reset_index()
+        df = df.set_index(pd.to_datetime(df['Datetime'])).drop(columns='Datetime').sort_index(kind='stable')
+
+        group_sizes = None
+        if self.series_col is not None:
+            # Qatorlar ketma-ket bloklarga (har biri vaqt bo'yicha tartibda) joylashtiriladi
+            df = df.sort_values(self.series_col, kind='stable')
+            codes, _ = pd.factorize(df[self.series_col])
+            group_sizes = np.bincount(codes)
+
+        # Barcha xususiyatlar NumPy massivlarida bitta o'tishda, ustunlar bitta concat bilan
+        features = self.spec.evaluate_series(df[self.target_col].to_numpy(dtype=np.float64),
+                                             df.index.values, df['Temp_K'].to_numpy(dtype=np.float64),
+                                             group_sizes=group_sizes)
+        features = pd.DataFrame(features, index=df.index)
+        df = pd.concat([df.drop(columns=[c for c in features.columns if c in df.columns]), features], axis=1)
+
+        # NaN qiymatlarni tozalash
+        return df.dropna()
 
     def run_feature_engineering(self, df):
         try:
             logging_instance.info("2-Bosqich: Feature Engineering boshlandi (Prefikslar bilan).")
-            
-            df = df.copy()
-            df['Datetime'] = pd.to_datetime(df['Datetime'])
-            df = df.set_index('Datetime').sort_index()
-
-            # 1. Calendar Features (FE_ prefiksi bilan)
-            df['FE_hour'] = df.index.hour
-            df['FE_dayofweek'] = df.index.dayofweek
-            df['FE_month'] = df.index.month
-            df['FE_quarter'] = df.index.quarter
-            df['FE_year'] = df.index.year
-            df['FE_dayofyear'] = df.index.dayofyear
-            
-            # 2. Weather Square
-            df['FE_Temp_K_sq'] = df['Temp_K'] ** 2
 
-            # 3. Lag Features
-            df['FE_lag_24h'] = df['PJME_MW'].shift(24)
-            df['FE_lag_168h'] = df['PJME_MW'].shift(168)
-
-            # 4. Rolling Window
-            df['FE_rolling_mean_24h'] = df['PJME_MW'].shift(1).rolling(window=24).mean()
-
-            # NaN qiymatlarni tozalash
-            df = df.dropna()
+            df = self.build_features(df)
             
             logging_instance.info(f"Yangi xususiyatlar yaratildi (FE_ prefiksi bilan). Jami ustunlar: {df.shape[1]}")
 
@@ -48,4 +279,28 @@ class FeatureEngineer:
 
         except Exception as e:
             logging_instance.error(f"Feature Engineeringda xato: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def extend_features(self, context, new_rows):
+        """
+        Append rejimi: faqat yangi qatorlar uchun xususiyatlarni hisoblaydi.
+        context - yangi qatorlardan oldingi kamida HISTORY_HOURS ta combined qator (lookback).
+        """
+        try:
+            context = context.reset_index() if 'Datetime' not in context.columns else context
+            new_rows = new_rows.reset_index() if 'Datetime' not in new_rows.columns else new_rows
+            if len(context) < HISTORY_HOURS:
+                logging_instance.warning(f"Lookback konteksti {len(context)} < {HISTORY_HOURS} qator: "
+                                         "birinchi yangi qatorlar uchun lag'lar bo'lmaydi.")
+
+            context = context.tail(HISTORY_HOURS)
+            features = self.build_features(pd.concat([context, new_rows], ignore_index=True))
+            features = features.loc[features.index >= pd.to_datetime(new_rows['Datetime']).min()]
+
+            logging_instance.info(f"Xususiyatlar kengaytirildi: {len(features)} ta yangi qator "
+                                  f"({len(context)} qatorlik kontekst bilan).")
+            return features
+
+        except Exception as e:
+            logging_instance.error(f"Feature kengaytirishda xato: {str(e)}")
+            raise e
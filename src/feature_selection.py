@@ -2,51 +2,126 @@ import pandas as pd
 import numpy as np
 import json
 import os
-import seaborn as sns
-import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
 from sklearn.feature_selection import mutual_info_regression
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 from src.logger import logging_instance
 
+# vif_report semantikasi: intercept'siz OLS, uncentered R^2 (ikkala rejimda ham bir xil)
+VIF_METHOD = "uncentered"
+
 class FeatureSelector:
-    def __init__(self, model_dir="models", plots_dir="plots"):
+    def __init__(self, model_dir="models", plots_dir="plots", fast=False, make_plots=True,
+                 mi_sample_size=50_000, n_jobs=-1):
+        """
+        fast=True: VIF bitta korrelyatsiya matritsasi inversiyasidan, MI esa vaqt bo'yicha
+        stratifikatsiyalangan subsample'da har bir feature uchun parallel hisoblanadi.
+        """
         self.model_dir = model_dir
         self.plots_dir = plots_dir
+        self.fast = fast
+        self.make_plots = make_plots
+        self.mi_sample_size = mi_sample_size
+        self.n_jobs = n_jobs
         os.makedirs(self.model_dir, exist_ok=True)
-        os.makedirs(self.plots_dir, exist_ok=True)
+        if self.make_plots:
+            os.makedirs(self.plots_dir, exist_ok=True)
 
     def check_vif(self, X):
         """Multicollinearity-ni tekshirish (VIF)"""
+        import inspect
+        from statsmodels.stats.outliers_influence import variance_inflation_factor
+
         logging_instance.info("VIF tahlili boshlandi (Multicollinearity tekshiruvi).")
+        # statsmodels 0.15+ default'da ustunlarni standartlaydi (centered VIF): hisobot versiyaga bog'liq
+        # bo'lmasligi uchun xom qiymatlardagi (uncentered) VIF so'raladi
+        kwargs = {"standardize": False} if "standardize" in inspect.signature(variance_inflation_factor).parameters else {}
         vif_data = pd.DataFrame()
         vif_data["feature"] = X.columns
-        vif_data["VIF"] = [variance_inflation_factor(X.values, i) for i in range(len(X.columns))]
+        vif_data["VIF"] = [variance_inflation_factor(X.values, i, **kwargs) for i in range(len(X.columns))]
+        return vif_data.sort_values(by="VIF", ascending=False)
+
+    def check_vif_fast(self, X):
+        """
+        check_vif bilan bir xil (statsmodels variance_inflation_factor: intercept'siz OLS, uncentered R^2)
+        VIF barcha feature'lar uchun bitta inversiyada: VIF = diag(C^-1), C - X^T X ning normallangan
+        (kosinus o'xshashlik) matritsasi. Ustunlar soniga nisbatan kub, qatorlar soniga nisbatan chiziqli.
+        """
+        logging_instance.info("Tezkor VIF tahlili (Gram matritsasi inversiyasi).")
+        values = X.to_numpy(dtype=np.float64)
+        gram = values.T @ values
+        norms = np.sqrt(np.diag(gram))
+        # Nol ustunlar (norma=0) uchun VIF aniqlanmagan - ularni cheksiz deb belgilaymiz
+        zero = norms == 0
+        scale = np.where(zero, 1.0, norms)
+        cosine = gram / np.outer(scale, scale)
+        np.fill_diagonal(cosine, 1.0)
+        vif = np.diag(np.linalg.pinv(cosine))
+        vif = np.where(zero, np.inf, vif)
+
+        vif_data = pd.DataFrame({"feature": X.columns, "VIF": vif})
         return vif_data.sort_values(by="VIF", ascending=False)
 
+    def _time_stratified_sample(self, X, y):
+        """Har bir oy (yoki ketma-ket blok) dan teng ulushda tasodifiy qatorlar."""
+        if len(X) <= self.mi_sample_size:
+            return X, y
+
+        if isinstance(X.index, pd.DatetimeIndex):
+            strata = X.index.year * 100 + X.index.month
+        else:
+            strata = np.arange(len(X)) * 100 // len(X)
+
+        fraction = self.mi_sample_size / len(X)
+        rng = np.random.default_rng(42)
+        positions = np.arange(len(X))
+        picked = [rng.choice(idx, size=max(1, int(round(len(idx) * fraction))), replace=False)
+                  for idx in pd.Series(positions).groupby(np.asarray(strata)).indices.values()]
+        picked = np.sort(np.concatenate(picked))
+        return X.iloc[picked], y.iloc[picked]
+
+    def mutual_info_fast(self, X, y):
+        X_sample, y_sample = self._time_stratified_sample(X, y)
+        logging_instance.info(f"MI {len(X_sample)}/{len(X)} qatorlik vaqt-stratifikatsiyalangan subsample'da hisoblanmoqda.")
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(mutual_info_regression)(X_sample[[col]], y_sample, random_state=42) for col in X.columns
+        )
+        return np.concatenate(scores)
+
+    def _save_plots(self, X, mi_results):
+        # Og'ir grafik kutubxonalari faqat grafik kerak bo'lganda yuklanadi
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        # 3. Grafik: MI Scores
+        plt.figure(figsize=(10, 6))
+        sns.barplot(x=mi_results.values, y=mi_results.index, palette="viridis")
+        plt.title("Xususiyatlarning Target-ga ta'siri (Mutual Information)")
+        plt.savefig(f"{self.plots_dir}/mi_importance.png")
+        plt.close()
+
+        # 4. Grafik: Correlation Heatmap
+        plt.figure(figsize=(12, 10))
+        sns.heatmap(X.corr(method='spearman'), annot=True, cmap='coolwarm', fmt=".2f")
+        plt.title("Xususiyatlararo korrelyatsiya (Spearman)")
+        plt.savefig(f"{self.plots_dir}/correlation_heatmap.png")
+        plt.close()
+
     def analyze_importance(self, X, y):
         try:
-            logging_instance.info("Advanced Feature Selection jarayoni...")
+            logging_instance.info(f"Advanced Feature Selection jarayoni{' (fast)' if self.fast else ''}...")
 
             # 1. Mutual Information
-            mi_scores = mutual_info_regression(X, y, random_state=42)
+            mi_scores = self.mutual_info_fast(X, y) if self.fast else mutual_info_regression(X, y, random_state=42)
             mi_results = pd.Series(mi_scores, name="MI_Score", index=X.columns).sort_values(ascending=False)
 
             # 2. VIF Tahlili
-            vif_results = self.check_vif(X)
+            vif_results = self.check_vif_fast(X) if self.fast else self.check_vif(X)
             
-            # 3. Grafik: MI Scores
-            plt.figure(figsize=(10, 6))
-            sns.barplot(x=mi_results.values, y=mi_results.index, palette="viridis")
-            plt.title("Xususiyatlarning Target-ga ta'siri (Mutual Information)")
-            plt.savefig(f"{self.plots_dir}/mi_importance.png")
-            plt.close()
-
-            # 4. Grafik: Correlation Heatmap
-            plt.figure(figsize=(12, 10))
-            sns.heatmap(X.corr(method='spearman'), annot=True, cmap='coolwarm', fmt=".2f")
-            plt.title("Xususiyatlararo korrelyatsiya (Spearman)")
-            plt.savefig(f"{self.plots_dir}/correlation_heatmap.png")
-            plt.close()
+            # 3-4. Grafiklar (ixtiyoriy)
+            if self.make_plots:
+                self._save_plots(X, mi_results)
 
             # Tanlash mantiqi: MI > 0.01 va juda yuqori VIF-ga ega bo'lmaganlar
             # (VIF > 10 bo'lsa, bu ustun boshqasini deyarli 100% takrorlaydi degani)
@@ -54,11 +129,12 @@ class FeatureSelector:
             
             # Saqlash
             with open(os.path.join(self.model_dir, "selected_features.json"), "w") as f:
-                json.dump({"selected_features": selected_features, "vif_report": vif_results.to_dict()}, f, indent=4)
+                json.dump({"selected_features": selected_features, "vif_method": VIF_METHOD,
+                           "vif_report": vif_results.to_dict()}, f, indent=4)
 
             logging_instance.info(f"Top 5 Feature: \n{mi_results.head(5)}")
             return selected_features, mi_results
 
         except Exception as e:
             logging_instance.error(f"Feature Selectionda xato: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
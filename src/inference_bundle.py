@@ -0,0 +1,200 @@
+import importlib.util
+import json
+import os
+import numpy as np
+from src.logger import logging_instance
+
+# Boosting kutubxonalari (xgboost o'zi bilan sklearn'ni ham tortadi) import paytida yuklanmaydi:
+# mavjudligi faqat tekshiriladi, import esa bundle komponenti yuklanganda bo'ladi
+HAS_XGB = importlib.util.find_spec("xgboost") is not None
+HAS_LGBM = importlib.util.find_spec("lightgbm") is not None
+
+MANIFEST_FILE = "manifest.json"
+RF_ARRAYS = ("children_left", "children_right", "feature", "threshold", "value", "roots")
+
+# RF daraxtlarini bo'laklab yurish (n_trees x n_rows massivlar xotirani to'ldirmasligi uchun)
+RF_CHUNK_ROWS = 4096
+
+
+def _flatten_forest(forest):
+    """RandomForest daraxtlarini bitta tekis massivlar to'plamiga aylantiradi."""
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in forest.estimators_:
+        tree = est.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n_nodes)
+
+        # Barg tugunlari o'zini-o'zi ko'rsatadi: shunda yurish sikli shartsiz bo'ladi
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, 0, 0])
+        roots.append(offset)
+
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        "children_left": np.concatenate(left).astype(np.int32),
+        "children_right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+    return arrays, int(max_depth)
+
+
+def export_inference_bundle(stack_model, output_dir="models/inference_bundle"):
+    """
+    O'qitilgan StackingRegressor'ni yengil "inference bundle"ga eksport qiladi:
+    booster fayllari, tekislangan RF daraxtlari (.npy) va meta-learner koeffitsientlari.
+    """
+    try:
+        logging_instance.info(f"Inference bundle eksport qilinmoqda: {output_dir}")
+        os.makedirs(output_dir, exist_ok=True)
+
+        names = [name for name, est in stack_model.estimators if est != "drop"]
+        components = []
+
+        for name, est in zip(names, stack_model.estimators_):
+            kind = type(est).__name__
+            if kind == "LGBMRegressor":
+                file_name = f"{name}.txt"
+                est.booster_.save_model(os.path.join(output_dir, file_name))
+                components.append({"name": name, "type": "lightgbm", "file": file_name})
+            elif kind == "XGBRegressor":
+                file_name = f"{name}.json"
+                est.get_booster().save_model(os.path.join(output_dir, file_name))
+                components.append({"name": name, "type": "xgboost", "file": file_name})
+            elif kind == "RandomForestRegressor":
+                arrays, max_depth = _flatten_forest(est)
+                for key, arr in arrays.items():
+                    np.save(os.path.join(output_dir, f"{name}_{key}.npy"), arr)
+                components.append({"name": name, "type": "forest", "prefix": name, "max_depth": max_depth,
+                                   "n_trees": len(est.estimators_)})
+            else:
+                raise ValueError(f"Bundle uchun qo'llab-quvvatlanmaydigan model turi: {kind}")
+
+        meta = stack_model.final_estimator_
+        manifest = {
+            "n_features": int(stack_model.n_features_in_),
+            "feature_names": [str(f) for f in getattr(stack_model, "feature_names_in_", [])],
+            "passthrough": bool(stack_model.passthrough),
+            "components": components,
+            "meta": {
+                "coef": np.ravel(meta.coef_).astype(float).tolist(),
+                "intercept": float(np.ravel(meta.intercept_)[0]) if np.ndim(meta.intercept_) else float(meta.intercept_),
+            },
+        }
+        with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=4)
+
+        logging_instance.info(f"Inference bundle saqlandi: {[c['name'] for c in components]}")
+        return output_dir
+
+    except Exception as e:
+        logging_instance.error(f"Inference bundle eksportida xato: {str(e)}")
+        raise e
+
+
+class InferenceBundlePredictor:
+    """
+    export_inference_bundle natijasini yuklaydi va sklearn'siz bashorat qiladi:
+    boosterlar o'z predict'i bilan, RF esa NumPy'da vektorlashgan daraxt yurishi bilan.
+    """
+
+    def __init__(self, bundle_dir, mmap=False):
+        """
+        mmap=True: RF massivlari (.npy) np.load(mmap_mode='r') bilan ochiladi - bir nechta
+        uvicorn worker bitta fizik nusxani page cache orqali bo'lishadi. Boosterlar har
+        jarayonda o'z nusxasiga yuklanadi (ularning formati mmap qilinmaydi).
+        """
+        self.bundle_dir = bundle_dir
+        self.mmap = mmap
+        with open(os.path.join(bundle_dir, MANIFEST_FILE), "r") as f:
+            self.manifest = json.load(f)
+
+        self.n_features_in_ = self.manifest["n_features"]
+        self.passthrough = self.manifest["passthrough"]
+        self.coef = np.asarray(self.manifest["meta"]["coef"], dtype=np.float64)
+        self.intercept = float(self.manifest["meta"]["intercept"])
+        self.components = [(c["name"], self._load_component(c)) for c in self.manifest["components"]]
+
+    def _load_component(self, spec):
+        if spec["type"] == "lightgbm":
+            if not HAS_LGBM:
+                raise ImportError("Bundle LightGBM talab qiladi")
+            import lightgbm as lgb
+            booster = lgb.Booster(model_file=os.path.join(self.bundle_dir, spec["file"]))
+            return lambda X: booster.predict(X)
+
+        if spec["type"] == "xgboost":
+            if not HAS_XGB:
+                raise ImportError("Bundle XGBoost talab qiladi")
+            import xgboost as xgb
+            booster = xgb.Booster()
+            booster.load_model(os.path.join(self.bundle_dir, spec["file"]))
+            # Nomsiz NumPy massivlar bilan ishlash uchun
+            booster.feature_names = None
+            booster.feature_types = None
+            return lambda X: booster.inplace_predict(X)
+
+        if spec["type"] == "forest":
+            mmap_mode = "r" if self.mmap else None
+            arrays = {key: np.load(os.path.join(self.bundle_dir, f"{spec['prefix']}_{key}.npy"), mmap_mode=mmap_mode)
+                      for key in RF_ARRAYS}
+            max_depth = spec["max_depth"]
+            return lambda X: self._predict_forest(arrays, max_depth, X)
+
+        raise ValueError(f"Noma'lum komponent turi: {spec['type']}")
+
+    @staticmethod
+    def _predict_forest(arrays, max_depth, X):
+        left, right = arrays["children_left"], arrays["children_right"]
+        feature, threshold, value = arrays["feature"], arrays["threshold"], arrays["value"]
+        roots = arrays["roots"]
+
+        # sklearn daraxtlari float32 kirish bilan taqqoslaydi
+        X32 = np.asarray(X, dtype=np.float32)
+        out = np.empty(X32.shape[0], dtype=np.float64)
+
+        for start in range(0, X32.shape[0], RF_CHUNK_ROWS):
+            chunk = X32[start:start + RF_CHUNK_ROWS]
+            rows = np.arange(chunk.shape[0])
+            node = np.repeat(roots[:, None], chunk.shape[0], axis=1)
+            for _ in range(max_depth):
+                go_left = chunk[rows, feature[node]] <= threshold[node]
+                node = np.where(go_left, left[node], right[node])
+            out[start:start + chunk.shape[0]] = value[node].mean(axis=0)
+        return out
+
+    def predict_components(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return {name: np.asarray(fn(X), dtype=np.float64) for name, fn in self.components}
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Kutilgan shakl: (n, {self.n_features_in_}), kelgan: {X.shape}")
+
+        stacked = np.column_stack(list(self.predict_components(X).values()))
+        if self.passthrough:
+            stacked = np.hstack([stacked, X])
+        return stacked @ self.coef + self.intercept
+
+
+def load_model(path, mmap=False):
+    """
+    Papka bo'lsa (inference bundle) yengil predictor, aks holda joblib pickle (API va bulk scoring uchun umumiy).
+    mmap=True: bundle'ning katta massivlari memory-map qilinadi (worker'lar orasida umumiy).
+    Pickle uchun foydasiz: sklearn daraxtlari unpickle paytida massivlarni o'z xotirasiga ko'chiradi.
+    """
+    if os.path.isdir(path):
+        return InferenceBundlePredictor(path, mmap=mmap)
+    import joblib
+    return joblib.load(path)
@@ -1,15 +1,30 @@
 import pandas as pd
+import numpy as np
 import os
+import tempfile
 from src.logger import logging_instance
+from src.artifacts import APPEND_PARTITION_PREFIX, TARGET_COL, ArtifactStore, clear_partitions, list_partitions, \
+    load_partitions, load_tail
+
+# Xom CSV fayllardagi vaqt formati (umumiy format inference'dan ancha tez)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 class DataIngestor:
-    def __init__(self, energy_path, temp_path, output_dir):
+    def __init__(self, energy_path, temp_path, output_dir, store=None, datetime_format=DATETIME_FORMAT,
+                 target_col=TARGET_COL, temp_col='Philadelphia'):
         """
         Data Ingestion klassi: Ma'lumotlarni yuklaydi, tozalaydi va birlashtiradi.
+        store (ArtifactStore) berilsa natija Feather/Parquet formatida saqlanadi, aks holda CSV.
+        target_col - energy faylidagi yuklama ustuni (masalan AEP_MW), temp_col - harorat
+        faylidagi shahar ustuni; natijada harorat har doim Temp_K deb nomlanadi.
         """
         self.energy_path = energy_path
         self.temp_path = temp_path
         self.output_dir = output_dir
+        self.store = store
+        self.datetime_format = datetime_format
+        self.target_col = target_col
+        self.temp_col = temp_col
         os.makedirs(self.output_dir, exist_ok=True)
 
     def run_ingestion(self):
@@ -22,8 +37,8 @@ class DataIngestor:
             logging_instance.info(f"Fayllar yuklandi. Energy: {energy.shape}, Temp: {temp.shape}")
 
             # 2. Vaqt formatiga o'tkazish
-            energy['Datetime'] = pd.to_datetime(energy['Datetime'])
-            temp['datetime'] = pd.to_datetime(temp['datetime'])
+            energy['Datetime'] = pd.to_datetime(energy['Datetime'], format=self.datetime_format)
+            temp['datetime'] = pd.to_datetime(temp['datetime'], format=self.datetime_format)
 
             # 3. Energy Data: Dublikatlarni o'chirish va Vaqt uzilishlarini to'ldirish
             energy = energy.set_index('Datetime').sort_index()
@@ -39,31 +54,265 @@ class DataIngestor:
             
             # Reindex va Interpolatsiya (Vaqt uzilishlarini to'ldirish)
             energy = energy.reindex(full_range)
-            energy['PJME_MW'] = energy['PJME_MW'].interpolate(method='linear')
+            energy[self.target_col] = energy[self.target_col].interpolate(method='linear')
             energy = energy.reset_index().rename(columns={'index': 'Datetime'})
             logging_instance.info("Energy ma'lumotidagi vaqt uzilishlari va dublikatlar to'g'rilandi.")
 
             # 4. Temperature Data: Tozalash
-            # Faqat Philadelphia ustunini olamiz
-            philly_temp = temp[['datetime', 'Philadelphia']].copy()
-            philly_temp = philly_temp.rename(columns={'datetime': 'Datetime', 'Philadelphia': 'Temp_K'})
+            # Faqat tanlangan shahar ustunini olamiz
+            city_temp = temp[['datetime', self.temp_col]].copy()
+            city_temp = city_temp.rename(columns={'datetime': 'Datetime', self.temp_col: 'Temp_K'})
             
             # Haroratdagi bo'shliqlarni 'Forward Fill' orqali to'ldirish (Leakage prevention)
-            philly_temp = philly_temp.sort_values('Datetime')
-            philly_temp['Temp_K'] = philly_temp['Temp_K'].ffill()
+            city_temp = city_temp.sort_values('Datetime')
+            city_temp['Temp_K'] = city_temp['Temp_K'].ffill()
             logging_instance.info("Harorat ma'lumotidagi bo'shliqlar 'ffill' orqali to'ldirildi.")
 
             # 5. Birlashtirish (Merge) - Faqat ikkala ma'lumot kashishgan vaqtlar uchun
-            combined_df = pd.merge(energy, philly_temp, on='Datetime', how='inner')
+            combined_df = pd.merge(energy, city_temp, on='Datetime', how='inner')
             logging_instance.info(f"Ma'lumotlar 'inner join' qilindi. Jami qatorlar: {len(combined_df)}")
 
             # 6. Saqlash
-            output_path = os.path.join(self.output_dir, "combined_data.csv")
-            combined_df.to_csv(output_path, index=False)
+            if self.store is not None:
+                output_path = self.store.save(combined_df, "combined_data")
+            else:
+                output_path = os.path.join(self.output_dir, "combined_data.csv")
+                combined_df.to_csv(output_path, index=False)
             logging_instance.info(f"Birlashtirilgan ma'lumot saqlandi: {output_path}")
 
             return combined_df
 
         except Exception as e:
             logging_instance.error(f"Ingestion bosqichida jiddiy xato: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def _partition_by_month(self, path, time_col, value_col, out_dir, chunksize):
+        """
+        CSV ni bo'laklab o'qiydi va qatorlarni oylik vaqtinchalik fayllarga ajratadi.
+        Xom fayl tartiblanmagan bo'lsa ham keyingi qadamlar bitta oy hajmidagi xotira bilan ishlaydi.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        keys = set()
+        for chunk in pd.read_csv(path, usecols=[time_col, value_col], chunksize=chunksize):
+            chunk[time_col] = pd.to_datetime(chunk[time_col], format=self.datetime_format)
+            month_key = chunk[time_col].dt.year * 100 + chunk[time_col].dt.month
+            for key, group in chunk.groupby(month_key, sort=False):
+                part_path = os.path.join(out_dir, f"{key}.csv")
+                group.to_csv(part_path, mode='a', header=not os.path.exists(part_path), index=False,
+                             date_format=self.datetime_format)
+                keys.add(key)
+        return [os.path.join(out_dir, f"{key}.csv") for key in sorted(keys)]
+
+    def _iter_energy(self, partitions):
+        """
+        Oylik energy bo'laklarini ketma-ket tozalaydi: dublikatlar, vaqt uzilishlari va
+        interpolatsiya bo'lak chegaralaridan o'tib ham butun faylga qilingandek natija beradi.
+        """
+        carry = None      # oxirgi chiqarilgan (ts, qiymat) - interpolatsiya tayanch nuqtasi
+        pending = None    # oxirgi haqiqiy qiymatdan keyingi NaN qatorlar (keyingi bo'lakka o'tadi)
+
+        for part_path in partitions:
+            part = pd.read_csv(part_path, parse_dates=['Datetime'], date_format=self.datetime_format)
+            part = part.sort_values('Datetime', kind='stable')
+            if pending is not None:
+                part = pd.concat([pending, part], ignore_index=True)
+            part = part[~part['Datetime'].duplicated(keep='first')]
+            if carry is not None:
+                part = part[part['Datetime'] > carry[0]]
+            if part.empty:
+                continue
+
+            series = part.set_index('Datetime')[self.target_col]
+            start = carry[0] if carry is not None else series.index.min()
+            full_range = pd.date_range(start=start, end=series.index.max(), freq='h')
+            series = series.reindex(full_range)
+            if carry is not None:
+                series.iloc[0] = carry[1]
+
+            # Oxirgi haqiqiy qiymatdan keyingi qatorlar keyingi bo'lak bilan interpolatsiya qilinadi
+            last_valid = series.last_valid_index()
+            if last_valid is None:
+                pending = part
+                continue
+            # Bular (qiymati NaN, lekin vaqti bor qatorlar) keyingi bo'lakda carry'dan boshlab qayta
+            # interpolatsiya qilinadi; oxirgi bo'lakda esa quyida oxirgi qiymat bilan to'ldiriladi
+            pending = part[part['Datetime'] > last_valid]
+            pending = pending if not pending.empty else None
+            series = series.loc[:last_valid].interpolate(method='linear')
+            if carry is not None:
+                series = series.iloc[1:]
+
+            carry = (last_valid, series.iloc[-1])
+            yield series.rename(self.target_col).rename_axis('Datetime').reset_index()
+
+        # Oxirgi bo'lakdagi yakuniy NaN'lar oxirgi qiymat bilan to'ldiriladi (interpolate xatti-harakati)
+        if pending is not None and carry is not None:
+            full_range = pd.date_range(start=carry[0], end=pending['Datetime'].max(), freq='h')[1:]
+            series = pending.set_index('Datetime')[self.target_col].reindex(full_range)
+            series = pd.concat([pd.Series([carry[1]], index=[carry[0]]), series]).interpolate(method='linear').iloc[1:]
+            yield series.rename(self.target_col).rename_axis('Datetime').reset_index()
+
+    def _iter_temperature(self, partitions):
+        """Oylik harorat bo'laklari: tartiblash va bo'lak chegarasidan o'tuvchi ffill."""
+        carry = np.nan
+        for part_path in partitions:
+            part = pd.read_csv(part_path, parse_dates=['datetime'], date_format=self.datetime_format)
+            part = part.rename(columns={'datetime': 'Datetime', self.temp_col: 'Temp_K'})
+            part = part.sort_values('Datetime', kind='stable')
+            part['Temp_K'] = part['Temp_K'].ffill().fillna(carry)
+            if part['Temp_K'].notna().any():
+                carry = part['Temp_K'].dropna().iloc[-1]
+            yield part
+
+    def run_ingestion_chunked(self, chunksize=500_000):
+        """
+        Streaming ingestion: xotira tarix uzunligiga bog'liq emas (taxminan bitta oy + bitta chunk).
+        Natija oylik bo'laklar sifatida `combined_partitions/` papkasiga yoziladi.
+        return: yozilgan bo'lak fayllari ro'yxati
+        """
+        try:
+            logging_instance.info(f"1-Bosqich: Chunked Data Ingestion boshlandi (chunksize={chunksize}).")
+            fmt = self.store.fmt if self.store is not None else "csv"
+            part_store = ArtifactStore(os.path.join(self.output_dir, "combined_partitions"), fmt=fmt)
+
+            # Oldingi ishga tushirishdan qolgan bo'laklarni tozalaymiz (append bo'laklari xom fayllarda yo'q)
+            clear_partitions(part_store.base_dir, keep_appended=True)
+
+            with tempfile.TemporaryDirectory(dir=self.output_dir) as tmp_dir:
+                energy_parts = self._partition_by_month(
+                    self.energy_path, 'Datetime', self.target_col, os.path.join(tmp_dir, "energy"), chunksize)
+                temp_parts = self._partition_by_month(
+                    self.temp_path, 'datetime', self.temp_col, os.path.join(tmp_dir, "temp"), chunksize)
+                logging_instance.info(f"Oylik bo'laklar: Energy {len(energy_parts)}, Temp {len(temp_parts)}")
+
+                temp_iter = self._iter_temperature(temp_parts)
+                temp_buffer = None
+                temp_done = False
+                written, total_rows = [], 0
+                last_key, last_combined = None, None
+
+                for energy in self._iter_energy(energy_parts):
+                    end = energy['Datetime'].max()
+                    # Energy bo'lagini qamraydigan harorat qatorlarini yig'amiz
+                    while not temp_done and (temp_buffer is None or temp_buffer.empty
+                                             or temp_buffer['Datetime'].max() <= end):
+                        try:
+                            temp_buffer = pd.concat([temp_buffer, next(temp_iter)], ignore_index=True)
+                        except StopIteration:
+                            temp_done = True
+                    if temp_buffer is None:
+                        break
+
+                    temp_now = temp_buffer[temp_buffer['Datetime'] <= end]
+                    temp_buffer = temp_buffer[temp_buffer['Datetime'] > end]
+
+                    combined = pd.merge(energy, temp_now, on='Datetime', how='inner')
+                    if combined.empty:
+                        continue
+                    key = energy['Datetime'].iloc[-1].strftime('%Y%m')
+                    # Oxirgi to'ldirilgan NaN'lar oldingi bo'lak bilan bir oyga tushadi: ustiga yozmaymiz
+                    if key == last_key:
+                        combined = pd.concat([last_combined, combined], ignore_index=True)
+                        total_rows -= len(last_combined)
+                        written.pop()
+                    written.append(part_store.save(combined, f"part-{key}"))
+                    total_rows += len(combined)
+                    last_key, last_combined = key, combined
+
+            logging_instance.info(f"Chunked ingestion yakunlandi. Bo'laklar: {len(written)}, Jami qatorlar: {total_rows}")
+            return written
+
+        except Exception as e:
+            logging_instance.error(f"Chunked ingestion bosqichida jiddiy xato: {str(e)}")
+            raise e
+
+    def _read_new(self, data, time_col):
+        """Yangi qatorlar: fayl yo'li yoki DataFrame."""
+        df = pd.read_csv(data) if isinstance(data, str) else data.copy()
+        df[time_col] = pd.to_datetime(df[time_col], format=self.datetime_format)
+        return df.sort_values(time_col, kind='stable')
+
+    def append_new_data(self, new_energy, new_temp, dataset_dir=None):
+        """
+        Append rejimi: faqat yangi soatlik qatorlarni qo'shadi. Saqlangan oxirgi nuqtaga nisbatan
+        dublikatlar tashlanadi, uzilishlar interpolatsiya qilinadi, harorat energy soatlariga
+        ffill qilinadi va natija bo'lakli datasetga yangi bo'lak sifatida yoziladi.
+        Energy qatori hali kelmagan soatlarning harorati keyingi append'gacha kutmaydi (tashlanadi).
+        return: qo'shilgan combined qatorlar (Datetime ustuni bilan)
+        """
+        try:
+            logging_instance.info("Append rejimi: yangi ma'lumotlar qo'shilmoqda.")
+            dataset_dir = dataset_dir or os.path.join(self.output_dir, "combined_partitions")
+            fmt = self.store.fmt if self.store is not None else "csv"
+            part_store = ArtifactStore(dataset_dir, fmt=fmt)
+
+            # Asosiy bo'laklar hali yo'q bo'lsa to'liq combined_data'dan boshlang'ich bo'lak yaratamiz
+            if not list_partitions(dataset_dir, appended=False):
+                base_store = self.store or ArtifactStore(self.output_dir, fmt="csv")
+                if not base_store.exists("combined_data"):
+                    raise FileNotFoundError("Append uchun saqlangan combined ma'lumot topilmadi")
+                base = base_store.load("combined_data")
+                part_store.save(base, f"part-{base.index.max().strftime('%Y%m')}")
+
+            tail = load_tail(dataset_dir, 1)
+            last_ts = tail.index[-1]
+            last_load = float(tail[self.target_col].iloc[-1])
+            last_temp = float(tail['Temp_K'].iloc[-1])
+
+            # 1. Energy: saqlangan dumga nisbatan dublikatlar va uzilishlar
+            energy = self._read_new(new_energy, 'Datetime')[['Datetime', self.target_col]]
+            energy = energy[~energy['Datetime'].duplicated(keep='first')]
+            energy = energy[energy['Datetime'] > last_ts]
+            if energy.empty:
+                logging_instance.info("Yangi energy qatorlari yo'q (hammasi saqlangan).")
+                return energy.assign(Temp_K=pd.Series(dtype=float))
+
+            series = energy.set_index('Datetime')[self.target_col]
+            series = series.reindex(pd.date_range(start=last_ts, end=series.index.max(), freq='h'))
+            series.iloc[0] = last_load
+            series = series.interpolate(method='linear').iloc[1:]
+            energy = series.rename(self.target_col).rename_axis('Datetime').reset_index()
+
+            # 2. Harorat: energy'ning soatlik oralig'iga reindex va oxirgi ma'lum qiymatdan ffill.
+            # Harorat qatori kelmagan soat ham tushib qolmasligi kerak: oxirgi saqlangan vaqt undan
+            # o'tib ketgach bu soat hech qachon qo'shilmaydi, lag'lar esa qator pozitsiyasi bo'yicha siljiydi
+            temp = self._read_new(new_temp, 'datetime')[['datetime', self.temp_col]]
+            temp = temp.rename(columns={'datetime': 'Datetime', self.temp_col: 'Temp_K'})
+            temp = temp[temp['Datetime'] > last_ts]
+            temp = temp[~temp['Datetime'].duplicated(keep='first')].set_index('Datetime')['Temp_K']
+            temp = temp.reindex(temp.index.union(energy['Datetime'])).ffill().fillna(last_temp)
+            temp = temp.reindex(energy['Datetime']).rename('Temp_K').rename_axis('Datetime').reset_index()
+
+            # 3. Birlashtirish va yangi bo'lak sifatida saqlash
+            combined = pd.merge(energy, temp, on='Datetime', how='left')
+            if not combined.empty:
+                part_store.save(combined, f"{APPEND_PARTITION_PREFIX}{combined['Datetime'].max().strftime('%Y%m%d%H')}")
+            logging_instance.info(f"Append yakunlandi. Yangi qatorlar: {len(combined)} (oxirgi saqlangan: {last_ts})")
+            return combined
+
+        except Exception as e:
+            logging_instance.error(f"Append bosqichida xato: {str(e)}")
+            raise e
+
+    def merge_appended(self, combined_df, dataset_dir):
+        """
+        To'liq ingestion natijasiga append rejimida qo'shilgan (xom fayllarda hali yo'q) qatorlarni
+        ulaydi. Xom fayllar keyinchalik shu soatlarni ham o'z ichiga olsa, xom qiymatlar ustun.
+        return: (combined_df, ishlatilgan append bo'laklari)
+        """
+        parts = list_partitions(dataset_dir, appended=True)
+        if not parts:
+            return combined_df, []
+        last_ts = combined_df['Datetime'].max()
+        appended = load_partitions(dataset_dir, appended=True).reset_index()
+        appended = appended[appended['Datetime'] > last_ts]
+        if appended.empty:
+            return combined_df, parts
+
+        # Lag'lar qator pozitsiyasi bo'yicha hisoblanadi: uzilish bo'lsa ogohlantiramiz
+        if appended['Datetime'].iloc[0] != last_ts + pd.Timedelta(hours=1):
+            logging_instance.warning(f"Append qatorlari {appended['Datetime'].iloc[0]} dan boshlanadi, "
+                                     f"xom ma'lumot esa {last_ts} da tugaydi (uzilish bor).")
+        combined_df = pd.concat([combined_df, appended[combined_df.columns]], ignore_index=True)
+        logging_instance.info(f"Append bo'laklaridan {len(appended)} ta qator qo'shildi ({len(parts)} ta bo'lak).")
+        return combined_df, parts
@@ -2,23 +2,31 @@ import os
 import logging
 from datetime import datetime
 
+class LazyFileHandler(logging.FileHandler):
+    """Log fayli (va logs/ papkasi) faqat birinchi yozuvda yaratiladi, import paytida emas."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 class CustomLogger:
     def __init__(self):
         self.log_dir = "logs"
-        os.makedirs(self.log_dir, exist_ok=True)
         
         self.log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
         self.log_file_path = os.path.join(self.log_dir, self.log_file)
         
-        logging.basicConfig(
-            filename=self.log_file_path,
-            format="[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s",
-            level=logging.INFO,
-        )
-        
         self.logger = logging.getLogger("EnergyForecasting")
+        self.logger.setLevel(logging.INFO)
+        # Root logger'ni (basicConfig) sozlamaymiz: kutubxonalar konfiguratsiyasiga aralashmaslik uchun
+        self.logger.propagate = False
+
+        file_handler = LazyFileHandler(self.log_file_path, delay=True)
+        file_handler.setFormatter(logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s"))
+        self.logger.addHandler(file_handler)
+
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(logging.Formatter("[ %(levelname)s ] - %(message)s"))
         self.logger.addHandler(console_handler)
 
-logging_instance = CustomLogger().logger
\ No newline at end of file
+logging_instance = CustomLogger().logger
@@ -0,0 +1,57 @@
+import os
+import shutil
+from datetime import datetime
+from src.logger import logging_instance
+
+MODEL_REGISTRY_DIR = "models/registry"
+# Versiya papkasida shulardan kamida bittasi bo'lishi kerak
+MODEL_ARTIFACTS = ("inference_bundle", "final_stacking_model.pkl")
+
+
+def list_versions(registry_dir=MODEL_REGISTRY_DIR):
+    """
+    Tayyor versiyalar (eskidan yangiga). Nuqta bilan boshlanadigan papkalar - hali
+    yozilayotgan versiyalar, ular e'tiborga olinmaydi.
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in os.listdir(registry_dir):
+        path = os.path.join(registry_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        if any(os.path.exists(os.path.join(path, artifact)) for artifact in MODEL_ARTIFACTS):
+            versions.append(name)
+    return sorted(versions)
+
+
+def publish_model_version(files, registry_dir=MODEL_REGISTRY_DIR, version=None):
+    """
+    Model artefaktlarini (fayl yoki papka yo'llari) registry'ga yangi versiya sifatida nusxalaydi.
+    Avval `.tmp-<versiya>` ga yoziladi, so'ng bitta os.rename bilan e'lon qilinadi, shuning uchun
+    API watcher'i hech qachon yarim yozilgan versiyani ko'rmaydi.
+    return: versiya nomi
+    """
+    try:
+        version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+        final_dir = os.path.join(registry_dir, version)
+        if os.path.exists(final_dir):
+            raise FileExistsError(f"Versiya allaqachon mavjud: {final_dir}")
+
+        tmp_dir = os.path.join(registry_dir, f".tmp-{version}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for path in files:
+            target = os.path.join(tmp_dir, os.path.basename(path.rstrip(os.sep)))
+            if os.path.isdir(path):
+                shutil.copytree(path, target)
+            else:
+                shutil.copy2(path, target)
+
+        os.rename(tmp_dir, final_dir)
+        logging_instance.info(f"Model registry'ga yangi versiya e'lon qilindi: {final_dir}")
+        return version
+
+    except Exception as e:
+        logging_instance.error(f"Model versiyasini e'lon qilishda xato: {str(e)}")
+        raise e
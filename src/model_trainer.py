@@ -3,6 +3,8 @@ import joblib
 import pandas as pd
 import numpy as np
 from src.logger import logging_instance
+from src.artifacts import TARGET_COL, load_frame
+from src.profiling import profile_section
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error
 
@@ -19,16 +21,16 @@ try:
 except ImportError:
     HAS_LGBM = False
 
-def train_base_models(train_path, test_path):
+def train_base_models(train_path, test_path, target_col=TARGET_COL):
     try:
         logging_instance.info("--- BASE MODEL TRAINING BOSHLANDI ---")
-        train_df = pd.read_csv(train_path)
-        test_df = pd.read_csv(test_path)
+        train_df = load_frame(train_path)
+        test_df = load_frame(test_path)
         
-        X_train = train_df.drop(columns=['PJME_MW', 'Datetime'], errors='ignore')
-        y_train = train_df['PJME_MW']
-        X_test = test_df.drop(columns=['PJME_MW', 'Datetime'], errors='ignore')
-        y_test = test_df['PJME_MW']
+        X_train = train_df.drop(columns=[target_col, 'Datetime'], errors='ignore')
+        y_train = train_df[target_col]
+        X_test = test_df.drop(columns=[target_col, 'Datetime'], errors='ignore')
+        y_test = test_df[target_col]
 
         models = {}
         if HAS_XGB:
@@ -41,7 +43,8 @@ def train_base_models(train_path, test_path):
         results = {}
         for name, model in models.items():
             logging_instance.info(f"{name} o'qitilmoqda...")
-            model.fit(X_train, y_train)
+            with profile_section(f"{name}/fit", kind="base_learner_fit"):
+                model.fit(X_train, y_train)
             preds = model.predict(X_test)
             mape = mean_absolute_percentage_error(y_test, preds) * 100
             results[name] = mape
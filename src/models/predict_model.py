@@ -0,0 +1,305 @@
+import argparse
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.logger import logging_instance
+from src.artifacts import DATETIME_COL
+from src.inference_bundle import load_model
+
+MODEL_PATH = os.getenv("MODEL_PATH", "models/final_stacking_model.pkl")
+SCALER_PATH = os.getenv("SCALER_PATH", "models/scaler.pkl")
+SELECTED_FEATURES_PATH = os.getenv("SELECTED_FEATURES_PATH", "models/selected_features.pkl")
+PREDICTION_COL = "prediction"
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet", ".feather": "feather", ".arrow": "feather"}
+# CSV bo'laklari qator uzunligini shu qadar qatordan baholab bayt oralig'iga aylantiriladi
+CSV_SAMPLE_ROWS = 1000
+
+# Ishchi jarayon holati: model har bir ishchida bir marta yuklanadi (_init_worker)
+_WORKER = {}
+
+
+def file_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan fayl turi: {path} (csv, parquet, feather)")
+    return fmt
+
+
+def _limit_threads(model, n_jobs):
+    """Pickle ensemble'ning o'zi va bazaviy modellarining n_jobs'i: ishchilar yadrolarni talashmasin."""
+    for est in [model] + list(getattr(model, "estimators_", [])):
+        if hasattr(est, "get_params") and "n_jobs" in est.get_params(deep=False):
+            est.set_params(n_jobs=n_jobs)
+
+
+# =============================
+# KIRISH: bo'laklar rejasi va o'qish
+# =============================
+def input_columns(path, fmt):
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    import pyarrow as pa
+    return list(pa.ipc.open_file(pa.memory_map(path)).schema.names)
+
+
+def _group_units(sizes, chunksize):
+    """Ketma-ket row group / record batch'larni kamida chunksize qatorli guruhlarga birlashtiradi."""
+    group, rows = [], 0
+    for i, n in enumerate(sizes):
+        group.append(i)
+        rows += n
+        if rows >= chunksize:
+            yield group
+            group, rows = [], 0
+    if group:
+        yield group
+
+
+def plan_chunks(path, fmt, chunksize):
+    """
+    Bo'lak tavsiflari (generator): ma'lumotning o'zini emas, uni qayerdan o'qishni bildiradi,
+    shuning uchun o'qish/parsing ham ishchilarda parallel bajariladi.
+    CSV - qator chegarasiga tekislangan bayt oralig'i (qo'shtirnoq ichida yangi qator bo'lmasligi kerak),
+    Parquet - row group'lar, Feather - record batch'lar.
+    """
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(path).metadata
+        sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        yield from (("parquet", path, group) for group in _group_units(sizes, chunksize))
+        return
+
+    if fmt == "feather":
+        import pyarrow as pa
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        sizes = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+        yield from (("feather", path, group) for group in _group_units(sizes, chunksize))
+        return
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        sample = [f.readline() for _ in range(CSV_SAMPLE_ROWS)]
+        sample = [line for line in sample if line]
+        if not sample:
+            return
+        chunk_bytes = max(1, int(sum(map(len, sample)) / len(sample) * chunksize))
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # bo'lak oxirini keyingi qator boshiga suramiz
+            end = min(f.tell(), size)
+            yield ("csv", path, (start, end))
+            start = end
+
+
+def read_chunk(task, columns):
+    kind, path, where = task
+    if kind == "csv":
+        header = _WORKER.get(("header", path))
+        if header is None:
+            header = _WORKER[("header", path)] = _csv_header(path)
+        start, end = where
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return pd.read_csv(io.BytesIO(header + data), usecols=columns)[columns]
+
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+        handle = _WORKER.get(("parquet", path))
+        if handle is None:
+            handle = _WORKER[("parquet", path)] = pq.ParquetFile(path)
+        return handle.read_row_groups(where, columns=columns).to_pandas()
+
+    import pyarrow as pa
+    reader = _WORKER.get(("feather", path))
+    if reader is None:
+        reader = _WORKER[("feather", path)] = pa.ipc.open_file(pa.memory_map(path))
+    return pa.Table.from_batches([reader.get_batch(i) for i in where]).select(columns).to_pandas()
+
+
+def _csv_header(path):
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+# =============================
+# ISHCHI
+# =============================
+def _init_worker(model_path, scaler_path, features, keep, n_jobs, mmap, spawned=True):
+    # Booster'lar OpenMP thread'lari soni kutubxona import qilinishidan oldin. Faqat spawn qilingan
+    # ishchida: workers=1 da kutubxonalar allaqachon yuklangan va env chaqiruvchining jarayoniga tushardi
+    if spawned:
+        os.environ["OMP_NUM_THREADS"] = str(n_jobs)
+    model = load_model(model_path, mmap=mmap)
+    _limit_threads(model, n_jobs)
+    _WORKER.update(model=model, scaler=joblib.load(scaler_path), features=features, keep=keep,
+                   named=hasattr(model, "feature_names_in_"))
+
+
+def score_chunk(task):
+    """Bitta bo'lak: o'qish -> scaler -> model.predict; natija: keep ustunlari + prediction."""
+    features, keep = _WORKER["features"], _WORKER["keep"]
+    df = read_chunk(task, features + [c for c in keep if c not in features])
+    # run.py dagi kabi scaler.transform: ustun turlari (float32/int8) bir xil aniqlikda hisoblanadi
+    x = _WORKER["scaler"].transform(df[features])
+    # sklearn pickle'i nomli DataFrame'da o'qitilgan: nomlar bilan beriladi (ogohlantirishsiz)
+    X = pd.DataFrame(x, columns=features, index=df.index) if _WORKER["named"] else x
+    out = df[keep].copy()
+    out[PREDICTION_COL] = np.asarray(_WORKER["model"].predict(X), dtype=np.float64)
+    return out
+
+
+# =============================
+# CHIQISH: tartib bilan, bo'lakma-bo'lak
+# =============================
+class ChunkWriter:
+    """Bo'laklarni bitta faylga ketma-ket yozadi (CSV, Parquet yoki Feather/Arrow IPC)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fmt = file_format(path)
+        self.rows = 0
+        self._handle = None
+        self._schema = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, df):
+        if self.fmt == "csv":
+            if self._handle is None:
+                self._handle = open(self.path, "w", newline="")
+            df.to_csv(self._handle, header=self.rows == 0, index=False)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._handle is None:
+                self._schema = table.schema
+                if self.fmt == "parquet":
+                    import pyarrow.parquet as pq
+                    self._handle = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._handle = pa.ipc.new_file(self.path, self._schema)
+            # Bo'laklar orasida tur farqi bo'lsa (masalan NaN'li int ustun) birinchi bo'lak sxemasi
+            self._handle.write_table(table.cast(self._schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, scaler_path=SCALER_PATH,
+               features_path=SELECTED_FEATURES_PATH, chunksize=200_000, workers=None,
+               max_in_flight=None, keep=None, mmap=False):
+    """
+    Katta faylni bo'laklab bashorat qiladi: bo'laklar process pool'da (model har bir ishchida
+    bir marta yuklanadi) parallel hisoblanadi, natijalar esa kirish tartibida darhol yoziladi.
+    Bir vaqtda ko'pi bilan max_in_flight ta bo'lak jarayonda - xotira fayl hajmiga bog'liq emas.
+    keep - natijaga ko'chiriladigan ustunlar (default: Datetime bo'lsa).
+    return: {rows, chunks, seconds, rows_per_s}
+    """
+    try:
+        fmt = file_format(input_path)
+        file_format(output_path)
+        features = list(joblib.load(features_path))
+        columns = input_columns(input_path, fmt)
+        missing = [f for f in features if f not in columns]
+        if missing:
+            raise ValueError(f"Kirish faylida xususiyatlar yo'q: {missing}")
+        if keep is None:
+            keep = [DATETIME_COL] if DATETIME_COL in columns else []
+        unknown = [c for c in keep if c not in columns]
+        if unknown:
+            raise ValueError(f"Kirish faylida ustunlar yo'q: {unknown}")
+
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = max_in_flight or 2 * workers
+        n_jobs = max(1, (os.cpu_count() or 1) // workers)
+        init_args = (model_path, scaler_path, features, list(keep), n_jobs, mmap)
+        logging_instance.info(f"Bulk scoring: {input_path} -> {output_path} ({workers} ishchi, "
+                              f"bo'lak ~{chunksize} qator, {len(features)} ta xususiyat)")
+
+        writer = ChunkWriter(output_path)
+        start, chunks = time.perf_counter(), 0
+
+        def write(df):
+            nonlocal chunks
+            writer.write(df)
+            chunks += 1
+            elapsed = time.perf_counter() - start
+            logging_instance.info(f"[score] {chunks}-bo'lak yozildi: {writer.rows} qator, "
+                                  f"{writer.rows / max(elapsed, 1e-9):,.0f} qator/s")
+
+        try:
+            if workers == 1:
+                _init_worker(*init_args, spawned=False)
+                for task in plan_chunks(input_path, fmt, chunksize):
+                    write(score_chunk(task))
+            else:
+                # spawn: ishchilar OMP_NUM_THREADS'ni booster kutubxonalari importidan oldin o'rnatadi
+                with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                         initializer=_init_worker, initargs=init_args) as pool:
+                    window = deque()
+                    for task in plan_chunks(input_path, fmt, chunksize):
+                        if len(window) >= max_in_flight:
+                            write(window.popleft().result())
+                        window.append(pool.submit(score_chunk, task))
+                    while window:
+                        write(window.popleft().result())
+        finally:
+            writer.close()
+
+        seconds = time.perf_counter() - start
+        stats = {"rows": writer.rows, "chunks": chunks, "seconds": round(seconds, 3),
+                 "rows_per_s": round(writer.rows / max(seconds, 1e-9), 1)}
+        logging_instance.info(f"Bulk scoring yakunlandi: {stats}")
+        return stats
+
+    except Exception as e:
+        logging_instance.error(f"Bulk scoring xatosi: {str(e)}")
+        raise e
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk offline scoring (CSV/Parquet/Feather)")
+    parser.add_argument("input", help="Xususiyatlar fayli (scaler'gacha bo'lgan qiymatlar)")
+    parser.add_argument("--output", required=True, help="Natija fayli: .csv, .parquet yoki .feather")
+    parser.add_argument("--model", default=MODEL_PATH, help="Pickle model yoki inference bundle papkasi")
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--features", default=SELECTED_FEATURES_PATH)
+    parser.add_argument("--chunksize", type=int, default=200_000, help="Bo'lakdagi taxminiy qatorlar soni")
+    parser.add_argument("--workers", type=int, default=None, help="Ishchi jarayonlar (default: CPU soni)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Bir vaqtda ishlanayotgan bo'laklar chegarasi (default: 2 x workers)")
+    parser.add_argument("--keep", nargs="*", default=None,
+                        help="Natijaga ko'chiriladigan ustunlar (default: Datetime bo'lsa)")
+    parser.add_argument("--mmap", action="store_true", help="Bundle massivlarini memory-map qilish")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stats = score_file(args.input, args.output, model_path=args.model, scaler_path=args.scaler,
+                       features_path=args.features, chunksize=args.chunksize, workers=args.workers,
+                       max_in_flight=args.max_in_flight, keep=args.keep, mmap=args.mmap)
+    print(f"✅ {stats['rows']} qator bashorat qilindi ({stats['chunks']} bo'lak, {stats['seconds']:.1f} s, "
+          f"{stats['rows_per_s']:,.0f} qator/s): {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
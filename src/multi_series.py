@@ -0,0 +1,123 @@
+import json
+import os
+import joblib
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.logger import logging_instance
+from src.artifacts import DATETIME_COL, SERIES_COL, SERIES_TARGET_COL, ArtifactStore
+from src.ingestion import DataIngestor
+
+SERIES_CONFIG_PATH = "configs/series.json"
+SERIES_MODEL_DIR = "models/series"
+REQUIRED_KEYS = ("key", "energy_path", "target_col")
+
+
+def load_series_config(path=SERIES_CONFIG_PATH):
+    """
+    Qatorlar ro'yxati:
+    [{"key": "PJME", "energy_path": "data/raw/PJME_hourly.csv", "target_col": "PJME_MW", "temp_col": "Philadelphia"}, ...]
+    """
+    with open(path) as f:
+        series = json.load(f)
+
+    keys = set()
+    for item in series:
+        missing = [k for k in REQUIRED_KEYS if k not in item]
+        if missing:
+            raise ValueError(f"Qator konfiguratsiyasida maydonlar yetishmaydi: {missing} ({item})")
+        if item["key"] in keys:
+            raise ValueError(f"Qator kaliti takrorlangan: {item['key']}")
+        keys.add(item["key"])
+        item.setdefault("temp_col", "Philadelphia")
+    return series
+
+
+def ingest_series(series, temp_path, output_dir, fmt="feather", csv_export=False):
+    """
+    Har bir qatorni o'z papkasiga (output_dir/<key>/) ingest qiladi va uzun formatdagi
+    umumiy jadvalni qaytaradi: Datetime, series, load_MW, Temp_K.
+    """
+    frames = []
+    for item in series:
+        store = ArtifactStore(os.path.join(output_dir, item["key"]), fmt=fmt, csv_export=csv_export)
+        ingestor = DataIngestor(item["energy_path"], temp_path, store.base_dir, store=store,
+                                target_col=item["target_col"], temp_col=item["temp_col"])
+        df = ingestor.run_ingestion()
+        df = df[[DATETIME_COL, item["target_col"], "Temp_K"]].rename(columns={item["target_col"]: SERIES_TARGET_COL})
+        frames.append(df.assign(**{SERIES_COL: item["key"]}))
+
+    combined = pd.concat(frames, ignore_index=True)[[DATETIME_COL, SERIES_COL, SERIES_TARGET_COL, "Temp_K"]]
+    logging_instance.info(f"Multi-series ingestion yakunlandi: {len(series)} ta qator, {len(combined)} ta yozuv.")
+    return combined
+
+
+def _train_series_worker(key, train_df, test_df, features, params_path, model_dir, export_bundle, n_jobs=1):
+    """
+    Process pool ishchisi: bitta qator uchun scaler + stacking ensemble va uning artefaktlari.
+    n_jobs - ishchiga tegishli yadrolar ulushi (ishchilar soni x thread'lar yadrolardan oshmasin).
+    """
+    from sklearn.metrics import mean_absolute_percentage_error
+    from sklearn.preprocessing import StandardScaler
+    from src.ensemble import create_stacking_ensemble
+
+    out_dir = os.path.join(model_dir, key)
+    os.makedirs(out_dir, exist_ok=True)
+
+    scaler = StandardScaler()
+    X_train = pd.DataFrame(scaler.fit_transform(train_df[features]), columns=features, index=train_df.index)
+    X_test = pd.DataFrame(scaler.transform(test_df[features]), columns=features, index=test_df.index)
+
+    model = create_stacking_ensemble(params_path)
+    model.set_params(n_jobs=1, **{f"{name}__n_jobs": n_jobs for name, _ in model.estimators})
+    model.fit(X_train, train_df[SERIES_TARGET_COL])
+    mape = mean_absolute_percentage_error(test_df[SERIES_TARGET_COL], model.predict(X_test)) * 100
+
+    joblib.dump(model, os.path.join(out_dir, "final_stacking_model.pkl"))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+    joblib.dump(features, os.path.join(out_dir, "selected_features.pkl"))
+    if export_bundle:
+        from src.inference_bundle import export_inference_bundle
+        export_inference_bundle(model, os.path.join(out_dir, "inference_bundle"))
+    return key, mape
+
+
+def train_all_series(train_df, test_df, features, params_path="configs/best_params.json",
+                     model_dir=SERIES_MODEL_DIR, n_workers=None, export_bundle=True):
+    """
+    Har bir qator uchun modelni process pool'da parallel o'qitadi.
+    Natija: model_dir/<key>/ (final_stacking_model.pkl, scaler.pkl, inference_bundle/)
+    return: {key: test MAPE (%)}
+    """
+    try:
+        train_groups = dict(tuple(train_df.groupby(SERIES_COL, sort=True)))
+        test_groups = dict(tuple(test_df.groupby(SERIES_COL, sort=True)))
+        keys = [key for key in train_groups if key in test_groups]
+        skipped = sorted(set(train_groups) ^ set(test_groups))
+        if skipped:
+            logging_instance.warning(f"Train yoki test qismi bo'sh qatorlar o'tkazib yuborildi: {skipped}")
+
+        n_workers = n_workers or min(len(keys), os.cpu_count() or 1)
+        # Har bir ishchidagi stacking va booster'lar yadrolarni bo'lishadi (backtest'dagi kabi)
+        n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+        logging_instance.info(f"--- MULTI-SERIES TRAINING: {len(keys)} ta qator, {n_workers} ta ishchi x "
+                              f"{n_jobs} thread ---")
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(_train_series_worker, key, train_groups[key], test_groups[key], features,
+                                   params_path, model_dir, export_bundle, n_jobs) for key in keys]
+            for future in futures:
+                key, mape = future.result()
+                results[key] = mape
+                logging_instance.info(f"[{key}] model saqlandi, test MAPE: {mape:.2f}%")
+        return results
+
+    except Exception as e:
+        logging_instance.error(f"Multi-series training xatosi: {str(e)}")
+        raise e
+
+
+def series_summary(results):
+    """Qatorlar bo'yicha natijalar jadvali (MAPE o'sish tartibida)."""
+    rows = [{"Series": key, "MAPE (%)": f"{mape:.2f}%"} for key, mape in sorted(results.items(), key=lambda kv: kv[1])]
+    return pd.DataFrame(rows)
@@ -1,38 +1,30 @@
 import pandas as pd
-import numpy as np
 import os
 from sklearn.preprocessing import StandardScaler
 from src.logger import logging_instance
+from src.feature_engineering import FeatureEngineer
 
 def run_preprocessing(raw_path, output_dir="data/processed"):
+    """
+    0-qadam (eski eksperimentlar uchun): combined_data (Datetime, PJME_MW, Temp_K) dan
+    xususiyatlar, vaqt bo'yicha split va scaling. Xususiyatlar FeatureEngineer bilan
+    bir xil spec'dan olinadi (avvalgi oydan yasalgan sun'iy FE_Temp_K_sq o'rniga haqiqiy harorat).
+    """
     logging_instance.info("0-QADAM: Preprocessing va Feature Engineering boshlandi.")
     df = pd.read_csv(raw_path)
-    df['Datetime'] = pd.to_datetime(df['Datetime'])
-    df = df.sort_values('Datetime')
+    if 'Temp_K' not in df.columns:
+        raise ValueError(f"{raw_path} da Temp_K ustuni yo'q: combined_data (ingestion natijasi) kerak")
 
-    # Feature Engineering
-    df['FE_hour'] = df['Datetime'].dt.hour
-    df['FE_dayofweek'] = df['Datetime'].dt.dayofweek
-    df['FE_month'] = df['Datetime'].dt.month
-    df['FE_dayofyear'] = df['Datetime'].dt.dayofyear
-    
-    # Lag features
-    df['FE_lag_24h'] = df['PJME_MW'].shift(24)
-    df['FE_lag_168h'] = df['PJME_MW'].shift(168)
-    df['FE_rolling_mean_24h'] = df['PJME_MW'].shift(1).rolling(window=24).mean()
-    
-    # Sun'iy ob-havo xususiyati (leverage uchun)
-    df['FE_Temp_K_sq'] = np.power(df['FE_month'] - 7, 2) 
-
-    df = df.dropna().reset_index(drop=True)
+    # Feature Engineering (training va serving bilan umumiy spec)
+    df = FeatureEngineer().build_features(df).reset_index()
 
     # Time-based splitting (Data Leakage oldini olish)
     split_date = df['Datetime'].max() - pd.Timedelta(days=365)
     train = df[df['Datetime'] <= split_date].copy()
     test = df[df['Datetime'] > split_date].copy()
 
-    # Scaling
-    num_cols = ['FE_lag_24h', 'FE_lag_168h', 'FE_rolling_mean_24h', 'FE_Temp_K_sq']
+    # Scaling (kalendar maydonlaridan tashqari barcha uzluksiz xususiyatlar)
+    num_cols = [c for c in df.columns if c != 'PJME_MW' and pd.api.types.is_float_dtype(df[c])]
     scaler = StandardScaler()
     train[num_cols] = scaler.fit_transform(train[num_cols])
     test[num_cols] = scaler.transform(test[num_cols])
@@ -43,4 +35,4 @@ def run_preprocessing(raw_path, output_dir="data/processed"):
     train.to_csv(train_path, index=False)
     test.to_csv(test_path, index=False)
     
-    return train_path, test_path
\ No newline at end of file
+    return train_path, test_path
@@ -0,0 +1,302 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from src.logger import logging_instance
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+PROFILE_REPORT_FILE = "profile_report.json"
+PROFILE_HISTORY_FILE = "profile_history.jsonl"
+RSS_SAMPLE_INTERVAL = 0.05  # soniya
+
+_ACTIVE = None
+# Profiler boshqa jarayonda faol (parallel tuning ishchilari): trial'lar shu jarayonda ham o'lchanadi
+_TRIAL_PROFILING = False
+
+
+def rss_mb():
+    """Joriy jarayonning RSS'i (MB). Linux'da /proc, boshqa tizimlarda maksimal RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def _children_max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20
+
+
+def _children_cpu_s():
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+def _live_children_cpu_s():
+    """
+    Tirik bola jarayonlar (rekursiv) CPU vaqti: joblib/loky ishchilari trial'lar orasida qayta ishlatiladi va
+    join qilinmaydi, shuning uchun RUSAGE_CHILDREN ularni ko'rmaydi. psutil bo'lmasa 0.
+    """
+    if not HAS_PSUTIL:
+        return 0.0
+    total = 0.0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            times = child.cpu_times()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        total += times.user + times.system
+    return total
+
+
+class _PeakSampler:
+    """Fon thread'i RSS'ni davriy o'qiydi: bosqich ichidagi eng yuqori qiymat (ru_maxrss jarayon bo'yicha)."""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+class PipelineProfiler:
+    """
+    run.py bosqichlari uchun wall/CPU vaqti va peak RSS. Bosqich ichidagi kichik qismlar
+    (Optuna trial'lari, bazaviy modellar fit'i) `profile_section`/`record_event` orqali
+    joriy bosqichga bog'lanib yoziladi. profile_stage berilsa o'sha bosqich cProfile bilan
+    o'lchanadi (pstats .prof fayli: snakeviz, flameprof, gprof2dot o'qiydi).
+    """
+
+    def __init__(self, output_dir="models", profile_stage=None):
+        self.output_dir = output_dir
+        self.profile_stage = profile_stage
+        self.stages = []
+        self.events = []
+        self._stack = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._children_cpu_start = _children_cpu_s()
+        self.profile_files = []
+
+    def activate(self):
+        global _ACTIVE
+        _ACTIVE = self
+        return self
+
+    def deactivate(self):
+        global _ACTIVE
+        if _ACTIVE is self:
+            _ACTIVE = None
+
+    @contextmanager
+    def stage(self, name):
+        """Bosqich o'lchovi; yield qilingan lug'atga qo'shimcha maydonlar (masalan cached) yozish mumkin."""
+        record = {"name": name, "started_at": datetime.now().isoformat(timespec="seconds")}
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        rss_start = rss_mb()
+        wall, cpu, children_cpu = time.perf_counter(), time.process_time(), _children_cpu_s()
+        self._stack.append(name)
+        try:
+            with _PeakSampler() as sampler:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    yield record
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            self._stack.pop()
+            record.update({
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.process_time() - cpu, 4),
+                # Tugagan (join qilingan) bola jarayonlar: process pool ishchilari
+                "children_cpu_s": round(_children_cpu_s() - children_cpu, 4),
+                "rss_start_mb": round(rss_start, 1),
+                "rss_end_mb": round(rss_mb(), 1),
+                "peak_rss_mb": round(sampler.peak, 1),
+            })
+            self.stages.append(record)
+            logging_instance.info(f"[profile] {name}: {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s CPU, "
+                                  f"peak RSS {record['peak_rss_mb']:.0f} MB")
+            if profiler is not None:
+                self._dump_profile(name, profiler)
+
+    @contextmanager
+    def section(self, name, **extra):
+        """Bosqich ichidagi qism (masalan bitta model fit'i): wall va CPU vaqti, peak RSS va RSS o'zgarishi."""
+        record = {"name": name, "stage": self._stack[-1] if self._stack else None, **extra}
+        rss_start = rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        sampler = _PeakSampler()
+        try:
+            with sampler:
+                yield record
+        finally:
+            record.update({
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.process_time() - cpu, 4),
+                "peak_rss_mb": round(sampler.peak, 1),
+                "rss_delta_mb": round(rss_mb() - rss_start, 1),
+            })
+            with self._lock:
+                self.events.append(record)
+
+    def record(self, name, wall_s, **extra):
+        """Tashqarida o'lchangan qism (masalan Optuna trial'ining boshlanish/tugash vaqtidan)."""
+        record = {"name": name, "stage": self._stack[-1] if self._stack else None,
+                  "wall_s": round(wall_s, 4), **extra}
+        with self._lock:
+            self.events.append(record)
+
+    def _dump_profile(self, name, profiler):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prof_path = os.path.join(self.output_dir, f"profile_{name}.prof")
+        profiler.dump_stats(prof_path)
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(40)
+        txt_path = os.path.join(self.output_dir, f"profile_{name}.txt")
+        with open(txt_path, "w") as f:
+            f.write(buffer.getvalue())
+        self.profile_files += [prof_path, txt_path]
+        logging_instance.info(f"[profile] cProfile natijasi saqlandi: {prof_path}")
+
+    def report(self, argv=None):
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "argv": list(sys.argv[1:] if argv is None else argv),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "total": {
+                "wall_s": round(time.perf_counter() - self._start, 4),
+                "cpu_s": round(time.process_time() - self._cpu_start, 4),
+                "children_cpu_s": round(_children_cpu_s() - self._children_cpu_start, 4),
+                "peak_rss_mb": round(max([s["peak_rss_mb"] for s in self.stages] + [rss_mb()]), 1),
+                "children_max_rss_mb": _children_max_rss_mb(),
+            },
+            "stages": self.stages,
+            "events": self.events,
+            "profile_files": self.profile_files,
+        }
+
+    def save(self, argv=None):
+        """Oxirgi hisobot (profile_report.json) va runlar tarixi (profile_history.jsonl, bir qator - bir run)."""
+        report = self.report(argv)
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, PROFILE_REPORT_FILE)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=4)
+        with open(os.path.join(self.output_dir, PROFILE_HISTORY_FILE), "a") as f:
+            f.write(json.dumps(report) + "\n")
+        logging_instance.info(f"[profile] Hisobot saqlandi: {path}")
+        return path
+
+
+@contextmanager
+def profile_section(name, **extra):
+    """Faol profiler bo'lsa qismni o'lchaydi, aks holda hech narsa qilmaydi."""
+    if _ACTIVE is None:
+        yield None
+        return
+    with _ACTIVE.section(name, **extra) as record:
+        yield record
+
+
+TRIAL_PROFILE_ATTR = "profile"
+
+
+def profiling_active():
+    """Shu jarayonda trial'lar o'lchanadimi (faol profiler yoki enable_trial_profiling)."""
+    return _ACTIVE is not None or _TRIAL_PROFILING
+
+
+def enable_trial_profiling(enabled=True):
+    """Profiler asosiy jarayonda bo'lganda process pool ishchisida trial o'lchovini yoqadi."""
+    global _TRIAL_PROFILING
+    _TRIAL_PROFILING = enabled
+
+
+def measured_trial(objective):
+    """
+    Optuna objective dekoratori: profiling yoqilgan bo'lsa trial'ning wall/CPU vaqti va peak RSS'i
+    trial.user_attrs["profile"] ga yoziladi, aks holda objective o'zgarishsiz chaqiriladi.
+    cpu_s - objective jarayonining o'zi (barcha thread'lari), children_cpu_s - uning bola jarayonlari
+    (cross_val_score(n_jobs=-1) ning loky ishchilari); psutil bo'lmasa faqat tugagan bolalar
+    (children_cpu_method="rusage"). peak_rss_mb faqat objective jarayoniniki. Objective qaysi jarayonda
+    ishlasa o'sha yerda o'lchanadi va storage orqali qaytadi; pruned yoki xato bilan tugagan trial ham yoziladi.
+    """
+    @functools.wraps(objective)
+    def wrapper(trial, *args, **kwargs):
+        if not profiling_active():
+            return objective(trial, *args, **kwargs)
+        wall, cpu, rss_start = time.perf_counter(), time.process_time(), rss_mb()
+        children_cpu = _children_cpu_s() + _live_children_cpu_s()
+        sampler = _PeakSampler()
+        try:
+            with sampler:
+                return objective(trial, *args, **kwargs)
+        finally:
+            trial.set_user_attr(TRIAL_PROFILE_ATTR, {
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.process_time() - cpu, 4),
+                "children_cpu_s": round(_children_cpu_s() + _live_children_cpu_s() - children_cpu, 4),
+                "children_cpu_method": "psutil" if HAS_PSUTIL else "rusage",
+                "rss_start_mb": round(rss_start, 1),
+                "peak_rss_mb": round(sampler.peak, 1),
+                "pid": os.getpid(),
+            })
+    return wrapper
+
+
+def record_optuna_trials(model_name, study):
+    """
+    Study trial'larini faol profiler'ga yozadi: holati, qiymati va measured_trial o'lchagan
+    CPU vaqti / peak RSS (bo'lmasa faqat boshlanish/tugash vaqtidan wall vaqt).
+    """
+    if _ACTIVE is None:
+        return
+    for trial in study.trials:
+        measured = dict(trial.user_attrs.get(TRIAL_PROFILE_ATTR) or {})
+        if "wall_s" in measured:
+            wall_s = measured.pop("wall_s")
+        elif trial.datetime_start is not None and trial.datetime_complete is not None:
+            wall_s = (trial.datetime_complete - trial.datetime_start).total_seconds()
+        else:
+            continue
+        _ACTIVE.record(f"{model_name}/trial_{trial.number}", wall_s,
+                       kind="optuna_trial", state=trial.state.name, value=trial.value, **measured)
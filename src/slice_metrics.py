@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ["MAPE(%)", "MAE", "RMSE"]
+# Harorat bucket'lari (Kelvin): ~-18°C dan ~+38°C gacha 5 gradus qadam bilan
+DEFAULT_TEMP_BINS = tuple(np.arange(255.0, 316.0, 5.0))
+PEAK_HOURS = (17, 21)
+# sklearn mean_absolute_percentage_error bilan bir xil maxraj
+_EPS = np.finfo(np.float64).eps
+
+
+def calendar_keys(timestamps, temp_k=None, temp_bins=DEFAULT_TEMP_BINS):
+    """
+    Slice kalitlari: hour, dayofweek, month, weekend, peak (17-21), ixtiyoriy temp (bucket).
+    return: {nom: qatorlar bo'yicha massiv}
+    """
+    ts = pd.DatetimeIndex(timestamps)
+    hour = ts.hour.to_numpy()
+    dayofweek = ts.dayofweek.to_numpy()
+    keys = {
+        "hour": hour,
+        "dayofweek": dayofweek,
+        "month": ts.month.to_numpy(),
+        "weekend": np.where(dayofweek >= 5, "WEEKEND", "WEEKDAY"),
+        "peak": np.where((hour >= PEAK_HOURS[0]) & (hour <= PEAK_HOURS[1]),
+                         f"PEAK_{PEAK_HOURS[0]}_{PEAK_HOURS[1]}", "OFF_PEAK"),
+    }
+    if temp_k is not None:
+        keys["temp"] = pd.cut(np.asarray(temp_k, dtype=float), bins=list(temp_bins)).astype(str)
+    return keys
+
+
+def _codes(keys, names):
+    """Bir yoki bir nechta kalitni bitta guruh kodiga birlashtiradi (ravel_multi_index)."""
+    codes, uniques = zip(*(pd.factorize(np.asarray(keys[name]), sort=True) for name in names))
+    # factorize NaN'ni -1 qiladi: bunday qatorlar hech qaysi guruhga kirmaydi
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    dims = tuple(len(u) for u in uniques)
+    combined = np.full(len(codes[0]), -1, dtype=np.int64)
+    combined[valid] = np.ravel_multi_index(tuple(c[valid] for c in codes), dims)
+    return combined, dims, uniques
+
+
+def evaluate_slices(y_true, predictions, keys=None, slices=(), overall=True, decimals=3):
+    """
+    Barcha slice'lar va modellar uchun MAPE/MAE/RMSE bitta guruhlangan o'tishda.
+
+    y_true: (n,) haqiqiy qiymatlar
+    predictions: {model nomi: (n,) bashorat} yoki DataFrame (har bir ustun - model)
+    keys: {kalit nomi: (n,) qiymatlar} (masalan calendar_keys natijasi yoki fold raqami)
+    slices: kalit nomlari yoki ularning kortejlari - ("hour", "dayofweek") kesishma beradi
+    return: tidy jadval: slice, group, model, n, MAPE(%), MAE, RMSE
+
+    Xatolar matritsasi bir marta hisoblanadi; har bir slice uchun (guruh, model) juftliklari
+    bitta np.bincount bilan yig'iladi, bo'sh guruhlar chiqarilmaydi.
+    """
+    if isinstance(predictions, pd.DataFrame):
+        predictions = {col: predictions[col].to_numpy() for col in predictions.columns}
+    names = list(predictions)
+    y = np.asarray(y_true, dtype=np.float64)
+    preds = np.column_stack([np.asarray(predictions[name], dtype=np.float64) for name in names])
+    if preds.shape[0] != y.shape[0]:
+        raise ValueError(f"Bashoratlar uzunligi {preds.shape[0]} != y_true uzunligi {y.shape[0]}")
+
+    abs_err = np.abs(preds - y[:, None])
+    # (n, m, 3): |e|, e^2, |e|/|y| - bitta bincount bilan uchalasi yig'iladi
+    stats = np.stack([abs_err, abs_err ** 2, abs_err / np.maximum(np.abs(y), _EPS)[:, None]], axis=-1)
+    n_models = len(names)
+
+    specs = [((), "OVERALL")] if overall else []
+    specs += [((s,) if isinstance(s, str) else tuple(s), None) for s in slices]
+
+    frames = []
+    for spec, label in specs:
+        if spec:
+            codes, dims, uniques = _codes(keys, spec)
+        else:
+            codes, dims, uniques = np.zeros(len(y), dtype=np.int64), (1,), None
+        n_groups = int(np.prod(dims))
+        valid = codes >= 0
+
+        counts = np.bincount(codes[valid], minlength=n_groups)
+        flat = (codes[valid, None] * n_models + np.arange(n_models)).ravel()
+        sums = np.stack([np.bincount(flat, weights=stats[valid, :, k].ravel(), minlength=n_groups * n_models)
+                         for k in range(3)], axis=-1).reshape(n_groups, n_models, 3)
+
+        present = np.flatnonzero(counts)
+        n = counts[present][:, None]
+        mae = sums[present, :, 0] / n
+        rmse = np.sqrt(sums[present, :, 1] / n)
+        mape = sums[present, :, 2] / n * 100
+
+        if uniques is None:
+            groups = np.array(["OVERALL"], dtype=object)
+        else:
+            parts = np.unravel_index(present, dims)
+            groups = np.array(["|".join(str(u[i]) for u, i in zip(uniques, idx)) for idx in zip(*parts)], dtype=object)
+
+        frames.append(pd.DataFrame({
+            "slice": label or "x".join(spec),
+            "group": np.repeat(groups, n_models),
+            "model": np.tile(names, len(present)),
+            "n": np.repeat(counts[present], n_models),
+            "MAPE(%)": mape.ravel(),
+            "MAE": mae.ravel(),
+            "RMSE": rmse.ravel(),
+        }))
+
+    table = pd.concat(frames, ignore_index=True)
+    if decimals is not None:
+        table[METRIC_COLUMNS] = table[METRIC_COLUMNS].round(decimals)
+    return table
@@ -0,0 +1,185 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import shutil
+import joblib
+import pandas as pd
+from src.logger import logging_instance
+
+# run.py bosqichlari tartibi (--force-from shu tartib bo'yicha ishlaydi)
+STAGES = ["ingestion", "features", "selection", "scaling", "baseline", "tuning", "stacking"]
+# Kod xeshi shu papka ichidagi (src, app, ...) modullarni tranzitiv kuzatadi
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Fayl mazmunining sha256 xeshi (bo'laklab o'qiladi)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_frame(df):
+    """DataFrame qiymatlari, indeksi, ustunlari va dtype'larining xeshi."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _source_path(obj):
+    # Modul nomi (str) berilsa fayl import qilinmasdan topiladi: og'ir bosqichlar keshdan
+    # olinganda ularning kutubxonalari umuman yuklanmaydi
+    if isinstance(obj, str):
+        return importlib.util.find_spec(obj).origin
+    return inspect.getsourcefile(obj)
+
+
+def _repo_module_path(name):
+    """Repo ichidagi modul fayli (import qilinmasdan), tashqi kutubxona yoki atribut bo'lsa None."""
+    base = os.path.join(REPO_ROOT, *name.split("."))
+    for path in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _imported_modules(path):
+    """Fayldagi barcha importlar (funksiya ichidagi lazy importlar ham); `from a import b` uchun a va a.b."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names += [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+    return names
+
+
+def code_files(*objects):
+    """Obyektlar (yoki modul nomlari) fayllari va ular tranzitiv import qiladigan repo ichidagi modullar."""
+    pending = [_source_path(obj) for obj in objects]
+    seen = set()
+    while pending:
+        path = os.path.abspath(pending.pop())
+        if path in seen:
+            continue
+        seen.add(path)
+        for name in _imported_modules(path):
+            # Paket importi uning __init__.py sini ham ishga tushiradi
+            parts = name.split(".")
+            for depth in range(1, len(parts) + 1):
+                module_path = _repo_module_path(".".join(parts[:depth]))
+                if module_path is not None:
+                    pending.append(module_path)
+    return sorted(seen)
+
+
+def hash_code(*objects):
+    """
+    Bosqich kodining versiyasi: obyektlar (yoki modul nomlari) fayllari va ular tranzitiv import qiladigan
+    repo modullari (artifacts, feature_engineering, logger, ...) mazmunining xeshi.
+    """
+    digest = hashlib.sha256()
+    for path in code_files(*objects):
+        digest.update(os.path.relpath(path, REPO_ROOT).replace(os.sep, "/").encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Pipeline bosqichlari natijalarini (kirish ma'lumoti + kod versiyasi + konfiguratsiya)
+    xeshi bo'yicha keshlaydi. Yuqoridagi bosqich o'zgarmagan bo'lsa natija diskdan olinadi.
+    """
+
+    def __init__(self, cache_dir=".cache/stages", enabled=True, force_from=None):
+        if force_from is not None and force_from not in STAGES:
+            raise ValueError(f"force_from {STAGES} dan biri bo'lishi kerak: {force_from}")
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.force_from = force_from
+        # Oxirgi run() natijasi keshdan olinganmi (profil hisoboti uchun)
+        self.last_cached = False
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, stage, inputs=(), code=(), config=None):
+        payload = {
+            "stage": stage,
+            "inputs": list(inputs),
+            "code": hash_code(*code) if code else None,
+            "config": config,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def is_forced(self, stage):
+        return self.force_from is not None and STAGES.index(stage) >= STAGES.index(self.force_from)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def _outputs_dir(self, stage, key):
+        return os.path.join(self.cache_dir, stage, f"{key}.outputs")
+
+    def _save_outputs(self, stage, key, files):
+        """Bosqich yozgan fayllar nusxasi va ularning asl yo'llari (manifest.json)."""
+        out_dir = self._outputs_dir(stage, key)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        manifest = []
+        for i, path in enumerate(f for f in files if os.path.isfile(f)):
+            name = f"{i}_{os.path.basename(path)}"
+            shutil.copy2(path, os.path.join(out_dir, name))
+            manifest.append({"path": path, "file": name})
+        with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=4)
+
+    def _restore_outputs(self, stage, key):
+        """Keshdagi fayllarni asl joyiga qaytaradi. return: nusxalar topildimi."""
+        out_dir = self._outputs_dir(stage, key)
+        manifest_path = os.path.join(out_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        for item in manifest:
+            os.makedirs(os.path.dirname(item["path"]) or ".", exist_ok=True)
+            shutil.copy2(os.path.join(out_dir, item["file"]), item["path"])
+        return True
+
+    def run(self, stage, fn, inputs=(), code=(), config=None, outputs=None):
+        """
+        fn() natijasini keshdan qaytaradi yoki hisoblab saqlaydi.
+        outputs - fn diskka yozadigan fayllar (ro'yxat yoki fn'dan keyin chaqiriladigan funksiya): ular
+        kesh yozuvi bilan saqlanadi va keshdan olinganda asl joyiga qaytariladi.
+        return: (natija, kalit) - kalit keyingi bosqichlar uchun kirish sifatida beriladi.
+        """
+        key = self.key(stage, inputs, code, config)
+        path = self._path(stage, key)
+
+        if self.enabled and not self.is_forced(stage) and os.path.exists(path):
+            # Fayllari saqlanmagan eski yozuv qayta hisoblanadi
+            if outputs is None or self._restore_outputs(stage, key):
+                logging_instance.info(f"[cache] '{stage}' bosqichi keshdan olindi ({key}).")
+                self.last_cached = True
+                return joblib.load(path), key
+
+        self.last_cached = False
+        result = fn()
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if outputs is not None:
+                self._save_outputs(stage, key, outputs() if callable(outputs) else outputs)
+            tmp_path = f"{path}.tmp"
+            joblib.dump(result, tmp_path)
+            os.replace(tmp_path, path)
+            logging_instance.info(f"[cache] '{stage}' bosqichi natijasi saqlandi ({key}).")
+        return result, key
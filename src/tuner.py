@@ -1,10 +1,15 @@
 import os
 import json
+import math
 import optuna
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import cross_val_score
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+from sklearn.metrics import mean_squared_error
 from src.logger import logging_instance
+from src.artifacts import TARGET_COL, load_frame
+from src.profiling import enable_trial_profiling, measured_trial, profiling_active, record_optuna_trials
 from sklearn.ensemble import RandomForestRegressor
 
 try:
@@ -14,11 +19,16 @@ except ImportError:
     HAS_XGB = False
 
 try:
-    from lightgbm import LGBMRegressor
+    from lightgbm import LGBMRegressor, early_stopping
     HAS_LGBM = True
 except ImportError:
     HAS_LGBM = False
 
+EARLY_STOPPING_ROUNDS = 50
+# Early stopping eval to'plami - train fold'ining oxirgi qismi (validatsiya fold'i faqat baholash uchun)
+EARLY_STOPPING_FRACTION = 0.1
+
+@measured_trial
 def objective(trial, X, y, model_name):
     if model_name == "LightGBM":
         params = {'n_estimators': trial.suggest_int('n_estimators', 500, 1000),
@@ -38,10 +48,10 @@ def objective(trial, X, y, model_name):
     score = cross_val_score(model, X, y, cv=3, scoring='neg_root_mean_squared_error', n_jobs=-1).mean()
     return -score
 
-def run_all_tuning(train_path, config_path="configs/best_params.json"):
-    df = pd.read_csv(train_path)
-    X = df.drop(columns=['PJME_MW', 'Datetime'], errors='ignore')
-    y = df['PJME_MW']
+def run_all_tuning(train_path, config_path="configs/best_params.json", n_trials=15, target_col=TARGET_COL):
+    df = load_frame(train_path)
+    X = df.drop(columns=[target_col, 'Datetime'], errors='ignore')
+    y = df[target_col]
     
     os.makedirs("configs", exist_ok=True)
     all_best_params = {}
@@ -53,8 +63,175 @@ def run_all_tuning(train_path, config_path="configs/best_params.json"):
     for name in tune_list:
         logging_instance.info(f"--- {name} tuning boshlandi ---")
         study = optuna.create_study(direction='minimize')
-        study.optimize(lambda trial: objective(trial, X, y, name), n_trials=15)
+        study.optimize(lambda trial: objective(trial, X, y, name), n_trials=n_trials)
         all_best_params[name] = study.best_params
+        record_optuna_trials(name, study)
+
+    with open(config_path, 'w') as f:
+        json.dump(all_best_params, f, indent=4)
+
+    return all_best_params
+
+
+def _suggest_model(trial, model_name, n_jobs):
+    """Parallel rejim uchun model: boosting modellari early stopping bilan."""
+    if model_name == "LightGBM":
+        params = {'n_estimators': trial.suggest_int('n_estimators', 500, 1000),
+                  'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.1, log=True),
+                  'num_leaves': trial.suggest_int('num_leaves', 20, 100)}
+        return LGBMRegressor(**params, n_jobs=n_jobs, verbosity=-1)
+    if model_name == "XGBoost":
+        params = {'n_estimators': trial.suggest_int('n_estimators', 500, 1000),
+                  'max_depth': trial.suggest_int('max_depth', 3, 9),
+                  'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.1, log=True)}
+        return XGBRegressor(**params, n_jobs=n_jobs, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    params = {'n_estimators': trial.suggest_int('n_estimators', 50, 200),
+              'max_depth': trial.suggest_int('max_depth', 5, 15)}
+    return RandomForestRegressor(**params, n_jobs=n_jobs)
+
+
+@measured_trial
+def pruned_objective(trial, X, y, model_name, n_splits=3, n_jobs=1):
+    """
+    Vaqt tartibidagi (TimeSeriesSplit) CV. Har bir fold'dan keyin oraliq RMSE pruner'ga
+    xabar qilinadi, yomon trial'lar erta to'xtatiladi. LightGBM/XGBoost'da daraxtlar soni
+    train fold'ining oxirgi EARLY_STOPPING_FRACTION qismida tanlanadi: trial bahosi
+    validatsiya fold'iga "qaramaydi".
+    """
+    scores, best_iterations = [], []
+    for fold, (train_idx, val_idx) in enumerate(TimeSeriesSplit(n_splits=n_splits).split(X)):
+        X_tr, X_val = X.iloc[train_idx], X.iloc[val_idx]
+        y_tr, y_val = y.iloc[train_idx], y.iloc[val_idx]
+        model = _suggest_model(trial, model_name, n_jobs)
+
+        if model_name in ("LightGBM", "XGBoost"):
+            # Vaqt tartibi saqlanadi: eval to'plami train fold'ining eng oxirgi qatorlari
+            n_es = max(1, int(len(X_tr) * EARLY_STOPPING_FRACTION))
+            X_fit, X_es = X_tr.iloc[:-n_es], X_tr.iloc[-n_es:]
+            y_fit, y_es = y_tr.iloc[:-n_es], y_tr.iloc[-n_es:]
+        if model_name == "LightGBM":
+            model.fit(X_fit, y_fit, eval_set=[(X_es, y_es)],
+                      callbacks=[early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+            best_iterations.append(model.best_iteration_)
+        elif model_name == "XGBoost":
+            model.fit(X_fit, y_fit, eval_set=[(X_es, y_es)], verbose=False)
+            best_iterations.append(model.best_iteration + 1)
+        else:
+            model.fit(X_tr, y_tr)
+
+        scores.append(np.sqrt(mean_squared_error(y_val, model.predict(X_val))))
+        trial.report(float(np.mean(scores)), step=fold)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+
+    if best_iterations:
+        trial.set_user_attr("best_iterations", [int(i) for i in best_iterations])
+    return float(np.mean(scores))
+
+
+def _make_storage(storage_path):
+    """SQLite (.db) yoki journal fayl storage: study'lar uzilishdan keyin davom etadi."""
+    os.makedirs(os.path.dirname(storage_path) or ".", exist_ok=True)
+    if storage_path.endswith(".db"):
+        return f"sqlite:///{storage_path}"
+    try:
+        from optuna.storages.journal import JournalFileBackend
+    except ImportError:
+        from optuna.storages import JournalFileStorage as JournalFileBackend
+    return optuna.storages.JournalStorage(JournalFileBackend(storage_path))
+
 
+def _make_pruner(name, n_splits):
+    if name == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=n_splits)
+    if name == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=0)
+    return optuna.pruners.NopPruner()
+
+
+def _tune_worker(train_path, model_name, study_name, storage_path, pruner, n_trials, n_splits, n_jobs,
+                 target_col=TARGET_COL, profile=False):
+    """
+    Process pool ishchisi: ma'lumotni memory-map orqali o'qiydi va umumiy study'ga trial qo'shadi.
+    profile=True bo'lsa (asosiy jarayonda profiler faol) trial'lar shu ishchida o'lchanadi.
+    """
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    enable_trial_profiling(profile)
+    df = load_frame(train_path)
+    X = df.drop(columns=[target_col, 'Datetime'], errors='ignore')
+    y = df[target_col]
+
+    study = optuna.load_study(study_name=study_name, storage=_make_storage(storage_path),
+                              pruner=_make_pruner(pruner, n_splits))
+    study.optimize(lambda trial: pruned_objective(trial, X, y, model_name, n_splits, n_jobs), n_trials=n_trials)
+    return n_trials
+
+
+def _best_params(study):
+    """
+    Eng yaxshi parametrlar; early stopping bo'lsa n_estimators fold'lardagi o'rtacha best_iteration
+    (train fold'lari oxiridagi eval to'plamida tanlangan, validatsiya fold'larida emas).
+    """
+    params = dict(study.best_params)
+    best_iterations = study.best_trial.user_attrs.get("best_iterations")
+    if best_iterations:
+        params['n_estimators'] = int(round(np.mean(best_iterations)))
+    return params
+
+
+def run_all_tuning_parallel(train_path, config_path="configs/best_params.json", n_trials=15, n_workers=None,
+                            storage_path="configs/optuna_journal.log", pruner="median", n_splits=3,
+                            study_prefix="energy", target_col=TARGET_COL):
+    """
+    run_all_tuning'ning parallel varianti: modellar va trial'lar process pool'da bir vaqtda ishlaydi,
+    study'lar storage'da saqlanadi (uzilishdan keyin davom etadi), fold'lar bo'yicha pruning
+    va LightGBM/XGBoost uchun early stopping ishlatiladi.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    storage = _make_storage(storage_path)
+
+    tune_list = ["RandomForest"]
+    if HAS_XGB: tune_list.append("XGBoost")
+    if HAS_LGBM: tune_list.append("LightGBM")
+
+    workers_per_model = max(1, n_workers // len(tune_list))
+    # Har bir trial ichidagi model yadrolarni ishchilar bilan bo'lishadi
+    n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+
+    jobs = []
+    for name in tune_list:
+        study_name = f"{study_prefix}-{name}"
+        study = optuna.create_study(study_name=study_name, storage=storage, direction='minimize',
+                                    pruner=_make_pruner(pruner, n_splits), load_if_exists=True)
+        finished = sum(t.state in (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+                       for t in study.trials)
+        remaining = max(0, n_trials - finished)
+        logging_instance.info(f"--- {name} parallel tuning: {finished} ta tayyor, {remaining} ta qoldi ---")
+
+        per_worker = math.ceil(remaining / workers_per_model) if remaining else 0
+        while remaining > 0:
+            chunk = min(per_worker, remaining)
+            jobs.append((name, study_name, chunk))
+            remaining -= chunk
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(_tune_worker, train_path, name, study_name, storage_path,
+                                   pruner, chunk, n_splits, n_jobs, target_col, profiling_active())
+                       for name, study_name, chunk in jobs]
+            for future in futures:
+                future.result()
+
+    all_best_params = {}
+    for name in tune_list:
+        study = optuna.load_study(study_name=f"{study_prefix}-{name}", storage=storage)
+        all_best_params[name] = _best_params(study)
+        record_optuna_trials(name, study)
+        pruned = sum(t.state == optuna.trial.TrialState.PRUNED for t in study.trials)
+        logging_instance.info(f"{name}: eng yaxshi RMSE {study.best_value:.2f}, pruned trial'lar: {pruned}")
+
+    os.makedirs(os.path.dirname(config_path) or ".", exist_ok=True)
     with open(config_path, 'w') as f:
-        json.dump(all_best_params, f, indent=4)
\ No newline at end of file
+        json.dump(all_best_params, f, indent=4)
+
+    return all_best_params
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.batching import MicroBatcher
+
+
+def _predict(x):
+    # Manfiy qiymatli qator bor batch xato beradi
+    if (x[:, 0] < 0).any():
+        raise ValueError("yomon batch")
+    return x[:, 0] * 2
+
+
+def test_failed_batch_does_not_block_other_requests():
+    async def scenario():
+        batcher = MicroBatcher(_predict, max_batch_size=2, max_wait_ms=50)
+        await batcher.start()
+        try:
+            rows = [np.array([-1.0]), np.array([1.0]), np.array([2.0]), np.array([3.0])]
+            results = await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+            after = await batcher.submit(np.array([4.0]))
+        finally:
+            await batcher.stop()
+        return results, after, batcher.stats()
+
+    results, after, stats = asyncio.run(scenario())
+    # Birinchi batch ([-1, 1]) xato oladi, qolganlari javob oladi
+    assert isinstance(results[0], ValueError) and isinstance(results[1], ValueError)
+    assert results[2:] == [4.0, 6.0]
+    assert after == 8.0
+    assert stats["errors"] == 1
+
+
+def test_worker_is_restarted_after_cancel():
+    async def scenario():
+        batcher = MicroBatcher(_predict, max_batch_size=4, max_wait_ms=1)
+        await batcher.start()
+        try:
+            batcher._task.cancel()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            return await batcher.submit(np.array([5.0])), batcher.stats()["restarts"]
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(scenario()) == (10.0, 1)
+
+
+def test_submit_times_out():
+    def slow(x):
+        time.sleep(0.5)
+        return x[:, 0]
+
+    async def scenario():
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=1, timeout_s=0.05)
+        await batcher.start()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await batcher.submit(np.array([1.0]))
+        finally:
+            await batcher.stop()
+
+    asyncio.run(scenario())
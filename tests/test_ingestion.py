@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from src.artifacts import ArtifactStore, clear_partitions, list_partitions, load_partitions
+from src.ingestion import DataIngestor
+
+
+def _ingestor(tmp_path):
+    return DataIngestor(None, None, str(tmp_path))
+
+
+def _seed_partitions(dataset_dir):
+    base = pd.DataFrame({
+        "Datetime": pd.date_range("2018-08-03 10:00", "2018-08-03 14:00", freq="h"),
+        "PJME_MW": [100.0, 110.0, 120.0, 130.0, 140.0],
+        "Temp_K": [300.0, 301.0, 302.0, 303.0, 304.0],
+    })
+    ArtifactStore(dataset_dir, fmt="csv").save(base, "part-201808")
+
+
+def test_append_keeps_interpolated_hours_without_temperature(tmp_path):
+    dataset_dir = str(tmp_path / "combined_partitions")
+    _seed_partitions(dataset_dir)
+
+    # 15:00 energy'da yo'q (interpolatsiya), harorat faqat 18:00 uchun keladi
+    energy = pd.DataFrame({"Datetime": ["2018-08-03 16:00:00", "2018-08-03 17:00:00", "2018-08-03 18:00:00"],
+                           "PJME_MW": [160.0, 170.0, 180.0]})
+    temp = pd.DataFrame({"datetime": ["2018-08-03 18:00:00"], "Philadelphia": [310.0]})
+
+    added = _ingestor(tmp_path).append_new_data(energy, temp, dataset_dir=dataset_dir)
+
+    expected_hours = pd.date_range("2018-08-03 15:00", "2018-08-03 18:00", freq="h")
+    assert list(added["Datetime"]) == list(expected_hours)
+    assert added["PJME_MW"].tolist() == [150.0, 160.0, 170.0, 180.0]
+    # Haroratsiz soatlar oxirgi saqlangan haroratdan ffill qilinadi
+    assert added["Temp_K"].tolist() == [304.0, 304.0, 304.0, 310.0]
+
+    stored = load_partitions(dataset_dir)
+    assert stored.index.equals(pd.date_range("2018-08-03 10:00", "2018-08-03 18:00", freq="h", name="Datetime"))
+
+
+def test_full_ingestion_keeps_appended_partitions(tmp_path):
+    dataset_dir = str(tmp_path / "combined_partitions")
+    _seed_partitions(dataset_dir)
+    energy = pd.DataFrame({"Datetime": ["2018-08-03 15:00:00", "2018-08-03 16:00:00"], "PJME_MW": [150.0, 160.0]})
+    temp = pd.DataFrame({"datetime": ["2018-08-03 15:00:00"], "Philadelphia": [305.0]})
+    ingestor = _ingestor(tmp_path)
+    ingestor.append_new_data(energy, temp, dataset_dir=dataset_dir)
+
+    # To'liq qayta ingestion asosiy bo'laklarni tozalaydi, append bo'laklari esa qoladi
+    clear_partitions(dataset_dir, keep_appended=True)
+    assert list_partitions(dataset_dir) == list_partitions(dataset_dir, appended=True)
+
+    raw = pd.DataFrame({"Datetime": pd.date_range("2018-08-03 10:00", "2018-08-03 14:00", freq="h"),
+                        "PJME_MW": [100.0, 110.0, 120.0, 130.0, 140.0],
+                        "Temp_K": [300.0, 301.0, 302.0, 303.0, 304.0]})
+    combined, parts = ingestor.merge_appended(raw, dataset_dir)
+
+    assert len(parts) == 1
+    assert list(combined["Datetime"]) == list(pd.date_range("2018-08-03 10:00", "2018-08-03 16:00", freq="h"))
+    assert combined["PJME_MW"].tolist()[-2:] == [150.0, 160.0]
+
+
+def test_chunked_ingestion_matches_full_ingestion(tmp_path):
+    hours = pd.date_range("2018-01-30", "2018-03-02 05:00", freq="h")
+    energy = pd.DataFrame({"Datetime": hours.strftime("%Y-%m-%d %H:%M:%S"),
+                           "PJME_MW": np.linspace(100.0, 200.0, len(hours))})
+    # Oy chegarasidan o'tuvchi va oxirgi oydagi yakuniy NaN'lar, hamda tushib qolgan soatlar
+    energy.loc[(hours >= "2018-01-31 22:00") & (hours <= "2018-02-01 03:00"), "PJME_MW"] = np.nan
+    energy.loc[len(energy) - 4:, "PJME_MW"] = np.nan
+    energy = energy.drop(index=[100, 101, 500])
+    temp = pd.DataFrame({"datetime": hours.strftime("%Y-%m-%d %H:%M:%S"),
+                         "Philadelphia": np.linspace(270.0, 300.0, len(hours))})
+    energy.to_csv(tmp_path / "energy.csv", index=False)
+    temp.to_csv(tmp_path / "temp.csv", index=False)
+
+    def ingestor(name):
+        return DataIngestor(str(tmp_path / "energy.csv"), str(tmp_path / "temp.csv"), str(tmp_path / name))
+
+    full = ingestor("full").run_ingestion().set_index("Datetime")
+    ingestor("chunked").run_ingestion_chunked(chunksize=50)
+    chunked = load_partitions(str(tmp_path / "chunked" / "combined_partitions"))
+
+    assert chunked.index.equals(full.index)
+    np.testing.assert_allclose(chunked["PJME_MW"].to_numpy(), full["PJME_MW"].to_numpy())
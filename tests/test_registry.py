@@ -0,0 +1,87 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from app.registry import ModelRegistry, VersionedModelRegistry
+
+SERVING = ["FE_lag_24h", "FE_hour", "Temp_K"]
+
+
+def _frame(order):
+    rng = np.random.default_rng(0)
+    data = {"FE_lag_24h": rng.normal(size=50), "FE_hour": rng.normal(size=50), "Temp_K": rng.normal(size=50)}
+    return pd.DataFrame(data)[order], 3 * data["FE_lag_24h"] - 2 * data["FE_hour"] + 0.5 * data["Temp_K"]
+
+
+def _publish(root, version, order):
+    X, y = _frame(order)
+    directory = os.path.join(root, version)
+    os.makedirs(directory)
+    model = LinearRegression().fit(X, y)
+    joblib.dump(model, os.path.join(directory, "final_stacking_model.pkl"))
+    joblib.dump(StandardScaler().fit(X), os.path.join(directory, "scaler.pkl"))
+    joblib.dump(list(order), os.path.join(directory, "selected_features.pkl"))
+    return model
+
+
+def test_swap_to_version_with_reordered_features(tmp_path):
+    root = str(tmp_path)
+    _publish(root, "v1", SERVING)
+    registry = VersionedModelRegistry(root, SERVING)
+    x = np.array([[1.0, 2.0, 3.0]])  # API (SERVING) tartibida
+    before = registry.get().predict(x)
+
+    reordered = ["Temp_K", "FE_lag_24h", "FE_hour"]
+    model = _publish(root, "v2", reordered)
+    assert registry.refresh()
+    entry = registry.get()
+
+    assert entry.key == "v2"
+    expected = model.predict(pd.DataFrame(x, columns=SERVING)[reordered])
+    np.testing.assert_allclose(entry.predict(x), expected)
+    np.testing.assert_allclose(entry.predict(x), before)
+    # Scaler ham API tartibida qaytariladi
+    mean, _ = entry.scaler
+    X, _ = _frame(SERVING)
+    np.testing.assert_allclose(mean, X.mean().to_numpy())
+
+
+def test_refresh_rejects_version_outside_serving_contract(tmp_path):
+    root = str(tmp_path)
+    _publish(root, "v1", SERVING)
+    registry = VersionedModelRegistry(root, SERVING)
+    registry.get()
+
+    _publish(root, "v2", ["FE_lag_24h", "FE_hour"])
+    with pytest.raises(ValueError):
+        registry.refresh()
+
+    assert registry.current == "v1"
+    assert "v2" in registry.rejected
+    assert registry.refresh() is False
+
+
+def test_series_use_their_own_feature_order(tmp_path):
+    root = str(tmp_path)
+    reordered = ["FE_hour", "Temp_K", "FE_lag_24h"]
+    model = _publish(root, "PJME", reordered)
+    registry = ModelRegistry(root, SERVING)
+    registry.validate()
+
+    x = np.array([[1.0, 2.0, 3.0]])
+    expected = model.predict(pd.DataFrame(x, columns=SERVING)[reordered])
+    np.testing.assert_allclose(registry.get("PJME").predict(x), expected)
+
+
+def test_series_validation_fails_on_mismatched_feature_file(tmp_path):
+    root = str(tmp_path)
+    _publish(root, "PJME", SERVING)
+    # selected_features.pkl model o'qitilgan tartibga mos emas
+    joblib.dump(["Temp_K", "FE_hour", "FE_lag_24h"], os.path.join(root, "PJME", "selected_features.pkl"))
+    with pytest.raises(ValueError):
+        ModelRegistry(root, SERVING).validate()
@@ -0,0 +1,29 @@
+import os
+
+from src.stage_cache import REPO_ROOT, StageCache, code_files
+
+
+def test_code_hash_follows_in_repo_imports():
+    files = {os.path.relpath(path, REPO_ROOT) for path in code_files("src.model_trainer")}
+    # artifacts (dtype'lar), profiling va logger o'zgarsa ham baseline keshi eskiradi
+    assert {"src/model_trainer.py", "src/artifacts.py", "src/profiling.py", "src/logger.py"} <= files
+    assert not any("site-packages" in path for path in files)
+
+
+def test_cache_hit_restores_stage_outputs(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    report = tmp_path / "models" / "selected_features.json"
+    calls = []
+
+    def select():
+        calls.append(1)
+        report.parent.mkdir(exist_ok=True)
+        report.write_text('{"selected_features": ["a"]}')
+        return ["a"]
+
+    assert cache.run("selection", select, inputs=["x"], outputs=[str(report)])[0] == ["a"]
+    report.write_text("stale")
+
+    result, _ = cache.run("selection", select, inputs=["x"], outputs=[str(report)])
+    assert result == ["a"] and cache.last_cached and len(calls) == 1
+    assert report.read_text() == '{"selected_features": ["a"]}'
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.state_store import LoadHistoryBuffer
+
+
+def _seeded(max_gap=3):
+    buffer = LoadHistoryBuffer(size=168, window=24, max_gap=max_gap)
+    buffer.extend(np.arange(168, dtype=float))
+    buffer.last_ts = np.datetime64("2018-08-01T00", "h")
+    return buffer
+
+
+def test_short_gap_is_interpolated():
+    buffer = _seeded()
+    buffer.update(np.datetime64("2018-08-01T04", "h"), 171.0)
+
+    assert buffer.ready
+    np.testing.assert_allclose(buffer.history()[-4:], [168.0, 169.0, 170.0, 171.0])
+    buffer.raw_features(np.datetime64("2018-08-01T05", "h"), 300.0)
+
+
+def test_long_gap_resets_history_until_reseeded():
+    buffer = _seeded()
+    # ~8 oylik uzilish: lag/rolling o'ylab topilgan yuklamalardan hisoblanmasligi kerak
+    buffer.update(np.datetime64("2019-04-01T00", "h"), 500.0)
+
+    assert not buffer.ready
+    assert buffer.count == 1
+    with pytest.raises(ValueError, match="uzilish"):
+        buffer.raw_features(np.datetime64("2019-04-01T01", "h"), 300.0)
+
+    for hour in range(1, 168):
+        buffer.update(np.datetime64("2019-04-01T00", "h") + np.timedelta64(hour, "h"), 500.0 + hour)
+    assert buffer.ready
+    assert buffer.reset_reason is None
+
+
+def test_max_gap_is_capped_at_buffer_size():
+    assert LoadHistoryBuffer(size=24, window=24, max_gap=1000).max_gap == 24